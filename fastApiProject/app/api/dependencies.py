@@ -1,32 +1,47 @@
-from typing import Annotated, List, Optional
+from typing import Annotated, List, Optional, TYPE_CHECKING
 
-from fastapi import Depends, HTTPException, status, WebSocket
+from fastapi import Depends, HTTPException, Security, status, WebSocket
+from fastapi.requests import HTTPConnection
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from app.core.config import settings
+from jose import JWTError
+from app.auth.oauth2 import decode_token, user_from_claims
+from app.auth.revocation import revocation_list
+from app.core.container import Container
+from app.core.rate_limit import format_retry_after, rate_limiter
 from app.crud.users_crud import UserCRUD
 from app.models.token import TokenData
 from app.models.users_model import UserDisplay
 
+if TYPE_CHECKING:
+    from app.connector.openai_voice_client import OpenAIVoiceClient
+    from app.connector.session_store import SessionStore
+    from app.connector.voice_connections import VoiceConnectionManager
+    from app.crud.analytics_crud import AnalyticsCRUD
+    from app.crud.eleven_crud import ElevenCRUD
+    from app.crud.image_crud import ImageCRUD
+    from app.crud.transcript_crud import TranscriptCRUD
+    from app.crud.video_crud import VideoCRUD
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
 
-user_crud = UserCRUD()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+def _user_from_token(token: str) -> UserDisplay:
     """
-    Récupère l'utilisateur actuel à partir du token JWT.
+    Authentifie un jeton d'accès : signature, expiration et révocation, puis claims.
+
+    Les rôles, l'identifiant et le statut sont lus dans les claims signés, sans accès base ; seuls
+    les jetons émis avant l'ajout des claims sont encore résolus par une lecture de l'utilisateur.
+    Un jeton émis avant la révocation des jetons de son utilisateur (`revoke_user`) est refusé.
 
     Args:
-        token (Annotated[str, Depends(oauth2_scheme)]): Le token JWT.
+        token (str): Le token JWT.
 
     Returns:
-        UserDisplay: L'utilisateur actuel.
+        UserDisplay: L'utilisateur du jeton.
 
     Raises:
-        HTTPException: Si les informations du token ne sont pas valides.
-
+        HTTPException: Si le jeton est invalide, expiré ou révoqué.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,23 +49,47 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY.get_secret_value(), algorithms=settings.ALGORITHM)
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(email=username)
+        payload = decode_token(token)
     except JWTError:
         raise credentials_exception
-    user = user_crud.get_user_by_email(email=token_data.email)
+    if revocation_list.is_revoked(payload.get("jti")):
+        raise credentials_exception
+    user = user_from_claims(payload)
+    if user is not None:
+        # utilisateur supprimé, désactivé ou dont les rôles ont changé depuis l'émission du jeton
+        if revocation_list.is_user_revoked(user.id, payload.get("iat")):
+            raise credentials_exception
+        return user
+    token_data = TokenData(email=payload["sub"])
+    user = UserCRUD().db.find_one({"email": token_data.email})
     if user is None:
         raise credentials_exception
     return UserDisplay(**user)
 
 
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    """
+    Récupère l'utilisateur actuel à partir du token JWT.
+
+    Args:
+        token (Annotated[str, Depends(oauth2_scheme)]): Le token JWT.
+
+    Returns:
+        UserDisplay: L'utilisateur actuel.
+
+    Raises:
+        HTTPException: Si les informations du token ne sont pas valides.
+
+    """
+    return _user_from_token(token)
+
+
 def check_user_role(current_user: UserDisplay, required_roles: List[str]):
     """
     Vérifie si l'utilisateur actuel possède un des rôles requis.
 
+    Les rôles proviennent des claims du jeton d'accès : la vérification ne fait aucun accès base.
+
     Args:
         current_user (UserDisplay): L'utilisateur actuellement authentifié.
         required_roles (List[str]): La liste des rôles requis pour accéder à la ressource.
@@ -75,23 +114,7 @@ async def get_current_user_ws(token: str):
     Raises:
         HTTPException: Si les informations du token ne sont pas valides.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY.get_secret_value(), algorithms=settings.ALGORITHM)
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(email=username)
-    except JWTError:
-        raise credentials_exception
-    user = user_crud.get_user_by_email(email=token_data.email)
-    if user is None:
-        raise credentials_exception
-    return UserDisplay(**user)
+    return _user_from_token(token)
 
 
 def check_user_role_ws(current_user: UserDisplay, required_roles: List[str]):
@@ -106,4 +129,78 @@ def check_user_role_ws(current_user: UserDisplay, required_roles: List[str]):
         HTTPException: Si l'utilisateur n'a pas le rôle requis.
     """
     if not any(role in current_user.roles for role in required_roles):
-        raise HTTPException(status_code=403, detail="Access Denied: Insufficient permissions")
\ No newline at end of file
+        raise HTTPException(status_code=403, detail="Access Denied: Insufficient permissions")
+
+def rate_limit(scope: str):
+    """
+    Crée la dépendance appliquant le quota d'une portée à l'utilisateur authentifié.
+
+    Args:
+        scope (str): La portée (voir `app/core/rate_limits.json`).
+
+    Returns:
+        Callable: La dépendance, à déclarer dans `dependencies=[Depends(rate_limit(...))]`.
+    """
+    async def check_rate_limit(current_user: Annotated[UserDisplay, Security(get_current_user)]):
+        retry_after = await rate_limiter.check(scope, current_user)
+        if retry_after is not None:
+            # rejet avant tout appel au fournisseur
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded for '{scope}'",
+                headers={"Retry-After": format_retry_after(retry_after)},
+            )
+    return check_rate_limit
+
+
+def get_container(connection: HTTPConnection) -> Container:
+    """
+    Récupère le conteneur de ressources de l'application (requêtes HTTP et WebSockets).
+
+    Args:
+        connection (HTTPConnection): La requête ou le WebSocket en cours.
+
+    Returns:
+        Container: Le conteneur attaché par le lifespan.
+    """
+    return connection.app.state.container
+
+
+def get_voice_agent(container: Annotated[Container, Depends(get_container)]) -> "OpenAIVoiceClient":
+    """Client du pipeline vocal (STT → LLM → TTS)."""
+    return container.get("voice_agent")
+
+
+def get_voice_connections(container: Annotated[Container, Depends(get_container)]) -> "VoiceConnectionManager":
+    """Connexions du WebSocket vocal de ce worker."""
+    return container.get("voice_connections")
+
+
+def get_voice_session_store(container: Annotated[Container, Depends(get_container)]) -> "SessionStore":
+    """Sessions du WebSocket vocal (historique et tour courant), partagées entre workers selon le stockage."""
+    return container.get("voice_session_store")
+
+
+def get_transcript_crud(container: Annotated[Container, Depends(get_container)]) -> "TranscriptCRUD":
+    """Accès aux transcriptions des tours de parole."""
+    return container.get("transcript_crud")
+
+
+def get_image_crud(container: Annotated[Container, Depends(get_container)]) -> "ImageCRUD":
+    """Accès aux images générées."""
+    return container.get("image_crud")
+
+
+def get_video_crud(container: Annotated[Container, Depends(get_container)]) -> "VideoCRUD":
+    """Accès aux vidéos générées."""
+    return container.get("video_crud")
+
+
+def get_eleven_crud(container: Annotated[Container, Depends(get_container)]) -> "ElevenCRUD":
+    """Accès aux agents, sessions et messages ElevenLabs."""
+    return container.get("eleven_crud")
+
+
+def get_analytics_crud(container: Annotated[Container, Depends(get_container)]) -> "AnalyticsCRUD":
+    """Statistiques d'usage (agrégations MongoDB mises en cache)."""
+    return container.get("analytics_crud")
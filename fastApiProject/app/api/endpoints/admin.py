@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Security
+
+from app.api.dependencies import get_current_user, check_user_role
+from app.core.loop_monitor import loop_monitor
+
+
+router = APIRouter()
+
+
+@router.get("/event-loop")
+async def event_loop_report(current_user=Security(get_current_user)):
+    """
+    Rapport de la détection des blocages de l'event loop (activée par `LOOP_MONITOR_ENABLED`).
+
+    Args:
+        current_user: L'utilisateur actuellement authentifié (SuperAdmin uniquement).
+
+    Returns:
+        dict: Les quantiles du retard de la boucle, les blocages par route et les derniers blocages
+        (avec la pile du code bloquant si `LOOP_MONITOR_SAMPLE_STACKS`) et callbacks lents.
+    """
+    check_user_role(current_user, ["SuperAdmin"])
+    return loop_monitor.report()
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Security
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.dependencies import get_current_user, check_user_role, get_analytics_crud
+from app.crud.analytics_crud import AnalyticsCRUD
+from app.models.analytics_model import UsageReport
+
+
+router = APIRouter()
+
+
+@router.get("/usage", response_model=UsageReport)
+async def usage_report(
+    start: Optional[datetime] = Query(None, description="Début de la période (ISO 8601, UTC par défaut)"),
+    end: Optional[datetime] = Query(None, description="Fin de la période (ISO 8601, UTC par défaut)"),
+    interval: Literal["hour", "day"] = Query("day", description="Granularité de la chronologie"),
+    session_id: Optional[str] = Query(None, description="Session de formation : usage de ses participants"),
+    user_email: Optional[str] = Query(None, description="Usage d'un seul utilisateur"),
+    current_user=Security(get_current_user),
+    analytics_crud: AnalyticsCRUD = Depends(get_analytics_crud),
+):
+    """
+    Tableau de bord d'usage : prompts (tokens estimés, part de chaque modèle), images, vidéos et
+    transcriptions, par utilisateur, session et intervalle de temps.
+
+    Les statistiques sont calculées par agrégation côté base et mises en cache par intervalle
+    (`ANALYTICS_CACHE_SECONDS`) : les bornes de la période y sont arrondies.
+
+    Args:
+        start (Optional[datetime]): Le début de la période (début de la session, sinon 30 jours avant la fin).
+        end (Optional[datetime]): La fin de la période (fin de la session, sinon maintenant).
+        interval (str): La granularité de la chronologie (`hour` ou `day`).
+        session_id (Optional[str]): L'identifiant de la session de formation.
+        user_email (Optional[str]): L'adresse e-mail de l'utilisateur.
+        current_user: L'utilisateur actuellement authentifié (formateurs et SuperAdmin).
+
+    Returns:
+        UsageReport: Le rapport d'usage de la période.
+
+    Raises:
+        HTTPException: 400 si la période est vide, 404 si la session n'existe pas.
+    """
+    check_user_role(current_user, ["SuperAdmin", "Formateur-int", "Formateur-ext"])
+    try:
+        report = await run_in_threadpool(analytics_crud.usage_report, start, end, interval, session_id, user_email)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return report
@@ -4,6 +4,7 @@ from typing import List
 from fastapi import APIRouter, Security, Form
 
 from app.api.dependencies import get_current_user, check_user_role
+from app.core.serialization import documents_response
 from app.models.comments_model import CommentModelDisplay, CommentModel
 from app.crud.comments_crud import CommentaireCRUD
 
@@ -57,7 +58,7 @@ async def read_commentaires(current_user=Security(get_current_user)):
         HTTPException: Si l'utilisateur n'est pas un SuperAdmin.
     """
     check_user_role(current_user, ["SuperAdmin"])
-    return crud.get_all_comments()
+    return documents_response(crud.get_all_comment_documents(), CommentModel)
 
 
 @router.get("/comments/{comments_id}", response_model=CommentModel)
@@ -1,48 +1,60 @@
-from fastapi import APIRouter, HTTPException, Security
+from fastapi import APIRouter, HTTPException, Request, Response, Security
 from app.api.dependencies import get_current_user
+from app.connector.doc_catalog import doc_catalog
+from app.core.conditional import etag_headers, not_modified
 from app.models.documentation_model import DocDisplay
-from app.crud.documentation_crud import DocCRUD
 
 router = APIRouter()
 
 
+async def _catalog_response(request: Request, categorie=None) -> Response:
+    # corps JSON déjà sérialisé par le catalogue : ni requête, ni validation, ni encodage
+    etag, body = await doc_catalog.get(categorie)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    return Response(body, status_code=201, media_type="application/json", headers=etag_headers(etag))
+
+
 @router.get("/all_docs/", response_model=list[DocDisplay], status_code=201)
-async def read_all_docs(current_user=Security(get_current_user)):
+async def read_all_docs(request: Request, current_user=Security(get_current_user)):
     """    
     Récupère tous les documents de la collection 'documentation_db'.
 
     Args:
+        request (Request): La requête (en-tête `If-None-Match`).
         current_user: L'utilisateur actuel récupéré via la sécurité.
 
     Returns:
-        list[doc_display]: Une liste d'objets doc_display représentant tous les documents.
+        list[doc_display]: Une liste d'objets doc_display représentant tous les documents, servie
+        par le catalogue en mémoire, ou une réponse 304 si la documentation n'a pas changé
+        depuis l'ETag du client.
 
     Raises:
         HTTPException: Si l'accès est refusé (utilisateur non authentifié).
     """
     if not current_user:
         raise HTTPException(status_code=403, detail="Access denied")
-    doc_crud = DocCRUD()
-    docs = doc_crud.get_all_docs()
-    return docs
+    return await _catalog_response(request)
 
 @router.get("/docs/", response_model=list[DocDisplay], status_code=201)
-async def read_docs_by_categorie(categorie: str, current_user=Security(get_current_user)):
+async def read_docs_by_categorie(categorie: str, request: Request, current_user=Security(get_current_user)):
     """
     Récupère les documents de la collection 'documentation_db' par catégorie.
 
     Args:
         categorie (str): La catégorie des documents à récupérer.
+        request (Request): La requête (en-tête `If-None-Match`).
         current_user: L'utilisateur actuel récupéré via la sécurité.
 
     Returns:
-        list[doc_display]: Une liste d'objets doc_display représentant les documents de la catégorie donnée.
+        list[doc_display]: Une liste d'objets doc_display représentant les documents de la catégorie donnée,
+        servie par le catalogue en mémoire, ou une réponse 304 si ces documents n'ont pas changé
+        depuis l'ETag du client.
 
     Raises:
         HTTPException: Si l'accès est refusé (utilisateur non authentifié).
     """
     if not current_user:
         raise HTTPException(status_code=403, detail="Access denied")
-    doc_crud = DocCRUD()
-    docs = doc_crud.get_doc_by_categorie(categorie)
-    return docs
+    return await _catalog_response(request, categorie)
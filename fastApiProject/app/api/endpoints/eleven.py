@@ -1,24 +1,39 @@
 # app/api/endpoints/eleven.py
-from typing import List, Annotated
+from typing import List, Annotated, Literal
+from urllib.parse import quote
 import asyncio
+import logging
 
-from fastapi import APIRouter, Security, UploadFile, File, Body, HTTPException, status, WebSocket
+from fastapi import APIRouter, Depends, Security, UploadFile, File, Body, HTTPException, status, WebSocket, WebSocketDisconnect
 from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import (
+    check_user_role, check_user_role_ws, get_container, get_current_user, get_current_user_ws, get_eleven_crud,
+    get_voice_agent, rate_limit
+)
 from app.crud.eleven_crud import ElevenCRUD
 from app.models.eleven_model import (
     AgentDisplay, SessionCreate, SessionDisplay,
     MessageCreate, MessageDisplay
 )
-from app.connector.openai_voice_client import voice_agent
+from app.connector.openai_voice_client import OpenAIVoiceClient
+from app.connector.audio_transcoder import AudioFormats, OUTPUT_FORMATS
+from app.connector.voice_pipeline import TRANSCRIPT, TEXT, AUDIO, DONE
 from app.connector.ws_manager import manager
+from app.core.container import Container
+from app.core.rate_limit import rate_limiter
+from app.core.serialization import documents_response
+from app.core.tracing import mark, start_turn
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["eleven"])
-crud = ElevenCRUD()
+
+VOICE_ROLES = ["SuperAdmin", "Formateur-int", "Formateur-ext", "Formé"]
 
 @router.get("/agents", response_model=List[AgentDisplay])
-async def list_agents(current_user=Security(get_current_user)):
+async def list_agents(current_user=Security(get_current_user), crud: ElevenCRUD = Depends(get_eleven_crud)):
     """Liste des agents disponibles via l'API ElevenLabs."""
     docs = await crud.list_agents()
     return [AgentDisplay(**d) for d in docs]
@@ -30,7 +45,8 @@ async def list_agents(current_user=Security(get_current_user)):
 )
 async def start_session(
     agent_id: Annotated[str, Body(..., embed=True)],
-    current_user=Security(get_current_user)
+    current_user=Security(get_current_user),
+    crud: ElevenCRUD = Depends(get_eleven_crud)
 ):
     """Démarre une nouvelle session pour un agent ElevenLabs donné."""
     payload = SessionCreate(agent_id=agent_id)
@@ -38,67 +54,132 @@ async def start_session(
     return SessionDisplay(**doc)
 
 @router.get("/sessions", response_model=List[SessionDisplay])
-async def get_sessions(current_user=Security(get_current_user)):
+async def get_sessions(current_user=Security(get_current_user), crud: ElevenCRUD = Depends(get_eleven_crud)):
     """Récupère toutes les sessions de l'utilisateur connecté."""
     docs = await run_in_threadpool(crud.get_sessions, current_user.id)
     return [SessionDisplay(**d) for d in docs]
 
 @router.post(
     "/sessions/{session_id}/message",
-    response_model=MessageDisplay,
-    status_code=status.HTTP_201_CREATED
+    status_code=status.HTTP_201_CREATED,
+    responses={201: {"content": {mime: {} for mime in OUTPUT_FORMATS.values()}}},
+    dependencies=[Depends(rate_limit("voice"))],
 )
 async def post_message(
     session_id: str,
     file: Annotated[UploadFile, File(...)],
-    current_user=Security(get_current_user)
+    output_format: Literal["mp3", "opus", "pcm", "aac", "flac", "wav"] = "mp3",
+    current_user=Security(get_current_user),
+    crud: ElevenCRUD = Depends(get_eleven_crud),
+    voice_agent: OpenAIVoiceClient = Depends(get_voice_agent),
+    container: Container = Depends(get_container)
 ):
-    """Reçoit un fichier audio, traite transcription, chat et TTS, puis stocke les messages."""
+    """
+    Reçoit un fichier audio et renvoie la réponse vocale en streaming, dès la première phrase
+    synthétisée. Les messages sont stockés et diffusés aux WebSockets de la session ; l'identifiant
+    du message utilisateur et sa transcription (encodée URL) sont renvoyés dans les en-têtes.
+    """
+    check_user_role(current_user, VOICE_ROLES)
+    trace = start_turn("eleven_rest")
     audio_bytes = await file.read()
+    pipeline = voice_agent.pipeline(output_format)
+    events = pipeline.run(audio_bytes, formats=AudioFormats.from_filename(file.filename))
     try:
-        user_text, assistant_text, audio_response = await voice_agent.run_and_transcribe(audio_bytes)
+        # la transcription est attendue avant d'envoyer les en-têtes de la réponse
+        await events.__anext__()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Voice agent error: {e}")
+    if not pipeline.transcript.strip():
+        await events.aclose()
+        raise HTTPException(status_code=422, detail="No speech detected")
 
     # Stockage et broadcast via WebSocket
-    user_msg = crud.create_message(MessageCreate(session_id=session_id, role="user", text=user_text))
+    user_msg = crud.create_message(MessageCreate(session_id=session_id, role="user", text=pipeline.transcript))
     await manager.broadcast(session_id, {
         "role": "user", "text": user_msg["text"], "audio_url": None, "_id": str(user_msg["_id"])
     })
 
-    assistant_msg = crud.create_message(MessageCreate(session_id=session_id, role="assistant", text=assistant_text))
-    await manager.broadcast(session_id, {
-        "role": "assistant", "text": assistant_msg["text"], "audio_url": audio_response, "_id": str(assistant_msg["_id"])
-    })
+    async def audio_stream():
+        async for event in events:
+            if event.kind == AUDIO:
+                yield event.audio
+                mark("first_audio_sent")
+        trace.finish()
+        if pipeline.reply.strip():
+            assistant_msg = crud.create_message(
+                MessageCreate(session_id=session_id, role="assistant", text=pipeline.reply)
+            )
+            await manager.broadcast(session_id, {
+                "role": "assistant", "text": assistant_msg["text"], "audio_url": None, "_id": str(assistant_msg["_id"])
+            })
 
-    return MessageDisplay(**assistant_msg)
+    return StreamingResponse(
+        # diffusion suivie : l'arrêt de l'application attend la fin de la réponse
+        container.track(audio_stream()),
+        status_code=status.HTTP_201_CREATED,
+        media_type=OUTPUT_FORMATS[output_format],
+        headers={
+            "Cache-Control": "no-store",
+            "X-User-Message-Id": str(user_msg["_id"]),
+            "X-Transcription": quote(pipeline.transcript),
+        }
+    )
 
-@router.post(
-    "/sessions/{session_id}/message/stream",
-    response_model=MessageDisplay,
-    status_code=status.HTTP_201_CREATED
-)
-async def post_message_stream(
-    session_id: str,
-    websocket: WebSocket,
-    current_user=Security(get_current_user)
-):
-    """Reçoit le flux raw audio via WebSocket pour transcription et réponse immédiate."""
-    await manager.connect(session_id, websocket)
+@router.websocket("/sessions/{session_id}/message/stream")
+async def post_message_stream(websocket: WebSocket, session_id: str, token: str, output_format: str = "mp3",
+                              crud: ElevenCRUD = Depends(get_eleven_crud),
+                              voice_agent: OpenAIVoiceClient = Depends(get_voice_agent)):
+    """
+    Conversation en duplex intégral : chaque message binaire reçu est un enregistrement complet ;
+    la transcription, les deltas de texte (JSON) et l'audio (binaire) sont renvoyés au fil de l'eau.
+    Une erreur du pipeline est renvoyée (`{"error": ...}`) avant la fermeture (code 1011).
+    """
+    await websocket.accept()
     try:
-        audio_bytes = await websocket.receive_bytes()
-        user_text, assistant_text, audio_response = await voice_agent.run_and_transcribe(audio_bytes)
+        user = await get_current_user_ws(token)
+        check_user_role_ws(user, VOICE_ROLES)
+    except HTTPException as e:
+        await websocket.send_json({"error": e.detail})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
 
-        # Stockage et broadcast
-        user_msg = crud.create_message(MessageCreate(session_id=session_id, role="user", text=user_text))
-        await manager.broadcast(session_id, {"role": "user", "text": user_msg["text"], "audio_url": None, "_id": str(user_msg["_id"])})
-
-        assistant_msg = crud.create_message(MessageCreate(session_id=session_id, role="assistant", text=assistant_text))
-        await manager.broadcast(session_id, {"role": "assistant", "text": assistant_msg["text"], "audio_url": audio_response, "_id": str(assistant_msg["_id"])})
-    finally:
-        manager.disconnect(session_id, websocket)
-        await websocket.close()
-    return MessageDisplay(**assistant_msg)
+    formats = AudioFormats.negotiate({"output_format": output_format})
+    try:
+        while True:
+            audio_bytes = await websocket.receive_bytes()
+            # quota de tours de parole : l'enregistrement est ignoré
+            retry_after = await rate_limiter.check("voice", user)
+            if retry_after is not None:
+                await websocket.send_json({"type": "rate_limited", "retry_after": round(retry_after, 3)})
+                continue
+            trace = start_turn("eleven_ws")
+            pipeline = voice_agent.pipeline(formats.output_format)
+            async for event in pipeline.run(audio_bytes, formats=formats):
+                if event.kind == TRANSCRIPT:
+                    await websocket.send_json({"type": "transcript", "text": event.text})
+                    if event.text.strip():
+                        user_msg = crud.create_message(MessageCreate(session_id=session_id, role="user", text=event.text))
+                        await manager.broadcast(session_id, {"role": "user", "text": user_msg["text"], "audio_url": None, "_id": str(user_msg["_id"])})
+                elif event.kind == TEXT:
+                    await websocket.send_json({"type": "text", "chunk": event.text})
+                elif event.kind == AUDIO:
+                    await websocket.send_bytes(event.audio)
+                    mark("first_audio_sent")
+                elif event.kind == DONE:
+                    await websocket.send_json({"type": "done", "reply": event.text, "timings": trace.finish()})
+                    if event.text.strip():
+                        assistant_msg = crud.create_message(MessageCreate(session_id=session_id, role="assistant", text=event.text))
+                        await manager.broadcast(session_id, {"role": "assistant", "text": assistant_msg["text"], "audio_url": None, "_id": str(assistant_msg["_id"])})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in voice message stream of session {session_id}: {str(e)}")
+        try:
+            await websocket.send_json({"error": str(e)})
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except Exception:
+            # client déjà parti
+            pass
 
 @router.get(
     "/sessions/{session_id}/messages",
@@ -106,11 +187,12 @@ async def post_message_stream(
 )
 async def get_messages(
     session_id: str,
-    current_user=Security(get_current_user)
+    current_user=Security(get_current_user),
+    crud: ElevenCRUD = Depends(get_eleven_crud)
 ):
     """Récupère l'historique complet des messages d'une session."""
     docs = await run_in_threadpool(crud.get_messages, session_id)
-    return [MessageDisplay(**d) for d in docs]
+    return documents_response(docs, MessageDisplay)
 
 @router.websocket("/sessions/{session_id}/ws")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
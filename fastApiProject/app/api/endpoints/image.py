@@ -1,12 +1,11 @@
 from datetime import datetime, timezone
 from typing import List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.params import Security
 from dotenv import load_dotenv
 
-from app.connector.replicate_client import ReplicateClient
-from app.api.dependencies import get_current_user, check_user_role
+from app.api.dependencies import get_current_user, check_user_role, get_image_crud, rate_limit
 from app.models.image_model import ImageRequest, ImageResponse
 from app.crud.image_crud import ImageCRUD
 
@@ -14,14 +13,12 @@ load_dotenv()
 
 router = APIRouter()
 
-replicate_client = ReplicateClient()
-image_crud = ImageCRUD(replicate_client)
 
-
-@router.post("/generate-image/", response_model=ImageResponse)
+@router.post("/generate-image/", response_model=ImageResponse, dependencies=[Depends(rate_limit("image"))])
 async def generate_image_endpoint(
     request: ImageRequest,
-    current_user=Security(get_current_user)
+    current_user=Security(get_current_user),
+    image_crud: ImageCRUD = Depends(get_image_crud)
 ):
     """
     Endpoint pour générer une image à partir d'une phrase donnée.
@@ -54,7 +51,7 @@ async def generate_image_endpoint(
 
 
 @router.get("/user-images/", response_model=List[ImageResponse])
-async def get_user_images(current_user=Security(get_current_user)):
+async def get_user_images(current_user=Security(get_current_user), image_crud: ImageCRUD = Depends(get_image_crud)):
     """
     Récupère les images de l'utilisateur actuel.
 
@@ -78,7 +75,7 @@ async def get_user_images(current_user=Security(get_current_user)):
 
 
 @router.delete("/delete-image/{image_id}")
-async def delete_image(image_id: str):
+async def delete_image(image_id: str, image_crud: ImageCRUD = Depends(get_image_crud)):
     """
     Supprime une image par son identifiant.
 
@@ -92,7 +89,7 @@ async def delete_image(image_id: str):
         HTTPException: Si une erreur se produit lors de la suppression de l'image.
     """
     try:
-        result = await ImageCRUD(replicate_client).delete_image_by_id(image_id)
+        result = await image_crud.delete_image_by_id(image_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
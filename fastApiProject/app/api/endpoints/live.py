@@ -0,0 +1,78 @@
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from app.api.dependencies import check_user_role_ws, get_current_user_ws
+from app.connector.live_updates import live_updates
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.websocket("/ws")
+async def live_websocket(websocket: WebSocket):
+    """
+    Mises à jour en direct de l'utilisateur (prompts, images, vidéos, sessions) sur une seule connexion.
+
+    Le premier message authentifie la connexion : `{"token": "...", "topics": ["images", ...]}`
+    (`topics` facultatif, tous les sujets par défaut). Le serveur répond
+    `{"status": "connected", "topics": [...]}` puis envoie, à chaque changement d'un document
+    visible par l'utilisateur, `{"type": "change", "topic", "operation", "id", "document"}` ; un
+    message `{"type": "resync"}` demande de relire les listes (changements manqués). Un message
+    `ping` du client reçoit `pong`.
+
+    Args:
+        websocket (WebSocket): La connexion WebSocket.
+    """
+    await websocket.accept()
+    try:
+        auth_data = json.loads(await websocket.receive_text())
+        token = auth_data.get("token")
+        if not token:
+            await websocket.send_text(json.dumps({"error": "Authentication required"}))
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        user = await get_current_user_ws(token)
+        check_user_role_ws(user, ["SuperAdmin", "Formateur-int", "Formateur-ext", "Formé"])
+        subscriber = live_updates.subscribe(user, auth_data.get("topics"))
+    except HTTPException as e:
+        await websocket.send_text(json.dumps({"error": e.detail}))
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    except ValueError as e:
+        # JSON invalide ou sujet inconnu
+        await websocket.send_text(json.dumps({"error": str(e)}))
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    except WebSocketDisconnect:
+        return
+
+    async def send_updates():
+        while True:
+            text = await subscriber.queue.get()
+            if text is None:
+                # arrêt du serveur
+                await websocket.close(code=status.WS_1001_GOING_AWAY)
+                return
+            await websocket.send_text(text)
+
+    async def receive_messages():
+        while True:
+            if await websocket.receive_text() == "ping":
+                await websocket.send_text("pong")
+
+    await websocket.send_text(json.dumps({"status": "connected", "topics": sorted(subscriber.topics)}))
+    tasks = [asyncio.create_task(send_updates()), asyncio.create_task(receive_messages())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.info(f"Live updates connection of {subscriber.email} ended: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        live_updates.unsubscribe(subscriber)
@@ -1,18 +1,29 @@
-from datetime import timedelta
+from datetime import datetime
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 
-from app.auth.oauth2 import create_access_token
-from app.api.dependencies import get_current_user
-from app.core.config import settings
+from app.auth.oauth2 import create_token_pair, decode_token, REFRESH_TOKEN
+from app.auth.revocation import revocation_list
+from app.api.dependencies import get_current_user, oauth2_scheme
 from app.crud.users_crud import UserCRUD
-from app.models.token import Token
+from app.models.token import RefreshRequest, Token
 from app.models.users_model import UserDisplay
 
 router = APIRouter()
 
 
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 @router.post("/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
@@ -23,14 +34,14 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         form_data (OAuth2PasswordRequestForm): Le formulaire de demande de mot de passe OAuth2 contenant le nom d'utilisateur et le mot de passe.
 
     Returns:
-        Token: Génération du token si l'authentification est réussie.
+        Token: Le token d'accès (claims signés, courte durée) et le token de rafraîchissement si l'authentification est réussie.
 
     Raises:
         HTTPException: Si le nom d'utilisateur ou le mot de passe est incorrect, une erreur 401 Unauthorized est levée.
     """
     user_crud = UserCRUD()
 
-    user = user_crud.authenticate_user(form_data.username, form_data.password)
+    user = await user_crud.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,11 +49,74 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             headers={"WWW-Authenticate": "Bearer"},
         )
     user_crud.set_user_active(user.email)
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    user.is_active = True
+    return create_token_pair(user)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest):
+    """
+    Échange un token de rafraîchissement contre une nouvelle paire de tokens.
+
+    Les rôles de l'utilisateur sont relus en base. Le token de rafraîchissement utilisé est
+    révoqué : chacun ne sert qu'une fois.
+
+    Args:
+        request (RefreshRequest): Le token de rafraîchissement.
+
+    Returns:
+        Token: Le nouveau token d'accès et le nouveau token de rafraîchissement.
+
+    Raises:
+        HTTPException: Si le token est invalide, expiré, déjà utilisé ou si l'utilisateur n'existe plus.
+    """
+    try:
+        payload = decode_token(request.refresh_token, REFRESH_TOKEN)
+    except JWTError:
+        raise _invalid_refresh_token()
+    if revocation_list.is_revoked(payload.get("jti")):
+        raise _invalid_refresh_token()
+    # révocation atomique avant d'émettre la nouvelle paire : deux échanges concurrents du même
+    # token (sur ce worker ou un autre), un seul l'emporte
+    revoked = await run_in_threadpool(revocation_list.revoke, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    if not revoked:
+        raise _invalid_refresh_token()
+
+    user_crud = UserCRUD()
+    user = await run_in_threadpool(user_crud.db.find_one, {"email": payload["sub"]})
+    if user is None:
+        raise _invalid_refresh_token()
+    return create_token_pair(UserDisplay(**user))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: Annotated[str, Depends(oauth2_scheme)],
+                 user: UserDisplay = Depends(get_current_user),
+                 refresh_token: Optional[str] = Body(default=None, embed=True)):
+    """
+    Révoque le token d'accès courant et, s'il est fourni, le token de rafraîchissement.
+
+    Args:
+        token (str): Le token d'accès à révoquer.
+        user (UserDisplay): L'utilisateur du token d'accès.
+        refresh_token (Optional[str]): Le token de rafraîchissement à révoquer.
+
+    Raises:
+        HTTPException: Si un des tokens n'est pas valide ou si le token de rafraîchissement appartient à un autre utilisateur.
+    """
+    payloads = [decode_token(token)]
+    if refresh_token:
+        try:
+            refresh_payload = decode_token(refresh_token, REFRESH_TOKEN)
+        except JWTError:
+            raise _invalid_refresh_token()
+        if refresh_payload["sub"] != user.email:
+            raise _invalid_refresh_token()
+        payloads.append(refresh_payload)
+    for payload in payloads:
+        # les jetons émis avant l'ajout du `jti` ne peuvent pas être révoqués : ils expirent
+        if "jti" in payload:
+            await run_in_threadpool(revocation_list.revoke, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
 
 
 @router.get("/protected-route")
@@ -56,4 +130,4 @@ async def protected_route(user: UserDisplay = Depends(get_current_user)):
     Returns:
         dict: Un dictionnaire contenant un message de salutation à l'utilisateur authentifié.
     """
-    return {"message": "Hello, " + user["email"]}
+    return {"message": "Hello, " + user.email}
@@ -1,11 +1,12 @@
 import json
 from datetime import timedelta
-import requests
+import httpx
 from fastapi import APIRouter, HTTPException, Security
 import os
 
 from app.api.dependencies import get_current_user, check_user_role
 from app.auth.oauth2 import create_session_token
+from app.connector.http_pool import http_pool
 from app.models.mail_model import InviteRequest
 
 router = APIRouter()
@@ -19,7 +20,7 @@ if not mailgun_key:
 
 
 @router.post("/send_invite/")
-def send_invite(request: InviteRequest, current_user=Security(get_current_user)):
+async def send_invite(request: InviteRequest, current_user=Security(get_current_user)):
     """
     Point de terminaison pour envoyer un email d'invitation à un utilisateur.
 
@@ -49,7 +50,8 @@ def send_invite(request: InviteRequest, current_user=Security(get_current_user))
         invite_link = f"https://ai-explorer.tech/sign-up?session_token={session_token}"
 
         # Envoi du mail via Mailgun
-        response = requests.post(
+        response = await http_pool.request(
+            "POST",
             f"https://api.eu.mailgun.net/v3/{domain_name}/messages",
             auth=("api", mailgun_key),
             data={
@@ -71,7 +73,7 @@ def send_invite(request: InviteRequest, current_user=Security(get_current_user))
         else:
             raise HTTPException(status_code=response.status_code, detail=f"Mailgun error: {response.text}")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.RequestError as e:
         raise HTTPException(status_code=500, detail=f"Error communicating with Mailgun: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render_prometheus
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Expose les métriques du processus au format texte Prometheus (compteurs, jauges, histogrammes
+    et quantiles p50/p95/p99 des latences).
+
+    Chaque worker expose ses propres valeurs : la collecte se fait par réplique.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
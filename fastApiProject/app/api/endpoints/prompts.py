@@ -1,9 +1,11 @@
 from typing import List, Annotated
 import base64
 
-from fastapi import APIRouter, HTTPException, status, Security, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Security, UploadFile, Form, Request
 
-from app.api.dependencies import get_current_user, check_user_role
+from app.api.dependencies import get_current_user, check_user_role, rate_limit
+from app.core.conditional import etag_headers, list_etag, not_modified
+from app.core.serialization import documents_response
 from app.crud.prompt_crud import PromptCRUD
 from app.models.prompt_model import PromptDisplay, PromptUpdate
 
@@ -56,7 +58,8 @@ class PromptServices:
 prompt_services = PromptServices()
 
 
-@router.post("/create_prompt/{model_type}", response_model=PromptDisplay, status_code=status.HTTP_201_CREATED)
+@router.post("/create_prompt/{model_type}", response_model=PromptDisplay, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(rate_limit("prompt"))])
 async def create_prompt(
     model_type: str,
     page: str,
@@ -81,44 +84,46 @@ async def create_prompt(
 
 
 @router.get("/list_prompt_model", response_model=List[PromptDisplay])
-async def list_prompts_model(model, current_user=Security(get_current_user)):
+async def list_prompts_model(model, request: Request, current_user=Security(get_current_user)):
     """
     Récupère une liste de tous les prompts stockés dans la base de données.
 
     Args:
         model: Le modèle à utiliser pour générer les prompts.
+        request (Request): La requête (en-tête `If-None-Match`).
         current_user: L'utilisateur actuellement authentifié (non utilisé directement ici, mais nécessaire pour la sécurité).
 
 
     Returns:
-        List[PromptDisplay]: Une liste des prompts, chacun formaté selon le modèle PromptDisplay.
+        List[PromptDisplay]: Une liste des prompts, chacun formaté selon le modèle PromptDisplay,
+        ou une réponse 304 si la liste n'a pas changé depuis l'ETag du client.
     """
     check_user_role(current_user, ["SuperAdmin",
                     "Formateur-int", "Formateur-ext", "Formé"])
 
+    etag = list_etag(prompt_services.prompt_crud.prompts_version(current_user.email, model))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
     prompts = prompt_services.prompt_crud.get_prompts_by_user_model(current_user.email, model)
-    transformed_prompts = []
-
-    for prompt in prompts:
-        transformed_prompt = prompt_services.transform_prompt(prompt)
-        transformed_prompts.append(transformed_prompt)
-
-    # Utilisation du modèle PromptDisplay avec les données transformées
-    return [PromptDisplay(**prompt) for prompt in transformed_prompts]
+    # documents sérialisés directement, sans construire puis revalider les modèles
+    return documents_response(map(prompt_services.transform_prompt, prompts), PromptDisplay, headers=etag_headers(etag))
 
 
 @router.get("/list_prompts_page", response_model=List[PromptDisplay])
-async def list_prompts_page(model, page, current_user=Security(get_current_user)):
+async def list_prompts_page(model, page, request: Request, current_user=Security(get_current_user)):
     """
     Point de terminaison pour lister les prompts pour une page et un modèle spécifiques.
 
     Args:
         model (str): Le modèle utiliser pour générer les prompts.
         page (int): Le nom de la page pour récupérer les prompts.
+        request (Request): La requête (en-tête `If-None-Match`).
         current_user (User): L'utilisateur actuellement authentifié, obtenu via la dépendance de sécurité.
 
     Returns:
-        List[PromptDisplay]: Une liste de prompts transformés en modèle PromptDisplay.
+        List[PromptDisplay]: Une liste de prompts transformés en modèle PromptDisplay, ou une
+        réponse 304 si la liste n'a pas changé depuis l'ETag du client.
 
     Raises:
         HTTPException: Si l'utilisateur n'a pas le rôle requis.
@@ -130,40 +135,37 @@ async def list_prompts_page(model, page, current_user=Security(get_current_user)
     check_user_role(current_user, ["SuperAdmin",
                     "Formateur-int", "Formateur-ext", "Formé"])
 
+    etag = list_etag(prompt_services.prompt_crud.prompts_version(current_user.email, model, page))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
     prompts = prompt_services.prompt_crud.get_prompts_by_user_model_page(
         current_user.email, model, page)
-    transformed_prompts = []
-
-    for prompt in prompts:
-        transformed_prompt = prompt_services.transform_prompt(prompt)
-        transformed_prompts.append(transformed_prompt)
-
-    # Utilisation du modèle PromptDisplay avec les données transformées
-    return [PromptDisplay(**prompt) for prompt in transformed_prompts]
+    # documents sérialisés directement, sans construire puis revalider les modèles
+    return documents_response(map(prompt_services.transform_prompt, prompts), PromptDisplay, headers=etag_headers(etag))
 
 
 @router.get("/list_prompt_user", response_model=List[PromptDisplay])
-async def list_prompts_user(current_user=Security(get_current_user)):
+async def list_prompts_user(request: Request, current_user=Security(get_current_user)):
     """
     Retrouve la liste de prompt lié a l'utilisateur.
     
     Parameters:
+    - request: La requête (en-tête `If-None-Match`).
     - current_user: L'utilisateur actuel .
     
     Returns:
-    - La liste des prompts sous forme de liste de promptdisplay .
+    - La liste des prompts sous forme de liste de promptdisplay, ou une réponse 304 si elle n'a pas changé.
     """
     check_user_role(current_user, ["SuperAdmin",
                     "Formateur-int", "Formateur-ext", "Formé"])
+    etag = list_etag(prompt_services.prompt_crud.prompts_version(current_user.email))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
     prompts = prompt_services.prompt_crud.get_prompts_by_user(current_user.email)
-    transformed_prompts = []
-
-    for prompt in prompts:
-        transformed_prompt = prompt_services.transform_prompt(prompt)
-        transformed_prompts.append(transformed_prompt)
-
-    # Utilisation du modèle PromptDisplay avec les données transformées
-    return [PromptDisplay(**prompt) for prompt in transformed_prompts]
+    # documents sérialisés directement, sans construire puis revalider les modèles
+    return documents_response(map(prompt_services.transform_prompt, prompts), PromptDisplay, headers=etag_headers(etag))
 
 
 @router.get("/prompts/{prompt_id}", response_model=PromptDisplay)
@@ -4,7 +4,8 @@ import httpx
 import os
 from dotenv import load_dotenv
 
-from app.api.dependencies import get_current_user, check_user_role
+from app.api.dependencies import get_current_user, check_user_role, rate_limit
+from app.connector.http_pool import http_pool
 from app.crud.transcript_crud import TranscriptCRUD
 from app.models.transcript_model import TranscriptCreate
 
@@ -18,7 +19,7 @@ if not OPENAI_KEY:
 router = APIRouter(tags=["realtime"])
 transcript_crud = TranscriptCRUD()
 
-@router.post("/webrtc-offer", response_class=PlainTextResponse)
+@router.post("/webrtc-offer", response_class=PlainTextResponse, dependencies=[Depends(rate_limit("voice"))])
 async def webrtc_offer(
     sdp: str = Body(..., media_type="application/sdp"),
     model: str = "gpt-4o-realtime-preview",
@@ -40,19 +41,19 @@ async def webrtc_offer(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(url, content=sdp, headers=headers)
-            
-            # Check if the response contains a valid SDP answer, even if status code is not 200
-            response_text = resp.text
-            if response_text.startswith("v=0"):
-                # This appears to be a valid SDP answer, return it regardless of status code
-                return response_text
-            elif resp.status_code != 200:
-                # Only raise an exception if it's not a valid SDP answer and status code is not 200
-                raise HTTPException(500, f"OpenAI Realtime API error: {response_text}")
-            
-            return response_text  # Return the SDP answer
+        # shared pool: the connection to api.openai.com is reused across offers
+        resp = await http_pool.request("POST", url, content=sdp, headers=headers)
+
+        # Check if the response contains a valid SDP answer, even if status code is not 200
+        response_text = resp.text
+        if response_text.startswith("v=0"):
+            # This appears to be a valid SDP answer, return it regardless of status code
+            return response_text
+        elif resp.status_code != 200:
+            # Only raise an exception if it's not a valid SDP answer and status code is not 200
+            raise HTTPException(500, f"OpenAI Realtime API error: {response_text}")
+
+        return response_text  # Return the SDP answer
     except httpx.RequestError as e:
         raise HTTPException(500, f"Request to OpenAI failed: {str(e)}")
 
@@ -4,9 +4,9 @@ from datetime import datetime, timedelta
 from email_validator import EmailNotValidError
 from fastapi import APIRouter, HTTPException, Security, Form, UploadFile, File
 from pydantic.v1 import  validate_email
-import pandas as pd
 
 from app.api.dependencies import get_current_user, check_user_role
+from app.core.serialization import documents_response
 from app.models.session_model import SessionBase, SessionDisplay, SessionUpdate
 from app.crud.sessions_crud import SessionCRUD
 
@@ -62,6 +62,8 @@ async def create_session(
         if file_type in ['csv', 'txt']:
             emails_list = content.decode().splitlines()
         elif file_type in ['xls', 'xlsx']:
+            import pandas as pd  # import lourd, limité aux imports de fichiers Excel
+
             df = pd.read_excel(io.BytesIO(content))
             emails_list = df.iloc[:, 0].tolist()
 
@@ -100,7 +102,7 @@ async def read_all_session(current_user=Security(get_current_user)):
     check_user_role(current_user, ["SuperAdmin",
                     "Formateur-int", "Formateur-ext"])
     sessions = session_crud.get_all_sessions()
-    return [SessionDisplay(**session) for session in sessions]
+    return documents_response(sessions, SessionDisplay)
 
 
 @router.get("/get/{session_id}", response_model=SessionDisplay)
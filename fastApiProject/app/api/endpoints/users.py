@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Security
+from fastapi import APIRouter, Depends, HTTPException, status, Security, Request
 from app.api.dependencies import get_current_user, check_user_role
+from app.core.conditional import etag_headers, list_etag, not_modified
 from app.core.security import verify_sessions_token
+from app.core.serialization import documents_response
 from app.crud.users_crud import UserCRUD
 from app.models.users_model import UserCreate, UserDisplay, UserUpdate
 from typing import List
@@ -39,20 +41,22 @@ async def register(user_data: UserCreate):
         UserDisplay: Les données de l'utilisateur créé.
     """
 
-    new_user = user_crud.create_user(user_data)
+    new_user = await user_crud.create_user(user_data)
     return new_user
 
 
 @router.get("/", response_model=List[UserDisplay])
-async def read_all_users(current_user=Security(get_current_user)):
+async def read_all_users(request: Request, current_user=Security(get_current_user)):
     """
     Récupère tous les utilisateurs de la base de données.
 
     Args:
+        request (Request): La requête (en-tête `If-None-Match`).
         current_user (UserDisplay): L'utilisateur actuellement authentifié.
 
     Returns:
-        List[UserDisplay]: La liste des utilisateurs de la base de données.
+        List[UserDisplay]: La liste des utilisateurs de la base de données, ou une réponse 304
+        si elle n'a pas changé depuis l'ETag du client.
 
     Raises:
         HTTPException: Si l'utilisateur n'est pas authentifié.
@@ -62,10 +66,16 @@ async def read_all_users(current_user=Security(get_current_user)):
                     "Formateur-int", "Formateur-ext"])
 
     try:
+        # version lue avant la liste : une écriture entre les deux donne un ETag périmé, jamais une liste périmée
+        etag = list_etag(user_crud.users_version())
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
         users = user_crud.get_all_users()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    return [UserDisplay(**user) for user in users]
+    # projection sur UserDisplay : le mot de passe haché n'est pas renvoyé
+    return documents_response(users, UserDisplay, headers=etag_headers(etag))
 
 
 @router.get("/by-email/{email}", response_model=UserDisplay)
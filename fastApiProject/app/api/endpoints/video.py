@@ -1,12 +1,11 @@
 from datetime import datetime, timezone
 from typing import List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.params import Security
 from dotenv import load_dotenv
 
-from app.connector.replicate_client import ReplicateClient
-from app.api.dependencies import get_current_user, check_user_role
+from app.api.dependencies import get_current_user, check_user_role, get_video_crud, rate_limit
 from app.models.video_model import VideoRequest, VideoResponse
 from app.crud.video_crud import VideoCRUD
 
@@ -15,14 +14,12 @@ load_dotenv()
 
 router = APIRouter()
 
-replicate_client = ReplicateClient()
-video_crud = VideoCRUD(replicate_client)
 
-
-@router.post("/generate-video/", response_model=VideoResponse)
+@router.post("/generate-video/", response_model=VideoResponse, dependencies=[Depends(rate_limit("video"))])
 async def generate_video_endpoint(
         request: VideoRequest,
-        current_user=Security(get_current_user)
+        current_user=Security(get_current_user),
+        video_crud: VideoCRUD = Depends(get_video_crud)
 ):
     """
     Génère une vidéo basée sur une invite textuelle.
@@ -52,7 +49,7 @@ async def generate_video_endpoint(
 
 
 @router.get("/user-videos/", response_model=List[VideoResponse])
-async def get_user_videos(current_user=Security(get_current_user)):
+async def get_user_videos(current_user=Security(get_current_user), video_crud: VideoCRUD = Depends(get_video_crud)):
     """
     Récupère la liste des vidéos générées par l'utilisateur authentifié, uniquement celles qui sont valides.
 
@@ -76,7 +73,7 @@ async def get_user_videos(current_user=Security(get_current_user)):
 
 
 @router.delete("/delete-video/{video_id}")
-async def delete_video(video_id: str):
+async def delete_video(video_id: str, video_crud: VideoCRUD = Depends(get_video_crud)):
     """
     Supprime une vidéo par son identifiant.
 
@@ -90,7 +87,7 @@ async def delete_video(video_id: str):
         HTTPException: Si une erreur survient lors de la suppression de la vidéo.
     """
     try:
-        result = await VideoCRUD(replicate_client).delete_video_by_id(video_id)
+        result = await video_crud.delete_video_by_id(video_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
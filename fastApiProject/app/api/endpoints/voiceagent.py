@@ -136,26 +136,31 @@
 
 
 # app/api/routers/voice_agent.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Security, status, Body
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Security, status, Body, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ValidationError
+from typing import Literal
+from urllib.parse import quote
 import json, asyncio
 
-from app.api.dependencies import get_current_user, check_user_role
+from app.api.dependencies import (
+    get_container, get_current_user, check_user_role, get_transcript_crud, get_voice_agent, rate_limit
+)
 from app.crud.transcript_crud import TranscriptCRUD
 from app.models.transcript_model import TranscriptCreate
 from app.models.voice_agent_model import MessageSchema, VoiceAgentResponse
-from app.connector.openai_voice_client import voice_agent
-import os
+from app.connector.openai_voice_client import CHAT_MODEL, VOICE_PERSONALITY, OpenAIVoiceClient
+from app.connector.audio_transcoder import AudioFormats, OUTPUT_FORMATS
+from app.connector.usage_counters import usage_counters
+from app.connector.voice_pipeline import AUDIO
+from app.core.container import Container
+from app.core.tracing import mark, start_turn
+from app.core.utils import estimate_tokens
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Ensure VOICE_PERSONALITY is set on the singleton
-voice_agent.VOICE_PERSONALITY = os.getenv("VOICE_PERSONALITY", "")
-
 router = APIRouter(tags=["voice-agent"])
-transcript_crud = TranscriptCRUD()
 
 # ─── MODELS ────────────────────────────────────────────────────────────────
 
@@ -172,6 +177,8 @@ class ChatResponse(BaseModel):
 
 class TTSRequest(BaseModel):
     text: str
+    # pcm (24 kHz, 16 bits mono) ou opus réduisent la latence du premier octet côté client
+    response_format: Literal["mp3", "opus", "pcm", "aac", "flac", "wav"] = "mp3"
 
 # ─── 1) TRANSCRIBE ──────────────────────────────────────────────────────────
 
@@ -179,16 +186,21 @@ class TTSRequest(BaseModel):
     "/transcribe",
     response_model=TranscribeResponse,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("voice"))],
 )
 async def transcribe_audio(
+    response: Response,
     file: UploadFile = File(...),
     current_user=Security(get_current_user),
+    voice_agent: OpenAIVoiceClient = Depends(get_voice_agent),
+    transcript_crud: TranscriptCRUD = Depends(get_transcript_crud),
 ):
     check_user_role(current_user, ["SuperAdmin", "Formateur-int", "Formateur-ext", "Formé"])
 
+    trace = start_turn("voice_rest")
     audio_bytes = await file.read()
     try:
-        text = await voice_agent.transcribe_audio(audio_bytes)
+        text = await voice_agent.transcribe_audio(audio_bytes, AudioFormats.from_filename(file.filename))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription error: {e}")
 
@@ -198,6 +210,8 @@ async def transcribe_audio(
             text=text
         ))
 
+    trace.finish()
+    response.headers["Server-Timing"] = trace.server_timing()
     return TranscribeResponse(transcription=text)
 
 
@@ -207,17 +221,19 @@ async def transcribe_audio(
     "/chat",
     response_model=ChatResponse,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("voice"))],
 )
 async def chat_with_agent(
     payload: ChatRequest,
     current_user=Security(get_current_user),
+    voice_agent: OpenAIVoiceClient = Depends(get_voice_agent),
 ):
     check_user_role(current_user, ["SuperAdmin", "Formateur-int", "Formateur-ext", "Formé"])
 
     # Reconstruire le prompt
     messages = []
-    if voice_agent.VOICE_PERSONALITY:
-        messages.append({"role": "system", "content": voice_agent.VOICE_PERSONALITY})
+    if VOICE_PERSONALITY:
+        messages.append({"role": "system", "content": VOICE_PERSONALITY})
     for msg in payload.history:
         messages.append({"role": msg.role, "content": msg.content})
     messages.append({"role": "user", "content": payload.user_text})
@@ -226,6 +242,8 @@ async def chat_with_agent(
         assistant_text = await voice_agent.chat_reply(messages)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {e}")
+    usage_counters.record("voice", current_user.email, CHAT_MODEL,
+                          tokens=estimate_tokens(payload.user_text, assistant_text))
 
     # Historique renvoyé (seulement user + assistant)
     filtered_hist = [
@@ -245,11 +263,14 @@ async def chat_with_agent(
 @router.post(
     "/tts-stream",
     status_code=status.HTTP_200_OK,
-    responses={200: {"content": {"audio/mpeg": {}}}}
+    responses={200: {"content": {mime: {} for mime in OUTPUT_FORMATS.values()}}},
+    dependencies=[Depends(rate_limit("voice"))],
 )
 async def tts_stream(
     payload: TTSRequest = Body(...),
     current_user=Security(get_current_user),
+    voice_agent: OpenAIVoiceClient = Depends(get_voice_agent),
+    container: Container = Depends(get_container),
 ):
     # 1) Vérifie le rôle
     check_user_role(current_user, ["SuperAdmin", "Formateur-int", "Formateur-ext", "Formé"])
@@ -258,7 +279,7 @@ async def tts_stream(
     async def audio_generator():
         try:
             # voice_agent.tts_stream doit être un async def avec yield → renvoie un AsyncGenerator[bytes, None]
-            async for chunk in voice_agent.tts_stream(payload.text):
+            async for chunk in voice_agent.tts_stream(payload.text, payload.response_format):
                 yield chunk
         except Exception as e:
             # Propagation de l’erreur pour que FastAPI renvoie un 500
@@ -266,9 +287,70 @@ async def tts_stream(
 
     # 3) On renvoie la réponse en streaming
     return StreamingResponse(
-        audio_generator(),
-        media_type="audio/mpeg",
+        container.track(audio_generator()),
+        media_type=OUTPUT_FORMATS[payload.response_format],
         headers={
             "Cache-Control": "no-store"
         }
     )
+
+
+# ─── 4) CHAT STREAM (STT → LLM → TTS) ───────────────────────────────────────
+
+@router.post(
+    "/chat-stream",
+    status_code=status.HTTP_200_OK,
+    responses={200: {"content": {mime: {} for mime in OUTPUT_FORMATS.values()}}},
+    dependencies=[Depends(rate_limit("voice"))],
+)
+async def voice_chat_stream(
+    file: UploadFile = File(...),
+    history: str = Form("[]"),
+    response_format: Literal["mp3", "opus", "pcm", "aac", "flac", "wav"] = Form("mp3"),
+    current_user=Security(get_current_user),
+    voice_agent: OpenAIVoiceClient = Depends(get_voice_agent),
+    transcript_crud: TranscriptCRUD = Depends(get_transcript_crud),
+    container: Container = Depends(get_container),
+):
+    check_user_role(current_user, ["SuperAdmin", "Formateur-int", "Formateur-ext", "Formé"])
+    try:
+        hist_objs = [MessageSchema(**m) for m in json.loads(history)]
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid history: {e}")
+
+    trace = start_turn("voice_rest")
+    audio_bytes = await file.read()
+    pipeline = voice_agent.pipeline(response_format)
+    events = pipeline.run(
+        audio_bytes,
+        [m.model_dump() for m in hist_objs],
+        AudioFormats.from_filename(file.filename),
+    )
+    # la transcription est attendue avant d'envoyer les en-têtes, le reste est diffusé au fil de l'eau
+    try:
+        await events.__anext__()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Transcription error: {e}")
+
+    await transcript_crud.create_transcript(TranscriptCreate(
+            user_id=current_user.id,
+            text=pipeline.transcript
+        ))
+
+    async def audio_generator():
+        async for event in events:
+            if event.kind == AUDIO:
+                yield event.audio
+                mark("first_audio_sent")
+        trace.finish()
+        usage_counters.record("voice", current_user.email, CHAT_MODEL,
+                              tokens=estimate_tokens(pipeline.transcript, pipeline.reply))
+
+    return StreamingResponse(
+        container.track(audio_generator()),
+        media_type=OUTPUT_FORMATS[response_format],
+        headers={
+            "Cache-Control": "no-store",
+            "X-Transcription": quote(pipeline.transcript)
+        }
+    )
@@ -5,11 +5,28 @@ import json
 import io
 import asyncio
 import logging
+import uuid
 from typing import List, Dict, Any, Optional
 
-from app.api.dependencies import get_current_user_ws, check_user_role_ws
+from app.api.dependencies import (
+    get_container, get_current_user_ws, check_user_role_ws, get_transcript_crud, get_voice_agent,
+    get_voice_connections, get_voice_session_store
+)
 from app.models.voice_agent_model import MessageSchema
-from app.connector.openai_voice_client import voice_agent, openai_client
+from app.connector.openai_voice_client import CHAT_MODEL, OpenAIVoiceClient
+from app.connector.audio_transcoder import AudioFormats
+from app.connector.session_store import SessionStore
+from app.connector.usage_counters import usage_counters
+from app.connector.voice_pipeline import TRANSCRIPT, TEXT, AUDIO
+from app.connector.voice_protocol import (
+    make_codec, decode_frame, FRAME_AUDIO, PROTOCOL_JSON, PROTOCOL_BINARY, PROTOCOL_VERSION
+)
+from app.connector.voice_connections import VoiceConnectionManager
+from app.connector.ws_outbox import STATUS, PARTIAL, LLM_CHUNK
+from app.core.container import Container
+from app.core.rate_limit import rate_limiter
+from app.core.tracing import start_turn
+from app.core.utils import estimate_tokens
 from app.crud.transcript_crud import TranscriptCRUD
 from app.models.transcript_model import TranscriptCreate
 import os
@@ -24,36 +41,14 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["voice-agent-ws"])
-transcript_crud = TranscriptCRUD()
-
-# Connection manager to handle multiple WebSocket connections
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, client_id: str):
-        # Remove the websocket.accept() call here
-        self.active_connections[client_id] = websocket
-        logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
-
-
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
-
-    async def send_audio(self, client_id: str, audio_chunk: bytes):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_bytes(audio_chunk)
-
-    async def send_text(self, client_id: str, message: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
-
-manager = ConnectionManager()
 
 @router.websocket("/ws/voice")
-async def voice_websocket(websocket: WebSocket):
+async def voice_websocket(websocket: WebSocket,
+                          voice_agent: OpenAIVoiceClient = Depends(get_voice_agent),
+                          manager: VoiceConnectionManager = Depends(get_voice_connections),
+                          session_store: SessionStore = Depends(get_voice_session_store),
+                          transcript_crud: TranscriptCRUD = Depends(get_transcript_crud),
+                          container: Container = Depends(get_container)):
     # Accept the connection with compression enabled
     await websocket.accept(subprotocol="permessage-deflate")
     
@@ -64,6 +59,13 @@ async def voice_websocket(websocket: WebSocket):
     history = []
     stt_buffer = []
     current_transcription = ""
+    protocol = PROTOCOL_JSON
+    formats = AudioFormats()
+    turn_id = 0
+    # quota de messages propre à cette connexion (et non partagé entre les onglets de l'utilisateur)
+    connection_key = uuid.uuid4().hex
+    # enregistrement rejeté par le quota : son audio est ignoré jusqu'à la fin du tour
+    discarding = False
     
     try:
         # First message should be authentication
@@ -88,23 +90,71 @@ async def voice_websocket(websocket: WebSocket):
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
         
+        # Négociation du protocole : JSON historique par défaut, trames binaires sur demande
+        if auth_data.get("protocol") == PROTOCOL_BINARY:
+            protocol = PROTOCOL_BINARY
+        # Négociation des formats audio : WebM/Opus en entrée, MP3 en sortie par défaut
+        try:
+            formats = AudioFormats.negotiate(auth_data)
+        except ValueError as e:
+            await websocket.send_text(json.dumps({"error": str(e)}))
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        # Reprise de la session demandée (quel que soit le worker qui l'a créée), sinon nouvelle session
+        session = None
+        if auth_data.get("session_id"):
+            session = await session_store.get(auth_data["session_id"], client_id)
+        resumed = session is not None
+        if session is None:
+            # Process history if provided (anciens clients sans session)
+            if "history" in auth_data:
+                try:
+                    history = json.loads(auth_data["history"])
+                except:
+                    history = []
+            session = await session_store.create(client_id, history)
+        session_id = session["session_id"]
+        history = session["history"]
+        turn_id = session["turn_id"]
+
+        # Send confirmation (toujours en JSON, pour que le client sache quel protocole a été retenu)
+        connected = {
+            "status": "connected",
+            "user_id": client_id,
+            "session_id": session_id,
+            "resumed": resumed,
+            "protocol": protocol,
+            "protocol_version": PROTOCOL_VERSION,
+            "input_format": formats.input_format,
+            "output_format": formats.output_format,
+            "output_mime": formats.output_mime
+        }
+        if resumed:
+            connected["history"] = history
+        await websocket.send_text(json.dumps(connected))
+
         # Register connection
-        await manager.connect(websocket, client_id)
-        
-        # Send confirmation
-        await websocket.send_text(json.dumps({"status": "connected", "user_id": client_id}))
-        
-        # Process history if provided
-        if "history" in auth_data:
-            try:
-                history = json.loads(auth_data["history"])
-            except:
-                history = []
+        await manager.connect(websocket, client_id, make_codec(protocol))
         
         # Main processing loop
         while True:
             # Receive message (could be binary audio data or text control message)
             message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            # Quota de messages de la connexion : au-delà, l'enregistrement en cours est rejeté en
+            # entier (un tour transcrit avec des trous serait faux) ; les commandes restent traitées
+            retry_after = await rate_limiter.check("ws_message", user, key=connection_key)
+            if retry_after is not None and "bytes" in message:
+                if not discarding:
+                    discarding = True
+                    audio_chunks = []
+                    await manager.send_json(client_id, {"status": "rate_limited", "scope": "ws_message",
+                                                        "retry_after": round(retry_after, 3),
+                                                        "turn_discarded": True})
+                continue
             
             if "text" in message:
                 # Handle text control messages
@@ -112,38 +162,74 @@ async def voice_websocket(websocket: WebSocket):
                 command = control_message.get("command")
                 
                 if command == "end_audio":
+                    if discarding:
+                        # fin du tour rejeté : le prochain enregistrement est de nouveau accepté
+                        discarding = False
+                        audio_chunks = []
+                        continue
                     # Process the complete audio when client signals end of recording
                     if audio_chunks:
                         # Combine all audio chunks
                         complete_audio = b''.join(audio_chunks)
                         audio_chunks = []  # Reset for next recording
+
+                        # Quota de tours de parole : rejet avant tout appel au fournisseur
+                        retry_after = await rate_limiter.check("voice", user)
+                        if retry_after is not None:
+                            await manager.send_json(client_id, {"status": "rate_limited", "scope": "voice",
+                                                                "retry_after": round(retry_after, 3)})
+                            continue
+                        turn_id += 1
                         
-                        # Process in background task to not block the WebSocket
-                        asyncio.create_task(
+                        # Process in background task to not block the WebSocket (attendue à l'arrêt)
+                        container.spawn(
                             process_complete_audio(
                                 client_id, 
                                 complete_audio, 
                                 history, 
-                                user
+                                user,
+                                turn_id=turn_id,
+                                formats=formats,
+                                session_id=session_id,
+                                voice_agent=voice_agent,
+                                manager=manager,
+                                session_store=session_store,
+                                transcript_crud=transcript_crud
                             )
                         )
                 
                 elif command == "reset":
                     # Reset state
                     audio_chunks = []
+                    discarding = False
                     stt_buffer = []
                     current_transcription = ""
                     
                     # Optionally reset history if requested
                     if control_message.get("reset_history", False):
                         history = []
+                        await session_store.reset_history(session_id)
                     
-                    await websocket.send_text(json.dumps({"status": "reset"}))
+                    await manager.send_json(client_id, {"status": "reset"})
 
 
             elif "bytes" in message:
                 # Handle binary audio data
                 audio_chunk = message["bytes"]
+                if discarding:
+                    continue
+                if protocol == PROTOCOL_BINARY:
+                    # protocole tramé : seules les trames audio sont acceptées, l'audio brut est
+                    # réservé au protocole JSON (son premier octet ne peut pas être distingué d'un en-tête)
+                    frame = decode_frame(audio_chunk)
+                    if frame is None or frame.frame_type != FRAME_AUDIO:
+                        # l'enregistrement en cours est incomplet : il est abandonné jusqu'à la fin du tour
+                        discarding = True
+                        audio_chunks = []
+                        await manager.send_json(client_id, {"status": "error",
+                                                            "error": "Invalid frame: binary protocol expects audio frames"})
+                        continue
+                    audio_chunk = frame.payload
                 audio_chunks.append(audio_chunk)
 
                 # Si nous avons suffisamment de données audio, commencer la transcription en streaming
@@ -151,27 +237,31 @@ async def voice_websocket(websocket: WebSocket):
                     # Créer une copie des chunks actuels pour le traitement
                     current_chunks = audio_chunks.copy()
                     # Traiter en arrière-plan sans bloquer
-                    asyncio.create_task(
+                    container.spawn(
                         process_streaming_audio(
                             client_id,
                             current_chunks,
                             history,
-                            user
+                            user,
+                            turn_id + 1,
+                            formats,
+                            voice_agent=voice_agent,
+                            manager=manager
                         )
                     )
 
-                # Toujours accuser réception
-                await websocket.send_text(json.dumps({"status": "chunk_received", "size": len(audio_chunk)}))
+                # Accusé de réception groupé, envoyé périodiquement par la file d'envoi
+                manager.ack(client_id, len(audio_chunk))
     
     except WebSocketDisconnect:
         logger.info(f"Client {client_id} disconnected")
         if client_id:
-            manager.disconnect(client_id)
+            manager.disconnect(client_id, websocket)
     
     except Exception as e:
         logger.error(f"Error in WebSocket: {str(e)}")
         if client_id:
-            manager.disconnect(client_id)
+            manager.disconnect(client_id, websocket)
         try:
             await websocket.send_text(json.dumps({"error": str(e)}))
             await websocket.close()
@@ -179,24 +269,28 @@ async def voice_websocket(websocket: WebSocket):
             pass
 
 
-async def process_streaming_audio(client_id: str, audio_chunks: List[bytes], history: List[Dict[str, Any]], user):
+async def process_streaming_audio(client_id: str, audio_chunks: List[bytes], history: List[Dict[str, Any]], user,
+                                  turn_id: Optional[int] = None, formats: Optional[AudioFormats] = None, *,
+                                  voice_agent: OpenAIVoiceClient, manager: VoiceConnectionManager):
     """Traite l'audio en streaming pendant que l'utilisateur parle encore"""
     try:
         # Combiner les chunks audio
         audio_data = b''.join(audio_chunks)
 
         # Transcription
-        partial_text = await voice_agent.transcribe_audio(audio_data)
+        partial_text = await voice_agent.transcribe_audio(audio_data, formats)
 
         # Si nous avons du texte, commencer à préparer la réponse LLM
         if partial_text.strip():
             # Informer le client
-            await manager.send_text(
+            await manager.send_json(
                 client_id,
-                json.dumps({
+                {
                     "status": "partial_transcription",
                     "transcription": partial_text
-                })
+                },
+                PARTIAL,
+                turn_id
             )
 
             # Préparer les messages pour le LLM
@@ -212,19 +306,21 @@ async def process_streaming_audio(client_id: str, audio_chunks: List[bytes], his
             # Ajouter le message utilisateur partiel
             messages.append({"role": "user", "content": partial_text})
 
-            # Commencer à générer la réponse en streaming
-            asyncio.create_task(
-                start_early_response(client_id, messages, partial_text)
-            )
+            # Commencer à générer la réponse en streaming (dans la tâche courante, suivie par le conteneur)
+            await start_early_response(client_id, messages, partial_text, turn_id, formats,
+                                       voice_agent=voice_agent, manager=manager)
     except Exception as e:
         logger.error(f"Error in streaming audio processing: {str(e)}")
 
 
-async def start_early_response(client_id: str, messages: List[Dict[str, Any]], partial_text: str):
+async def start_early_response(client_id: str, messages: List[Dict[str, Any]], partial_text: str,
+                               turn_id: Optional[int] = None, formats: Optional[AudioFormats] = None, *,
+                               voice_agent: OpenAIVoiceClient, manager: VoiceConnectionManager):
     """Commence à générer une réponse avant même que l'utilisateur ait fini de parler"""
+    formats = formats or AudioFormats()
     try:
         # Informer le client
-        await manager.send_text(client_id, json.dumps({"status": "early_processing"}))
+        await manager.send_json(client_id, {"status": "early_processing"}, STATUS, turn_id)
 
         # Générer les premiers mots de réponse
         collected_text = ""
@@ -233,107 +329,115 @@ async def start_early_response(client_id: str, messages: List[Dict[str, Any]], p
 
             # Après avoir obtenu quelques mots, commencer la TTS
             if len(collected_text) >= 5 or "." in text_chunk:
-                # Utiliser le wrapper de priorité pour la TTS
-                prioritized_tts = set_thread_priority(voice_agent.synthesize_speech)
-                audio_buf = await run_in_threadpool(prioritized_tts, collected_text)
+                # TTS (servie depuis le cache pour les phrases déjà synthétisées)
+                audio_buf = await run_in_threadpool(
+                    voice_agent.synthesize_speech, collected_text, formats.output_format
+                )
                 audio_chunk = audio_buf.read()
 
                 # Envoyer l'audio au client
-                await manager.send_audio(client_id, audio_chunk)
+                await manager.send_audio(client_id, audio_chunk, turn_id)
                 break  # Sortir après le premier chunk pour éviter de surcharger
     except Exception as e:
         logger.error(f"Error in early response generation: {str(e)}")
 
 async def process_complete_audio(client_id: str, audio_data: bytes, history: List[Dict[str, Any]], user,
-                                 chunkCountRef: Optional[Any] = None):
+                                 chunkCountRef: Optional[Any] = None, turn_id: Optional[int] = None,
+                                 formats: Optional[AudioFormats] = None, session_id: Optional[str] = None, *,
+                                 voice_agent: OpenAIVoiceClient, manager: VoiceConnectionManager,
+                                 session_store: SessionStore, transcript_crud: TranscriptCRUD):
     """Process complete audio recording and send response back via WebSocket"""
+    formats = formats or AudioFormats()
+    trace = start_turn("voice_ws")
 
     try:
         # Send status update
-        await manager.send_text(client_id, json.dumps({"status": "transcribing"}))
-        
-        # 1. Transcribe audio
-        user_text = await voice_agent.transcribe_audio(audio_data)
+        await manager.send_json(client_id, {"status": "transcribing"}, STATUS, turn_id)
         
-        # Save transcription to database
-        await transcript_crud.create_transcript(TranscriptCreate(
-            user_id=user.id, text=user_text
-        ))
-        
-        # Send transcription to client
-        await manager.send_text(
-            client_id, 
-            json.dumps({
-                "status": "transcription_complete", 
-                "transcription": user_text
-            })
-        )
-        
-        # 2. Prepare messages for LLM
-        messages = []
-        
-        # Add system message if available
-        from app.connector.openai_voice_client import VOICE_PERSONALITY
-        if VOICE_PERSONALITY:
-            messages.append({"role": "system", "content": VOICE_PERSONALITY})
-        
-        # Add history
-        for msg in history:
-            if msg["role"] in ["user", "assistant"]:
-                messages.append(msg)
-        
-        # Add new user message
-        messages.append({"role": "user", "content": user_text})
-        
-        # 3. Informer le client que le traitement parallèle commence
-        await manager.send_text(client_id, json.dumps({"status": "processing_parallel"}))
-        
-        # 4. Utiliser le traitement parallèle
+        # Pipeline STT → LLM → TTS : chaque phrase est synthétisée pendant que le LLM continue
+        pipeline = voice_agent.pipeline(formats.output_format)
+        events = pipeline.run(audio_data, history, formats)
+        user_text = ""
         collected_text = ""
-        async for text_chunk in voice_agent.chat_reply_stream(messages):
-            collected_text += text_chunk
-            is_first_few_chunks = True if chunkCountRef is None else chunkCountRef < 3
-            
-            # Envoyer les mises à jour de texte au client
-            await manager.send_text(
-                client_id,
-                json.dumps({
-                    "status": "llm_chunk",
-                    "chunk": text_chunk,
-                    "text_so_far": collected_text
-                })
-            )
-            
-            # Générer et envoyer l'audio pour ce morceau
+        async for event in events:
+            if event.kind == TRANSCRIPT:
+                user_text = event.text
+                if not user_text.strip():
+                    # rien à répondre ni à enregistrer (comme le 422 de l'API REST)
+                    await events.aclose()
+                    await manager.send_json(client_id, {"status": "error", "error": "No speech detected"},
+                                            turn_id=turn_id)
+                    return
+
+                # Save transcription to database
+                transcript = TranscriptCreate(user_id=user.id, text=user_text)
+                if session_id:
+                    transcript.session_id = session_id
+                await transcript_crud.create_transcript(transcript)
+
+                # Send transcription to client
+                await manager.send_json(
+                    client_id,
+                    {
+                        "status": "transcription_complete",
+                        "transcription": user_text
+                    },
+                    turn_id=turn_id
+                )
+                await manager.send_json(client_id, {"status": "processing_parallel"}, STATUS, turn_id)
+
+            elif event.kind == TEXT:
+                collected_text += event.text
+                # Envoyer les mises à jour de texte au client
+                await manager.send_json(
+                    client_id,
+                    {
+                        "status": "llm_chunk",
+                        "chunk": event.text,
+                        "text_so_far": collected_text
+                    },
+                    LLM_CHUNK,
+                    turn_id
+                )
+
+            elif event.kind == AUDIO:
+                await manager.send_audio(client_id, event.audio, turn_id)
 
-            threshold = 3 if is_first_few_chunks else 10
-            if len(text_chunk) >= threshold or any(p in text_chunk for p in ".,!?"):
-                # Utiliser le wrapper de priorité pour réduire la latence
-                prioritized_tts = set_thread_priority(voice_agent.synthesize_speech)
-                audio_buf = await run_in_threadpool(prioritized_tts, text_chunk)
-                audio_chunk = audio_buf.read()
-                await manager.send_audio(client_id, audio_chunk)
-        
         # 5. Mise à jour de l'historique et envoi du message de complétion
-        history.append({"role": "user", "content": user_text})
-        history.append({"role": "assistant", "content": collected_text})
+        turn_messages = [
+            {"role": "user", "content": user_text},
+            {"role": "assistant", "content": collected_text},
+        ]
+        history.extend(turn_messages)
+        del history[:-session_store.max_history]
+        usage_counters.record("voice", user.email, CHAT_MODEL, tokens=estimate_tokens(user_text, collected_text))
         
         # Send completion status with updated history
-        await manager.send_text(
-            client_id, 
-            json.dumps({
+        await manager.send_json(
+            client_id,
+            {
                 "status": "complete",
                 "reply": collected_text,
                 "history": history
-            })
+            },
+            turn_id=turn_id
         )
+
+        # Mesures du tour, une fois l'audio effectivement parti vers le client
+        await manager.drain(client_id)
+        await manager.send_json(client_id, {"status": "timings", "timings": trace.finish()}, turn_id=turn_id)
+
+        if session_id:
+            # persistance partagée, après la réponse : la session peut être reprise depuis un autre worker
+            await session_store.append_history(session_id, turn_messages, turn_id or 0)
         
     except Exception as e:
         logger.error(f"Error processing audio: {str(e)}")
-        await manager.send_text(
-            client_id, 
-            json.dumps({
+        await manager.send_json(
+            client_id,
+            {
                 "status": "error",
                 "error": str(e)
-            })
+            },
+            turn_id=turn_id
         )
\ No newline at end of file
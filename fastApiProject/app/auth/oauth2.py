@@ -1,31 +1,114 @@
+import uuid
 from datetime import datetime, timedelta
+from typing import Dict, Optional
 
-from jose import jwt
+from jose import jwt, JWTError
 
 from app.core.config import settings
-from app.crud.users_crud import UserCRUD
+from app.models.users_model import UserDisplay
 
 
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
 
-user_crud = UserCRUD()
 
+def _encode(payload: dict, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.utcnow()
+    payload.update({"type": token_type, "jti": uuid.uuid4().hex, "iat": now, "exp": now + expires_delta})
+    return jwt.encode(payload, settings.SECRET_KEY.get_secret_value(), algorithm=settings.ALGORITHM)
 
-def create_access_token(data: dict, expires_delta: timedelta):
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Créez un jeton d'accès en utilisant les données fournies et le temps d'expiration.
 
     Args:
         data (dict): Les données à encoder dans le jeton.
-        expires_delta (timedelta): Le temps d'expiration du jeton.
+        expires_delta (Optional[timedelta]): Le temps d'expiration du jeton (`ACCESS_TOKEN_EXPIRE_MINUTES` par défaut).
 
     Returns:
         str: Le jeton d'accès encodé.
     """
-    to_encode = data.copy()
-    expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY.get_secret_value(), algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode(data.copy(), ACCESS_TOKEN, expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+def create_refresh_token(email: str, expires_delta: Optional[timedelta] = None):
+    """
+    Créez un jeton de rafraîchissement, qui ne donne accès qu'à `/login/refresh`.
+
+    Args:
+        email (str): L'email de l'utilisateur.
+        expires_delta (Optional[timedelta]): Le temps d'expiration du jeton (`REFRESH_TOKEN_EXPIRE_DAYS` par défaut).
+
+    Returns:
+        str: Le jeton de rafraîchissement encodé.
+    """
+    return _encode({"sub": email}, REFRESH_TOKEN, expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def create_token_pair(user: UserDisplay) -> Dict[str, str]:
+    """
+    Créez le jeton d'accès d'un utilisateur, portant ses claims signés, et son jeton de rafraîchissement.
+
+    L'identifiant, les rôles et le statut de l'utilisateur sont lus dans le jeton par
+    `get_current_user`, sans accès base. Supprimer l'utilisateur, le désactiver ou changer ses
+    rôles révoque ses jetons d'accès déjà émis (`TokenRevocationList.revoke_user`) : le client
+    obtient alors des claims à jour par `/login/refresh`.
+
+    Args:
+        user (UserDisplay): L'utilisateur authentifié.
+
+    Returns:
+        Dict[str, str]: `access_token`, `refresh_token` et `token_type`.
+    """
+    claims = {"sub": user.email, "uid": user.id, "roles": list(user.roles), "active": user.is_active}
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(user.email),
+        "token_type": "bearer",
+    }
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN) -> dict:
+    """
+    Décode un jeton et vérifie son type.
+
+    Les jetons émis avant l'ajout du type sont des jetons d'accès.
+
+    Args:
+        token (str): Le jeton encodé.
+        token_type (str): Le type attendu (`access` ou `refresh`).
+
+    Returns:
+        dict: Les claims du jeton.
+
+    Raises:
+        JWTError: Si le jeton est invalide, expiré ou d'un autre type.
+    """
+    payload = jwt.decode(token, settings.SECRET_KEY.get_secret_value(), algorithms=[settings.ALGORITHM])
+    if payload.get("type", ACCESS_TOKEN) != token_type:
+        raise JWTError(f"Expected a {token_type} token")
+    if payload.get("sub") is None:
+        raise JWTError("Missing subject")
+    return payload
+
+
+def user_from_claims(payload: dict) -> Optional[UserDisplay]:
+    """
+    Construit l'utilisateur à partir des claims signés d'un jeton d'accès, sans accès base.
+
+    Args:
+        payload (dict): Les claims du jeton.
+
+    Returns:
+        Optional[UserDisplay]: L'utilisateur, ou None pour un jeton sans claims (émis avant leur ajout).
+    """
+    if "roles" not in payload or "uid" not in payload:
+        return None
+    # claims signés par le serveur : déjà validés à l'émission du jeton
+    return UserDisplay.model_construct(
+        id=payload["uid"], email=payload["sub"], roles=payload["roles"], is_active=payload.get("active", False)
+    )
 
 
 def create_session_token(email: str, session_name: str, expires_delta: timedelta):
@@ -48,11 +131,3 @@ def create_session_token(email: str, session_name: str, expires_delta: timedelta
     payload.update({"exp": expire})
     encoded_jwt = jwt.encode(payload, settings.SECRET_KEY.get_secret_value(), algorithm=settings.ALGORITHM)
     return encoded_jwt
-
-
-
-
-
-
-
-
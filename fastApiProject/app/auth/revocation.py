@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.connector.connectorBDD import MongoAccess
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+revoked_tokens = registry.gauge("auth_revoked_tokens", "Jetons révoqués non expirés connus du worker.")
+revoked_users = registry.gauge("auth_revoked_users", "Utilisateurs dont les jetons d'accès antérieurs sont révoqués, connus du worker.")
+
+# préfixe des révocations par utilisateur, rangées avec celles des jetons (index unique sur `jti`)
+USER_KEY_PREFIX = "user:"
+
+
+class TokenRevocationList:
+    """
+    Liste des jetons révoqués (identifiants `jti`), consultée à chaque requête authentifiée.
+
+    Un utilisateur supprimé, désactivé ou dont les rôles changent voit en outre tous ses jetons
+    d'accès déjà émis révoqués (`revoke_user`) : ses claims ne sont plus à jour. Le jeton de
+    rafraîchissement, lui, relit l'utilisateur en base et reste utilisable.
+
+    La vérification se fait dans un ensemble en mémoire, sans accès base. La collection
+    `revoked_token_db` (index TTL sur `expires_at`) est la référence partagée entre workers ;
+    l'ensemble en est rechargé toutes les `refresh_interval` secondes. Une révocation faite par
+    un autre worker prend donc effet au plus tard au rechargement suivant ; celle faite par le
+    worker courant est immédiate.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0, collection: Optional[Collection] = None):
+        self.refresh_interval = refresh_interval
+        self._collection = collection
+        self._revoked: Dict[str, datetime] = {}
+        # identifiant utilisateur -> instant (s) avant lequel ses jetons d'accès sont révoqués
+        self._users: Dict[str, int] = {}
+        # révocations locales faites pendant un rechargement : à conserver lors du remplacement
+        self._recent: Dict[str, datetime] = {}
+        self._recent_users: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        collection = self._collection if self._collection is not None else MongoAccess().revoked_token_collection
+        if not self._indexes_ready:
+            collection.create_index("jti", unique=True)
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexes_ready = True
+        return collection
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        Indique si un jeton est révoqué, sans E/S.
+
+        Args:
+            jti (Optional[str]): L'identifiant du jeton (absent des jetons émis avant la révocation).
+
+        Returns:
+            bool: True si le jeton est révoqué.
+        """
+        return jti is not None and jti in self._revoked
+
+    def is_user_revoked(self, user_id: str, issued_at: Optional[int]) -> bool:
+        """
+        Indique si un jeton d'accès a été émis avant la révocation des jetons de son utilisateur, sans E/S.
+
+        Args:
+            user_id (str): L'identifiant de l'utilisateur (claim `uid`).
+            issued_at (Optional[int]): L'émission du jeton (claim `iat`, secondes UTC).
+
+        Returns:
+            bool: True si le jeton est révoqué.
+        """
+        cutoff = self._users.get(user_id)
+        return cutoff is not None and (issued_at is None or issued_at < cutoff)
+
+    def revoke_user(self, user_id: str):
+        """
+        Révoque tous les jetons d'accès émis jusqu'ici pour un utilisateur (écriture en base, bloquant).
+
+        La révocation est conservée le temps que ces jetons expirent (`ACCESS_TOKEN_EXPIRE_MINUTES`).
+
+        Args:
+            user_id (str): L'identifiant de l'utilisateur.
+        """
+        now = datetime.utcnow()
+        # `iat` est à la seconde : un jeton émis dans la même seconde, juste avant, reste valide
+        cutoff = int(now.replace(tzinfo=timezone.utc).timestamp())
+        with self._lock:
+            self._users[user_id] = cutoff
+            self._recent_users[user_id] = cutoff
+        revoked_users.set(len(self._users))
+        self.collection.update_one(
+            {"jti": USER_KEY_PREFIX + user_id},
+            {"$set": {"uid": user_id, "valid_after": cutoff,
+                      "expires_at": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)}},
+            upsert=True,
+        )
+
+    def revoke(self, jti: str, expires_at: datetime) -> bool:
+        """
+        Révoque un jeton jusqu'à son expiration (écriture en base, à appeler hors event loop).
+
+        L'écriture est atomique (upsert sur l'index unique de `jti`) : parmi des révocations
+        concurrentes du même jeton, quel que soit leur worker, une seule l'emporte. C'est ce qui
+        garantit qu'un token de rafraîchissement ne sert qu'une fois.
+
+        Args:
+            jti (str): L'identifiant du jeton.
+            expires_at (datetime): L'expiration du jeton (UTC) : au-delà, la révocation est inutile.
+
+        Returns:
+            bool: True si cet appel a révoqué le jeton, False s'il l'était déjà.
+        """
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._recent[jti] = expires_at
+        revoked_tokens.set(len(self._revoked))
+        try:
+            result = self.collection.update_one(
+                {"jti": jti},
+                {"$setOnInsert": {"jti": jti, "expires_at": expires_at, "revoked_at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # upsert concurrent du même jeton : l'autre révocation l'a emporté
+            return False
+        return result.upserted_id is not None
+
+    def refresh(self):
+        """Recharge les jetons et utilisateurs révoqués non expirés depuis la base (bloquant)."""
+        with self._lock:
+            self._recent = {}
+            self._recent_users = {}
+        now = datetime.utcnow()
+        revoked, users = {}, {}
+        for doc in self.collection.find({"expires_at": {"$gt": now}},
+                                        {"_id": 0, "jti": 1, "expires_at": 1, "uid": 1, "valid_after": 1}):
+            if "uid" in doc:
+                users[doc["uid"]] = doc["valid_after"]
+            else:
+                revoked[doc["jti"]] = doc["expires_at"]
+        with self._lock:
+            revoked.update(self._recent)
+            users.update(self._recent_users)
+            self._revoked = revoked
+            self._users = users
+        revoked_tokens.set(len(revoked))
+        revoked_users.set(len(users))
+
+    def start(self):
+        """Démarre le rechargement périodique (au démarrage de l'application)."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête le rechargement périodique."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self.refresh)
+            except PyMongoError as e:
+                # l'ensemble courant reste en vigueur jusqu'au prochain rechargement
+                logger.warning(f"Token revocation list refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+revocation_list = TokenRevocationList(refresh_interval=settings.TOKEN_REVOCATION_REFRESH_INTERVAL)
@@ -0,0 +1,215 @@
+import asyncio
+import io
+import logging
+import os
+import shutil
+import time
+import wave
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+transcode_total = registry.counter("voice_transcode_total", "Normalisations audio avant STT, par méthode.")
+transcode_seconds = registry.histogram("voice_transcode_seconds", "Durée de la normalisation audio avant STT.")
+
+# Formats d'entrée acceptés (ce que produit le micro du client) → extension attendue par Whisper
+INPUT_FORMATS = {
+    "webm": "webm",
+    "ogg": "ogg",
+    "opus": "ogg",
+    "mp3": "mp3",
+    "mp4": "mp4",
+    "m4a": "m4a",
+    "wav": "wav",
+    "flac": "flac",
+    "pcm": "wav",  # PCM 16 bits little-endian mono, fréquence fournie par le client
+}
+
+# Formats de sortie TTS proposés → type MIME annoncé au client
+OUTPUT_FORMATS = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg; codecs=opus",
+    "pcm": "audio/pcm; rate=24000",  # PCM 16 bits little-endian mono 24 kHz : aucun décodage côté client
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+}
+
+DEFAULT_INPUT_FORMAT = "webm"
+DEFAULT_OUTPUT_FORMAT = "mp3"
+
+# Fréquences d'échantillonnage acceptées pour l'entrée `pcm`
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+
+
+@dataclass
+class AudioFormats:
+    """
+    Formats audio négociés pour une connexion (ou une requête).
+
+    Attributs:
+        input_format (str): Le format de l'audio envoyé par le client.
+        input_sample_rate (Optional[int]): La fréquence d'échantillonnage, requise pour `pcm`.
+        output_format (str): Le format de l'audio TTS renvoyé au client.
+    """
+    input_format: str = DEFAULT_INPUT_FORMAT
+    input_sample_rate: Optional[int] = None
+    output_format: str = DEFAULT_OUTPUT_FORMAT
+
+    @property
+    def output_mime(self) -> str:
+        return OUTPUT_FORMATS[self.output_format]
+
+    @classmethod
+    def negotiate(cls, requested: dict) -> "AudioFormats":
+        """
+        Retient les formats demandés par le client, en revenant aux valeurs par défaut pour
+        tout format inconnu.
+
+        Args:
+            requested (dict): Le message d'authentification (`input_format`, `input_sample_rate`,
+                `output_format`).
+
+        Returns:
+            AudioFormats: Les formats retenus.
+
+        Raises:
+            ValueError: Si `input_sample_rate` n'est pas un entier entre 8 et 192 kHz.
+        """
+        input_format = str(requested.get("input_format") or DEFAULT_INPUT_FORMAT).lower()
+        output_format = str(requested.get("output_format") or DEFAULT_OUTPUT_FORMAT).lower()
+        sample_rate = requested.get("input_sample_rate")
+        if sample_rate in (None, ""):
+            sample_rate = None
+        elif isinstance(sample_rate, bool) or not str(sample_rate).isdigit() \
+                or not MIN_SAMPLE_RATE <= int(sample_rate) <= MAX_SAMPLE_RATE:
+            raise ValueError(f"Invalid input_sample_rate: expected an integer between "
+                             f"{MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE} Hz")
+        else:
+            sample_rate = int(sample_rate)
+        return cls(
+            input_format=input_format if input_format in INPUT_FORMATS else DEFAULT_INPUT_FORMAT,
+            input_sample_rate=sample_rate,
+            output_format=output_format if output_format in OUTPUT_FORMATS else DEFAULT_OUTPUT_FORMAT,
+        )
+
+    @classmethod
+    def from_filename(cls, filename: Optional[str]) -> "AudioFormats":
+        """
+        Déduit le format d'entrée de l'extension d'un fichier téléversé.
+        """
+        extension = os.path.splitext(filename or "")[1].lstrip(".").lower()
+        return cls.negotiate({"input_format": extension})
+
+
+class AudioTranscoder:
+    """
+    Étape de transcodage placée avant la STT : l'audio est ramené en mono 16 kHz et recompressé
+    pour réduire la taille envoyée à Whisper.
+
+    ffmpeg est utilisé quand il est disponible (WebM/Opus des navigateurs), avec un nombre borné
+    de processus simultanés. À défaut, `soundfile` prend en charge les formats qu'il sait décoder ;
+    sinon l'audio est transmis tel quel avec la bonne extension (le PCM, sans en-tête, est alors
+    placé dans un conteneur WAV).
+    """
+
+    def __init__(self, target_rate: int = 16000, max_processes: int = 4, ffmpeg_path: Optional[str] = None):
+        self.target_rate = target_rate
+        self.ffmpeg_path = ffmpeg_path or shutil.which("ffmpeg")
+        self._slots = asyncio.Semaphore(max_processes)
+
+    async def normalize_for_stt(self, audio: bytes, formats: AudioFormats) -> Tuple[bytes, str]:
+        """
+        Normalise un audio avant transcription.
+
+        Args:
+            audio (bytes): L'audio brut reçu du client.
+            formats (AudioFormats): Les formats négociés.
+
+        Returns:
+            Tuple[bytes, str]: L'audio à envoyer et le nom de fichier (dont l'extension indique
+            le format à Whisper).
+        """
+        started = time.perf_counter()
+        method = "passthrough"
+        result = (audio, f"upload.{INPUT_FORMATS[formats.input_format]}")
+        rate = formats.input_sample_rate or self.target_rate
+        try:
+            if formats.input_format == "pcm":
+                result = await run_in_threadpool(self._pcm_to_flac, audio, rate)
+                method = "soundfile"
+            elif self.ffmpeg_path:
+                result = (await self._ffmpeg_to_opus(audio), "upload.ogg")
+                method = "ffmpeg"
+            else:
+                result = await run_in_threadpool(self._soundfile_to_flac, audio)
+                method = "soundfile"
+        except Exception as e:
+            logger.warning(f"Audio normalisation failed ({formats.input_format}), sending original audio: {str(e)}")
+            method = "passthrough"
+            if formats.input_format == "pcm":
+                # PCM sans en-tête : Whisper ne le lirait pas sous l'extension .wav
+                result = (self._pcm_to_wav(audio, rate), "upload.wav")
+        transcode_total.inc(method=method)
+        transcode_seconds.observe(time.perf_counter() - started, method=method)
+        return result
+
+    async def _ffmpeg_to_opus(self, audio: bytes) -> bytes:
+        async with self._slots:
+            process = await asyncio.create_subprocess_exec(
+                self.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                "-i", "pipe:0",
+                "-ac", "1", "-ar", str(self.target_rate),
+                "-c:a", "libopus", "-b:a", "24k", "-application", "voip",
+                "-f", "ogg", "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await process.communicate(audio)
+        if process.returncode != 0 or not stdout:
+            raise RuntimeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {process.returncode}")
+        return stdout
+
+    def _resample_to_flac(self, samples: np.ndarray, rate: int) -> Tuple[bytes, str]:
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if rate != self.target_rate:
+            duration = len(samples) / rate
+            target_len = int(duration * self.target_rate)
+            samples = np.interp(
+                np.linspace(0, len(samples), target_len, endpoint=False),
+                np.arange(len(samples)),
+                samples,
+            )
+        buf = io.BytesIO()
+        sf.write(buf, samples, self.target_rate, format="FLAC", subtype="PCM_16")
+        return buf.getvalue(), "upload.flac"
+
+    def _soundfile_to_flac(self, audio: bytes) -> Tuple[bytes, str]:
+        samples, rate = sf.read(io.BytesIO(audio), dtype="float32")
+        return self._resample_to_flac(samples, rate)
+
+    def _pcm_to_flac(self, audio: bytes, rate: int) -> Tuple[bytes, str]:
+        samples = np.frombuffer(audio, dtype="<i2").astype("float32") / 32768.0
+        return self._resample_to_flac(samples, rate)
+
+    @staticmethod
+    def _pcm_to_wav(audio: bytes, rate: int) -> bytes:
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            # un octet final isolé n'est pas un échantillon 16 bits
+            wav.writeframes(audio[:len(audio) - len(audio) % 2])
+        return buf.getvalue()
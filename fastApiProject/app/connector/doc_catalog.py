@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from app.connector.connectorBDD import MongoAccess
+from app.core.conditional import collection_version, list_etag
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.documentation_model import DocDisplay
+
+
+logger = logging.getLogger(__name__)
+
+doc_catalog_documents = registry.gauge("doc_catalog_documents", "Documents du catalogue de documentation en mémoire.")
+doc_catalog_reloads = registry.counter("doc_catalog_reloads_total", "Reconstructions du catalogue de documentation.")
+
+# (ETag, corps JSON) d'une liste du catalogue
+Entry = Tuple[str, bytes]
+
+
+class DocCatalog:
+    """
+    Catalogue de la documentation (collection `documentation_db`) en mémoire, déjà sérialisé.
+
+    La collection est remplie une fois depuis `doc_link.json` et ne change presque jamais : les
+    listes (toute la documentation, puis chaque catégorie) sont validées par `DocDisplay`, encodées
+    en JSON et associées à leur ETag une seule fois. Une requête ne fait plus qu'une recherche dans
+    un dictionnaire.
+
+    Toutes les `refresh_interval` secondes, la version de la collection (`collection_version`) est
+    relue ; le catalogue n'est reconstruit que si elle a changé. Une modification faite par un autre
+    worker ou directement en base est donc visible au plus tard au contrôle suivant.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0, collection: Optional[Collection] = None):
+        self.refresh_interval = refresh_interval
+        self._collection = collection
+        # (version, catégorie ou None pour toute la documentation -> entrée), remplacé d'un bloc
+        self._catalog: Optional[Tuple[str, Dict[Optional[str], Entry]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self) -> Collection:
+        if self._collection is None:
+            self._collection = MongoAccess().documentation_collection
+        return self._collection
+
+    def refresh(self) -> bool:
+        """
+        Reconstruit le catalogue si la collection a changé (bloquant).
+
+        Returns:
+            bool: True si le catalogue a été reconstruit.
+        """
+        # version lue avant les documents : une écriture entre les deux sera prise au contrôle suivant
+        version = collection_version(self.collection, {})
+        if self._catalog is not None and self._catalog[0] == version:
+            return False
+        docs = [DocDisplay(**doc).model_dump() for doc in self.collection.find({}, {"_id": 0})]
+        by_category: Dict[str, List[Dict]] = defaultdict(list)
+        for doc in docs:
+            by_category[doc["categorie"]].append(doc)
+        entries = {None: self._entry(version, None, docs)}
+        entries.update({categorie: self._entry(version, categorie, items) for categorie, items in by_category.items()})
+        self._catalog = (version, entries)
+        doc_catalog_documents.set(len(docs))
+        doc_catalog_reloads.inc()
+        return True
+
+    @staticmethod
+    def _entry(version: str, categorie: Optional[str], docs: List[Dict]) -> Entry:
+        return list_etag(f"{version}|{categorie}"), orjson.dumps(docs)
+
+    def lookup(self, categorie: Optional[str] = None) -> Optional[Entry]:
+        """
+        Liste du catalogue, sans E/S.
+
+        Args:
+            categorie (Optional[str]): La catégorie, toute la documentation si None.
+
+        Returns:
+            Optional[Entry]: L'ETag et le corps JSON de la liste (vide pour une catégorie inconnue),
+            None si le catalogue n'est pas encore chargé.
+        """
+        catalog = self._catalog
+        if catalog is None:
+            return None
+        version, entries = catalog
+        entry = entries.get(categorie)
+        return entry if entry is not None else self._entry(version, categorie, [])
+
+    async def get(self, categorie: Optional[str] = None) -> Entry:
+        """Liste du catalogue, chargé hors event loop s'il ne l'est pas encore."""
+        entry = self.lookup(categorie)
+        if entry is None:
+            await run_in_threadpool(self.refresh)
+            entry = self.lookup(categorie)
+        return entry
+
+    def start(self):
+        """Charge le catalogue puis démarre le contrôle périodique (au démarrage de l'application)."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête le contrôle périodique."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self.refresh)
+            except (PyMongoError, ValueError) as e:
+                # base injoignable ou document invalide : le catalogue courant reste servi
+                logger.warning(f"Documentation catalog refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+doc_catalog = DocCatalog(refresh_interval=settings.DOC_CATALOG_REFRESH_INTERVAL)
@@ -0,0 +1,137 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+outbound_requests = registry.counter("http_outbound_requests_total", "Requêtes HTTP sortantes, par hôte et statut.")
+outbound_seconds = registry.histogram("http_outbound_seconds", "Durée des requêtes HTTP sortantes, par hôte.")
+
+
+class HTTPClientPool:
+    """
+    Client HTTP sortant partagé par toute l'application (OpenAI Realtime, Mailgun, ElevenLabs...).
+
+    Un seul `httpx.AsyncClient` garde les connexions ouvertes (keep-alive, HTTP/2 si le paquet `h2`
+    est installé) : les appels suivants vers un même fournisseur évitent la poignée de main TCP/TLS.
+    Le nombre total de connexions est borné par httpx ; le nombre de requêtes simultanées par hôte
+    l'est par un sémaphore, pour qu'un fournisseur lent n'accapare pas tout le pool.
+
+    Le client est créé au démarrage de l'application (`start`, dans le lifespan) ou au premier usage
+    (scripts), et fermé à l'arrêt (`close`).
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20, max_per_host: int = 20,
+                 keepalive_expiry: float = 30.0, timeout: float = 30.0, connect_timeout: float = 5.0,
+                 http2: bool = True, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.max_per_host = max_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.http2 = http2
+        # transport de remplacement (tests, benchmarks hors ligne)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Le client partagé (créé au premier accès)."""
+        if self._client is None:
+            http2 = self.http2 and importlib.util.find_spec("h2") is not None
+            if self.http2 and not http2:
+                logger.warning("Package 'h2' not installed: outbound HTTP pool falls back to HTTP/1.1")
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                transport=self.transport,
+            )
+        return self._client
+
+    def start(self):
+        """Crée le client (au démarrage de l'application)."""
+        self.client
+
+    async def close(self):
+        """Ferme les connexions (à l'arrêt de l'application) ; un usage ultérieur recrée le client."""
+        client, self._client = self._client, None
+        self._host_limits = {}
+        if client is not None:
+            await client.aclose()
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Envoie une requête et lit toute la réponse.
+
+        Args:
+            method (str): La méthode HTTP.
+            url (str): L'URL complète.
+            **kwargs: Les arguments de `httpx.AsyncClient.request` (`json`, `data`, `auth`, `timeout`...).
+
+        Returns:
+            httpx.Response: La réponse, quel que soit son statut.
+
+        Raises:
+            httpx.RequestError: Si la requête n'a pas pu aboutir (connexion, délai dépassé...).
+        """
+        async with self.stream(method, url, **kwargs) as response:
+            await response.aread()
+        return response
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Envoie une requête dont la réponse est lue au fil de l'eau (`aiter_bytes`).
+
+        Args:
+            method (str): La méthode HTTP.
+            url (str): L'URL complète.
+            **kwargs: Les arguments de `httpx.AsyncClient.stream`.
+
+        Yields:
+            httpx.Response: La réponse, dont le corps n'est pas encore lu.
+        """
+        host = httpx.URL(url).host
+        started = time.perf_counter()
+        status = "error"
+        async with self._host_limit(host):
+            try:
+                async with self.client.stream(method, url, **kwargs) as response:
+                    status = str(response.status_code)
+                    yield response
+            finally:
+                outbound_requests.inc(host=host, status=status)
+                outbound_seconds.observe(time.perf_counter() - started, host=host)
+
+
+http_pool = HTTPClientPool(
+    max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+    max_keepalive=settings.HTTP_POOL_MAX_KEEPALIVE,
+    max_per_host=settings.HTTP_POOL_MAX_PER_HOST,
+    keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    timeout=settings.HTTP_POOL_TIMEOUT,
+    connect_timeout=settings.HTTP_POOL_CONNECT_TIMEOUT,
+    http2=settings.HTTP_POOL_HTTP2,
+)
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Type
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.connector.connectorBDD import MongoAccess
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.serialization import dumps, project
+from app.models.image_model import ImageResponse
+from app.models.prompt_model import PromptDisplay
+from app.models.session_model import SessionDisplay
+from app.models.video_model import VideoResponse
+
+
+logger = logging.getLogger(__name__)
+
+live_subscribers = registry.gauge("live_updates_subscribers", "Abonnés aux mises à jour en direct connectés à ce worker.")
+live_events = registry.counter("live_updates_events_total", "Changements relayés aux abonnés, par sujet et par opération.")
+live_resyncs = registry.counter("live_updates_resyncs_total", "Files d'abonnés saturées, remplacées par une demande de resynchronisation.")
+
+TRAINER_ROLES = ("SuperAdmin", "Formateur-int", "Formateur-ext")
+
+AUTO, CHANGE_STREAM, POLLING = "auto", "change_stream", "polling"
+
+RESYNC = dumps({"type": "resync"}).decode()
+
+
+def _prompt(document: Dict) -> Dict:
+    # même forme que les historiques (`PromptServices.transform_prompt`)
+    return {**document, "prompt_id": str(document["_id"]), "message": None}
+
+
+@dataclass(frozen=True)
+class Topic:
+    """
+    Sujet des mises à jour en direct : une collection suivie et ses destinataires.
+
+    Attributs:
+        name (str): Le nom du sujet côté client (`prompts`, `images`...).
+        model (Type[BaseModel]): Le modèle de réponse des documents envoyés.
+        owners (str): Le champ des adresses e-mail destinataires (une adresse ou une liste).
+        roles (Tuple[str, ...]): Les rôles qui reçoivent tous les changements du sujet.
+        prepare (Callable[[Dict], Dict]): La mise en forme du document avant projection.
+    """
+
+    name: str
+    model: Type[BaseModel]
+    owners: str
+    roles: Tuple[str, ...] = ()
+    prepare: Callable[[Dict], Dict] = lambda document: document
+
+
+TOPICS: Dict[str, Topic] = {
+    "prompt_db": Topic("prompts", PromptDisplay, "user_email", prepare=_prompt),
+    "image_db": Topic("images", ImageResponse, "user_email"),
+    "video_db": Topic("videos", VideoResponse, "user_email"),
+    # les formateurs voient toutes les sessions, les participants celles où ils sont inscrits
+    "sessions_db": Topic("sessions", SessionDisplay, "emails", roles=TRAINER_ROLES),
+}
+
+
+class Subscriber:
+    """Connexion d'un utilisateur : ses sujets et sa file de messages (JSON déjà sérialisé)."""
+
+    def __init__(self, email: str, roles: Iterable[str], topics: FrozenSet[str], queue_size: int):
+        self.email = email
+        self.roles = frozenset(roles)
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, text: str):
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            # client trop lent : les changements manqués sont remplacés par une resynchronisation
+            # (le client relit ses listes), la mémoire du worker reste bornée
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            live_resyncs.inc()
+
+    def close(self):
+        """Termine le flux de l'abonné : None en fin de file, la connexion est fermée par l'endpoint."""
+        while self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class LiveUpdates:
+    """
+    Diffusion en direct des changements de `prompt_db`, `image_db`, `video_db` et `sessions_db`
+    aux utilisateurs concernés, par une seule connexion par utilisateur (`/live/ws`).
+
+    Chaque worker suit les changements une seule fois, quel que soit le nombre d'abonnés :
+
+    - `change_stream` : un change stream sur la base (replica set ou cluster), lu dans un thread
+      dédié et repris après une erreur depuis le dernier jeton de reprise ;
+    - `polling` (mongod autonome) : toutes les `poll_interval` secondes, les documents d'`_id`
+      supérieur au dernier vu (insertions) et d'`updated_at` postérieur (mises à jour) ;
+    - `auto` : le change stream si le serveur le permet, sinon le polling.
+
+    Un changement est projeté sur le modèle de réponse du sujet, sérialisé une fois puis remis aux
+    abonnés propriétaires du document (ou ayant un rôle du sujet). Les suppressions ne sont relayées
+    qu'en change stream, et seulement aux rôles du sujet : le propriétaire d'un document supprimé
+    n'est plus connu (c'est d'ailleurs lui qui l'a supprimé).
+    """
+
+    def __init__(self, source: str = AUTO, poll_interval: float = 2.0, queue_size: int = 100, db=None):
+        self.source = source
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._db = db
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.mode: Optional[str] = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = MongoAccess().db
+        return self._db
+
+    # ----- Abonnés -----
+    def subscribe(self, user, topics: Optional[Iterable[str]] = None) -> Subscriber:
+        """
+        Abonne un utilisateur ; le suivi des changements démarre au premier abonné.
+
+        Args:
+            user (UserDisplay): L'utilisateur authentifié.
+            topics (Optional[Iterable[str]]): Les sujets souhaités, tous par défaut.
+
+        Returns:
+            Subscriber: L'abonné, dont la file reçoit les messages à envoyer.
+
+        Raises:
+            ValueError: Si un sujet est inconnu.
+        """
+        names = {topic.name for topic in TOPICS.values()}
+        wanted = frozenset(topics) if topics else frozenset(names)
+        unknown = wanted - names
+        if unknown:
+            raise ValueError(f"Unknown live update topic(s): {', '.join(sorted(unknown))}")
+        subscriber = Subscriber(user.email, user.roles, wanted, self.queue_size)
+        self._subscribers.add(subscriber)
+        live_subscribers.set(len(self._subscribers))
+        self.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+        live_subscribers.set(len(self._subscribers))
+
+    def dispatch(self, collection: str, operation: str, document_id, document: Optional[Dict]):
+        """
+        Remet un changement aux abonnés concernés (dans l'event loop).
+
+        Args:
+            collection (str): La collection modifiée.
+            operation (str): `insert`, `update`, `replace` ou `delete`.
+            document_id: L'identifiant du document.
+            document (Optional[Dict]): Le document complet, None pour une suppression.
+        """
+        topic = TOPICS[collection]
+        owners: Set[str] = set()
+        content = None
+        if document is not None:
+            value = document.get(topic.owners)
+            owners = set(value) if isinstance(value, list) else {value}
+            try:
+                content = project(topic.prepare(document), topic.model)
+            except KeyError as e:
+                logger.debug(f"Live update skipped, {collection} document {document_id} lacks field {e}")
+                return
+        recipients = [
+            subscriber for subscriber in self._subscribers
+            if topic.name in subscriber.topics and (subscriber.email in owners or subscriber.roles & set(topic.roles))
+        ]
+        if not recipients:
+            return
+        # sérialisé une seule fois pour tous les destinataires
+        text = dumps({"type": "change", "topic": topic.name, "operation": operation,
+                      "id": str(document_id), "document": content}).decode()
+        for subscriber in recipients:
+            subscriber.offer(text)
+        live_events.inc(topic=topic.name, operation=operation)
+
+    def _dispatch_threadsafe(self, collection: str, operation: str, document_id, document: Optional[Dict]):
+        self._loop.call_soon_threadsafe(self.dispatch, collection, operation, document_id, document)
+
+    # ----- Suivi des changements -----
+    def start(self):
+        """Démarre le suivi des changements (au premier abonné)."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._stopped.clear()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Arrête le suivi et termine les connexions des abonnés (à l'arrêt de l'application)."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            await run_in_threadpool(self._thread.join, 5)
+            self._thread = None
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+        self.mode = None
+
+    def resync_all(self):
+        """Demande à tous les abonnés de relire leurs listes (changements possiblement manqués)."""
+        for subscriber in list(self._subscribers):
+            subscriber.offer(RESYNC)
+
+    async def _run(self):
+        stream = None
+        if self.source != POLLING:
+            stream = await run_in_threadpool(self._open_stream)
+        if stream is not None:
+            self.mode = CHANGE_STREAM
+            self._thread = threading.Thread(target=self._tail, args=(stream,), name="live-updates-stream", daemon=True)
+            self._thread.start()
+            return
+        self.mode = POLLING
+        logger.info("Live updates: change streams unavailable, polling every %ss", self.poll_interval)
+        cursors = await run_in_threadpool(self._poll_start)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await run_in_threadpool(self._poll, cursors)
+            except PyMongoError as e:
+                logger.warning(f"Live updates polling failed: {e}")
+
+    def _watch(self, resume_after=None):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(TOPICS)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        # attente bornée côté serveur : le thread voit l'arrêt en moins d'une seconde
+        return self.db.watch(pipeline, full_document="updateLookup", resume_after=resume_after,
+                             max_await_time_ms=500)
+
+    def _open_stream(self):
+        try:
+            return self._watch()
+        except (OperationFailure, NotImplementedError, TypeError) as e:
+            # mongod autonome (OperationFailure), ou base simulée sans change streams
+            if self.source == CHANGE_STREAM:
+                raise
+            logger.info(f"Live updates: change stream not supported ({e})")
+            return None
+
+    def _tail(self, stream):
+        resume_token = None
+        while not self._stopped.is_set():
+            try:
+                if stream is None:
+                    try:
+                        stream = self._watch(resume_token)
+                    except OperationFailure as e:
+                        # reprise impossible (historique dépassé) : repartir de maintenant, les
+                        # abonnés relisent leurs listes
+                        logger.warning(f"Live updates change stream cannot resume, restarting: {e}")
+                        resume_token = None
+                        stream = self._watch()
+                        self._loop.call_soon_threadsafe(self.resync_all)
+                with stream:
+                    while not self._stopped.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        resume_token = change["_id"]
+                        operation = change["operationType"]
+                        self._dispatch_threadsafe(
+                            change["ns"]["coll"], operation, change["documentKey"]["_id"],
+                            None if operation == "delete" else change.get("fullDocument"),
+                        )
+            except PyMongoError as e:
+                logger.warning(f"Live updates change stream error, resuming: {e}")
+                stream = None
+                self._stopped.wait(0.5)
+
+    def _poll_start(self) -> Dict[str, List]:
+        """Point de départ du polling : dernier `_id` et dernier `updated_at` de chaque collection."""
+        for collection in TOPICS:
+            self.db[collection].create_index("updated_at", sparse=True)
+        return self._latest()
+
+    def _latest(self) -> Dict[str, List]:
+        cursors = {}
+        for collection in TOPICS:
+            db_collection = self.db[collection]
+            last = next(db_collection.find({}, {"_id": 1}).sort("_id", -1).limit(1), None)
+            updated = next(db_collection.find({"updated_at": {"$exists": True}}, {"updated_at": 1})
+                           .sort("updated_at", -1).limit(1), None)
+            cursors[collection] = [last["_id"] if last else ObjectId("0" * 24),
+                                   updated["updated_at"] if updated else datetime(1970, 1, 1)]
+        return cursors
+
+    def _poll(self, cursors: Dict[str, List]):
+        """Relaie les insertions et mises à jour depuis le passage précédent (bloquant)."""
+        if not self._subscribers:
+            # personne à prévenir : les curseurs suivent la base sans relire les documents, le
+            # prochain abonné ne reçoit pas les changements survenus avant son arrivée
+            cursors.update(self._latest())
+            return
+        for collection, cursor in cursors.items():
+            db_collection = self.db[collection]
+            for document in db_collection.find({"_id": {"$gt": cursor[0]}}).sort("_id", 1):
+                cursor[0] = document["_id"]
+                self._dispatch_threadsafe(collection, "insert", document["_id"], document)
+            for document in db_collection.find({"updated_at": {"$gt": cursor[1]}}).sort("updated_at", 1):
+                cursor[1] = document["updated_at"]
+                self._dispatch_threadsafe(collection, "update", document["_id"], document)
+
+
+live_updates = LiveUpdates(
+    source=settings.LIVE_UPDATES_SOURCE,
+    poll_interval=settings.LIVE_UPDATES_POLL_INTERVAL,
+    queue_size=settings.LIVE_UPDATES_QUEUE_SIZE,
+)
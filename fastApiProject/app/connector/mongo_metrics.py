@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+from pymongo import monitoring
+
+from app.core.metrics import registry
+
+
+mongo_pool_max_size = registry.gauge("mongo_pool_max_size", "Taille maximale du pool de connexions MongoDB, par serveur.")
+mongo_pool_connections = registry.gauge("mongo_pool_connections", "Connexions MongoDB ouvertes, par serveur.")
+mongo_pool_in_use = registry.gauge("mongo_pool_in_use", "Connexions MongoDB empruntées par une opération, par serveur.")
+mongo_pool_waiting = registry.gauge(
+    "mongo_pool_waiting", "Opérations en attente d'une connexion MongoDB libre, par serveur."
+)
+mongo_pool_checkout_seconds = registry.histogram(
+    "mongo_pool_checkout_seconds", "Attente d'une connexion du pool MongoDB, par serveur.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+mongo_pool_checkout_failures = registry.counter(
+    "mongo_pool_checkout_failures_total", "Emprunts de connexion MongoDB échoués, par serveur et cause."
+)
+
+
+def _address(address: Tuple[str, int]) -> str:
+    return f"{address[0]}:{address[1]}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Exporte l'utilisation du pool de connexions MongoDB vers le registre de métriques.
+
+    `mongo_pool_in_use` rapporté à `mongo_pool_max_size` donne le taux d'utilisation du pool
+    d'un worker ; `mongo_pool_waiting` et `mongo_pool_checkout_seconds` montrent qu'il est trop
+    petit pour la charge (les opérations attendent une connexion libre).
+
+    pymongo appelle les méthodes depuis le thread de l'opération : l'instant du début d'un
+    emprunt est conservé par thread.
+    """
+
+    def __init__(self):
+        self._started = threading.local()
+
+    def pool_created(self, event):
+        mongo_pool_max_size.set(event.options.get("maxPoolSize", 100), server=_address(event.address))
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(server=_address(event.address))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(server=_address(event.address))
+
+    def connection_check_out_started(self, event):
+        started: Dict[str, float] = self._started.__dict__
+        server = _address(event.address)
+        started[server] = time.perf_counter()
+        mongo_pool_waiting.inc(server=server)
+
+    def _check_out_done(self, server: str):
+        mongo_pool_waiting.dec(server=server)
+        started = self._started.__dict__.pop(server, None)
+        if started is not None:
+            mongo_pool_checkout_seconds.observe(time.perf_counter() - started, server=server)
+
+    def connection_checked_out(self, event):
+        server = _address(event.address)
+        self._check_out_done(server)
+        mongo_pool_in_use.inc(server=server)
+
+    def connection_check_out_failed(self, event):
+        server = _address(event.address)
+        self._check_out_done(server)
+        mongo_pool_checkout_failures.inc(server=server, reason=event.reason)
+
+    def connection_checked_in(self, event):
+        mongo_pool_in_use.dec(server=_address(event.address))
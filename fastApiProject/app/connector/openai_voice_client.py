@@ -1,11 +1,17 @@
 import os
 import io
 import asyncio
-from typing import AsyncGenerator, Tuple
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from fastapi.concurrency import run_in_threadpool
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
 from fastapi.responses import StreamingResponse
-from openai import OpenAI
+
+from app.connector.audio_transcoder import AudioFormats, AudioTranscoder, DEFAULT_OUTPUT_FORMAT
+from app.connector.tts_cache import TTSCache, iter_chunks
+from app.connector.voice_pipeline import VoicePipeline, AUDIO
+from app.core.config import settings
+from app.core.providers import providers
+from app.core.tracing import mark, span
 
 # Load environment variables
 load_dotenv()
@@ -19,39 +25,89 @@ if not OPENAI_KEY:
 if not OPENAI_VOICE_ID:
     raise ValueError("OPENAI_VOICE_ID missing in environment")
 
-# Instantiate OpenAI client
-openai_client = OpenAI(api_key=OPENAI_KEY)
+CHAT_MODEL = "gpt-4o-mini"
+TTS_MODEL = "tts-1"
+TTS_SPEED = 1.2
 
 class OpenAIVoiceClient:
     """
     Pipeline: Whisper STT → GPT-4o-mini chat streaming → OpenAI TTS streaming
+
+    Le client OpenAI (synchrone) est celui du registre des fournisseurs, construit au premier
+    usage ; il peut être remplacé par un client compatible, par exemple les fournisseurs simulés
+    des benchmarks (`benchmarks/fake_providers.py`).
     """
-    def __init__(self):
-        # simple cache for full-text TTS
-        self._tts_cache: dict[str, bytes] = {}
+    def __init__(self, client=None):
+        self._client = client
+        # cache des phrases synthétisées (LRU mémoire + niveau disque optionnel)
+        self._tts_cache = TTSCache(
+            max_bytes=settings.TTS_CACHE_MAX_BYTES,
+            max_entry_bytes=settings.TTS_CACHE_MAX_ENTRY_BYTES,
+            disk_dir=settings.TTS_CACHE_DIR,
+            disk_max_bytes=settings.TTS_CACHE_DISK_MAX_BYTES,
+        )
+        # normalisation de l'audio entrant (mono 16 kHz) avant Whisper
+        self._transcoder = AudioTranscoder(
+            target_rate=settings.VOICE_STT_SAMPLE_RATE,
+            max_processes=settings.VOICE_TRANSCODE_MAX_PROCESSES,
+            ffmpeg_path=settings.FFMPEG_PATH,
+        )
 
-    async def transcribe_audio(self, audio_bytes: bytes) -> str:
-        """Transcribe with Whisper."""
-        audio_file = io.BytesIO(audio_bytes)
-        audio_file.name = "upload.mp3"
-        resp = await run_in_threadpool(
-            openai_client.audio.transcriptions.create,
-            file=audio_file,
-            model="whisper-1"
+    def _tts_key(self, text: str, response_format: str = DEFAULT_OUTPUT_FORMAT) -> str:
+        return TTSCache.make_key(text, OPENAI_VOICE_ID, TTS_MODEL, TTS_SPEED, response_format)
+
+    async def _tts_cache_get(self, key: str) -> Optional[bytes]:
+        """Lookup mémoire sur l'event loop, disque dans le threadpool."""
+        audio = self._tts_cache.get_memory(key)
+        if audio is not None:
+            return audio
+        if self._tts_cache.disk_dir:
+            return await run_in_threadpool(self._tts_cache.get, key)
+        return self._tts_cache.get(key)
+
+    async def _tts_cache_put(self, key: str, audio: bytes):
+        if self._tts_cache.disk_dir:
+            await run_in_threadpool(self._tts_cache.put, key, audio)
+        else:
+            self._tts_cache.put(key, audio)
+
+    def _open_tts_stream(self, text: str, response_format: str = DEFAULT_OUTPUT_FORMAT):
+        # pcm (24 kHz, 16 bits) et opus évitent le décodage MP3 côté client
+        return self.client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=OPENAI_VOICE_ID,
+            input=text,
+            speed=TTS_SPEED,
+            response_format=response_format,
         )
+
+    async def transcribe_audio(self, audio_bytes: bytes, formats: Optional[AudioFormats] = None) -> str:
+        """Transcribe with Whisper, after normalising the audio to mono 16 kHz."""
+        with span("transcode"):
+            audio_bytes, filename = await self._transcoder.normalize_for_stt(audio_bytes, formats or AudioFormats())
+        audio_file = io.BytesIO(audio_bytes)
+        audio_file.name = filename
+        with span("stt"):
+            resp = await run_in_threadpool(
+                self.client.audio.transcriptions.create,
+                file=audio_file,
+                model="whisper-1"
+            )
         return resp.text or ""
 
     async def chat_reply_stream(self, messages: list[dict]) -> AsyncGenerator[str, None]:
         """Stream GPT chat responses in chunks."""
         # Obtain streaming generator in thread to avoid blocking
         response = await run_in_threadpool(
-            lambda: openai_client.chat.completions.create(
-                model="gpt-4o-mini", messages=messages, stream=True
+            lambda: self.client.chat.completions.create(
+                model=CHAT_MODEL, messages=messages, stream=True
             )
         )
-        for chunk in response:
+        # chaque lecture du flux est bloquante : elle est faite dans le threadpool
+        async for chunk in iterate_in_threadpool(response):
             content = getattr(chunk.choices[0].delta, 'content', None)
             if content:
+                mark("llm_first_token")
                 yield content
 
     async def chat_reply(self, messages: list[dict]) -> str:
@@ -61,50 +117,79 @@ class OpenAIVoiceClient:
             parts.append(piece)
         return ''.join(parts)
 
-    async def tts_stream(self, text: str) -> AsyncGenerator[bytes, None]:
-        def sync_tts():
-            return openai_client.audio.speech.with_streaming_response.create(
-                model="tts-1",
-                voice=OPENAI_VOICE_ID,
-                input=text,
-                speed=1.2,
-            )
-
-        # on exécute sync_tts en thread pour ne pas bloquer l’event loop
-        resp = await asyncio.get_event_loop().run_in_executor(None, sync_tts)
-
-        # on itère sur chaque chunk de la réponse streaming
-        with resp as stream:
-            for chunk in stream.iter_bytes():
+    async def tts_stream(self, text: str, response_format: str = DEFAULT_OUTPUT_FORMAT) -> AsyncGenerator[bytes, None]:
+        """TTS en streaming ; les phrases déjà synthétisées sont servies depuis le cache."""
+        key = self._tts_key(text, response_format)
+        cached = await self._tts_cache_get(key)
+        if cached is not None:
+            mark("tts_first_byte")
+            for chunk in iter_chunks(cached):
+                yield chunk
+            return
+
+        # on exécute l'appel en thread pour ne pas bloquer l'event loop
+        resp = await asyncio.get_event_loop().run_in_executor(None, self._open_tts_stream, text, response_format)
+
+        # on itère sur chaque chunk de la réponse streaming, en le conservant pour le cache ;
+        # l'ouverture de la requête et chaque lecture sont bloquantes, donc faites dans le threadpool
+        audio_buf = bytearray()
+        cacheable = True
+        stream = await run_in_threadpool(resp.__enter__)
+        try:
+            async for chunk in iterate_in_threadpool(stream.iter_bytes()):
                 if chunk:
+                    mark("tts_first_byte")
+                    if cacheable:
+                        audio_buf.extend(chunk)
+                        cacheable = len(audio_buf) <= self._tts_cache.max_entry_bytes
                     yield chunk
-
-    async def run_and_transcribe_parallel(self, audio_bytes: bytes) -> Tuple[str, str, bytes]:
-        # Transcription
-        user_text_task = asyncio.create_task(self.transcribe_audio(audio_bytes))
-
-        # Attendre uniquement la transcription
-        user_text = await user_text_task
-
-        # Construire le prompt
-        messages = []
-        if VOICE_PERSONALITY:
-            messages.append({"role": "system", "content": VOICE_PERSONALITY})
-        messages.append({"role": "user", "content": user_text})
-
-        # Lancer le chat en parallèle
-        chat_task = asyncio.create_task(self.chat_reply(messages))
-
-        # Attendre la réponse du chat
-        assistant_text = await chat_task
-
-        # Lancer la TTS
+        finally:
+            await run_in_threadpool(resp.__exit__, None, None, None)
+
+        if cacheable:
+            await self._tts_cache_put(key, bytes(audio_buf))
+
+    def synthesize_speech(self, text: str, response_format: str = DEFAULT_OUTPUT_FORMAT) -> io.BytesIO:
+        """
+        TTS complète et synchrone → renvoie l'audio (MP3 par défaut) dans un BytesIO.
+        À appeler via `run_in_threadpool` depuis du code asynchrone.
+        """
+        key = self._tts_key(text, response_format)
+        audio = self._tts_cache.get(key)
+        if audio is None:
+            with self._open_tts_stream(text, response_format) as stream:
+                audio = b"".join(stream.iter_bytes())
+            self._tts_cache.put(key, audio)
+        return io.BytesIO(audio)
+
+    def pipeline(self, output_format: str = DEFAULT_OUTPUT_FORMAT) -> VoicePipeline:
+        """Crée un pipeline STT → LLM → TTS en streaming pour un tour de parole."""
+        return VoicePipeline(self, output_format, system_prompt=VOICE_PERSONALITY)
+
+    async def run_and_transcribe(self, audio_bytes: bytes, history: Optional[List[Dict]] = None,
+                                 formats: Optional[AudioFormats] = None,
+                                 output_format: str = DEFAULT_OUTPUT_FORMAT) -> Tuple[str, str, bytes]:
+        """
+        Exécute un tour complet et renvoie (transcription, réponse, audio).
+
+        Les étapes se chevauchent (voir `VoicePipeline`) ; pour restituer l'audio au fil de l'eau,
+        itérer directement sur `pipeline().run(...)`.
+        """
+        pipeline = self.pipeline(output_format)
         audio_buf = bytearray()
-        async for chunk in self.tts_stream(assistant_text):
-            audio_buf.extend(chunk)
-
-        return bytes(audio_buf)
-
-# Singleton instance
-global voice_agent
-voice_agent = OpenAIVoiceClient()
+        async for event in pipeline.run(audio_bytes, history, formats):
+            if event.kind == AUDIO:
+                audio_buf.extend(event.audio)
+        return pipeline.transcript, pipeline.reply, bytes(audio_buf)
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else providers.get("openai")
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    async def run_and_transcribe_parallel(self, audio_bytes: bytes) -> bytes:
+        _, _, audio = await self.run_and_transcribe(audio_bytes)
+        return audio
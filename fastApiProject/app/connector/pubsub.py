@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+pubsub_published = registry.counter("ws_pubsub_published_total", "Messages publiés vers les autres workers.")
+pubsub_received = registry.counter("ws_pubsub_received_total", "Messages reçus d'autres workers.")
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+
+class LocalPubSub:
+    """
+    Canal de diffusion interne au processus.
+
+    Chaque abonné est identifié par une origine : un message n'est jamais renvoyé à l'origine qui
+    l'a publié, celle-ci ayant déjà servi ses propres WebSockets.
+    """
+
+    def __init__(self):
+        self._handlers: List[Tuple[str, Handler]] = []
+
+    def subscribe(self, origin: str, handler: Handler):
+        """
+        Abonne un gestionnaire de connexions au canal.
+
+        Args:
+            origin (str): L'identifiant de l'abonné (un par gestionnaire de connexions).
+            handler (Handler): La coroutine appelée avec (canal, message).
+        """
+        self._handlers.append((origin, handler))
+
+    async def publish(self, channel: str, message: dict, origin: str):
+        """
+        Publie un message sur un canal.
+
+        Args:
+            channel (str): Le canal (l'identifiant de session).
+            message (dict): Le message JSON à diffuser.
+            origin (str): L'origine du message.
+        """
+        pubsub_published.inc(backend="memory")
+        for handler_origin, handler in list(self._handlers):
+            if handler_origin != origin:
+                await handler(channel, message)
+
+    async def close(self):
+        self._handlers.clear()
+
+
+class MongoPubSub:
+    """
+    Canal de diffusion entre workers et répliques, appuyé sur une collection plafonnée MongoDB
+    (`ws_events_db`) suivie par un curseur *tailable*.
+
+    La lecture du curseur est bloquante : elle tourne dans un thread dédié qui redonne chaque
+    message à l'event loop. Les messages publiés par ce processus sont ignorés à la lecture.
+    """
+
+    def __init__(self, db, collection_name: str = "ws_events_db", capped_bytes: int = 16 * 1024 * 1024):
+        self.db = db
+        self.collection_name = collection_name
+        self.capped_bytes = capped_bytes
+        self._handlers: List[Tuple[str, Handler]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._seen = deque(maxlen=1024)
+        self._collection = None
+
+    def _ensure_collection(self):
+        if self._collection is not None:
+            return self._collection
+        try:
+            self.db.create_collection(self.collection_name, capped=True, size=self.capped_bytes)
+            # un curseur tailable sur une collection plafonnée vide meurt immédiatement
+            self.db[self.collection_name].insert_one({"channel": None, "origin": None, "ts": datetime.utcnow()})
+        except CollectionInvalid:
+            pass
+        self._collection = self.db[self.collection_name]
+        return self._collection
+
+    def subscribe(self, origin: str, handler: Handler):
+        """
+        Abonne un gestionnaire de connexions et démarre le thread de lecture au premier abonnement.
+
+        Doit être appelé depuis l'event loop qui recevra les messages.
+
+        Args:
+            origin (str): L'identifiant de l'abonné.
+            handler (Handler): La coroutine appelée avec (canal, message).
+        """
+        self._handlers.append((origin, handler))
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._thread = threading.Thread(target=self._tail, name="ws-pubsub-tail", daemon=True)
+            self._thread.start()
+
+    async def publish(self, channel: str, message: dict, origin: str):
+        def _insert():
+            self._ensure_collection().insert_one({
+                "channel": channel,
+                "origin": origin,
+                "message": message,
+                "ts": datetime.utcnow(),
+            })
+
+        await run_in_threadpool(_insert)
+        pubsub_published.inc(backend="mongo")
+
+    def _dispatch(self, doc: Dict):
+        channel, origin, message = doc.get("channel"), doc.get("origin"), doc.get("message")
+        if channel is None:
+            return
+        for handler_origin, handler in list(self._handlers):
+            if handler_origin != origin:
+                pubsub_received.inc()
+                asyncio.run_coroutine_threadsafe(handler(channel, message), self._loop)
+
+    def _tail(self):
+        collection = self._ensure_collection()
+        # on ne rejoue pas l'historique : seuls les messages publiés après le démarrage comptent
+        since = datetime.utcnow()
+        while not self._stopped.is_set():
+            try:
+                cursor = collection.find(
+                    {"ts": {"$gte": since}},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                )
+                while cursor.alive and not self._stopped.is_set():
+                    for doc in cursor:
+                        # un curseur recréé peut relire les derniers messages de même horodatage
+                        if doc["_id"] in self._seen:
+                            continue
+                        self._seen.append(doc["_id"])
+                        since = doc["ts"]
+                        self._dispatch(doc)
+            except PyMongoError as e:
+                logger.warning(f"WebSocket pub/sub cursor error, retrying: {str(e)}")
+            self._stopped.wait(0.5)
+
+    async def close(self):
+        self._stopped.set()
+        self._handlers.clear()
+
+
+_pubsub = None
+
+
+def get_pubsub():
+    """
+    Retourne le canal de diffusion configuré par `SESSION_STORE_BACKEND`.
+
+    Avec le backend `memory`, la diffusion reste interne au processus (un seul worker).
+
+    Returns:
+        LocalPubSub | MongoPubSub: Le canal partagé du processus.
+    """
+    global _pubsub
+    if _pubsub is None:
+        if settings.SESSION_STORE_BACKEND == "mongo":
+            from app.connector.connectorBDD import MongoAccess
+            _pubsub = MongoPubSub(MongoAccess().db, capped_bytes=settings.WS_PUBSUB_CAPPED_BYTES)
+        else:
+            _pubsub = LocalPubSub()
+    return _pubsub
@@ -1,11 +1,13 @@
 import os
 
-import replicate
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
+IMAGE_MODEL = "black-forest-labs/flux-schnell"
+VIDEO_MODEL = "lucataco/animate-diff:beecf59c4aee8d81bf04f0381033dfa10dc16e845b4ae00d281e2fa377e48a9f"
+
 
 class ReplicateClient:
     def __init__(self):
@@ -13,7 +15,9 @@ class ReplicateClient:
         if not self.api_token:
             raise ValueError("API token is missing. Check your environment variables.")
 
-        replicate.Client(api_token=self.api_token)
+        # import différé : le SDK n'est chargé qu'à la construction du client (registre des fournisseurs)
+        import replicate
+        self.client = replicate.Client(api_token=self.api_token)
 
     async def generate_image(self, prompt: str) -> str:
         """
@@ -34,8 +38,8 @@ class ReplicateClient:
 
         try:
             # Appel à l'API Replicate pour générer l'image
-            output = await replicate.async_run(
-                "black-forest-labs/flux-schnell",
+            output = await self.client.async_run(
+                IMAGE_MODEL,
                 input={"prompt": prompt}
             )
 
@@ -65,8 +69,8 @@ class ReplicateClient:
 
         try:
             # Appel à l'API Replicate pour générer l'image
-            output = await replicate.async_run(
-                "lucataco/animate-diff:beecf59c4aee8d81bf04f0381033dfa10dc16e845b4ae00d281e2fa377e48a9f",
+            output = await self.client.async_run(
+                VIDEO_MODEL,
                 input={"prompt": prompt}
             )
 
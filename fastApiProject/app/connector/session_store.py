@@ -0,0 +1,222 @@
+import copy
+from abc import ABC, abstractmethod
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class SessionStore(ABC):
+    """
+    Stockage de l'état d'une conversation vocale, indépendant du worker qui porte la WebSocket.
+
+    Une session contient :
+    - `session_id` : l'identifiant transmis au client pour reprendre la conversation ;
+    - `user_id` : le propriétaire, seul autorisé à la reprendre ;
+    - `history` : les derniers messages user/assistant (bornés à `max_history`) ;
+    - `turn_id` : le dernier tour de parole traité, pour que la numérotation continue après une reconnexion.
+
+    L'audio en cours d'enregistrement n'est pas persisté : un tour interrompu par une déconnexion
+    est simplement rejoué par le client.
+    """
+
+    def __init__(self, ttl_seconds: int, max_history: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_history = max_history
+
+    @abstractmethod
+    async def create(self, user_id: str, history: Optional[List[Dict]] = None) -> Dict:
+        """
+        Crée une nouvelle session.
+
+        Args:
+            user_id (str): L'identifiant du propriétaire.
+            history (Optional[List[Dict]]): L'historique initial (envoyé par un ancien client).
+
+        Returns:
+            Dict: La session créée.
+        """
+
+    @abstractmethod
+    async def get(self, session_id: str, user_id: str) -> Optional[Dict]:
+        """
+        Récupère une session non expirée appartenant à l'utilisateur.
+
+        Args:
+            session_id (str): L'identifiant de la session.
+            user_id (str): L'identifiant de l'utilisateur qui demande la reprise.
+
+        Returns:
+            Optional[Dict]: La session, ou None si elle n'existe pas, a expiré ou appartient à un autre utilisateur.
+        """
+
+    @abstractmethod
+    async def append_history(self, session_id: str, messages: List[Dict], turn_id: int):
+        """
+        Ajoute les messages d'un tour à l'historique et enregistre le numéro du tour.
+
+        Args:
+            session_id (str): L'identifiant de la session.
+            messages (List[Dict]): Les messages à ajouter (rôle et contenu).
+            turn_id (int): Le tour de parole auquel ils appartiennent.
+        """
+
+    @abstractmethod
+    async def reset_history(self, session_id: str):
+        """
+        Vide l'historique d'une session.
+
+        Args:
+            session_id (str): L'identifiant de la session.
+        """
+
+    def _new_session(self, user_id: str, history: Optional[List[Dict]]) -> Dict:
+        now = datetime.utcnow()
+        return {
+            "session_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "history": list(history or [])[-self.max_history:],
+            "turn_id": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions conservées dans le processus : suffisant avec un seul worker, perdues au redémarrage.
+    """
+
+    def __init__(self, ttl_seconds: int, max_history: int):
+        super().__init__(ttl_seconds, max_history)
+        self._sessions: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, session: Dict) -> bool:
+        return session["updated_at"] < datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    async def create(self, user_id: str, history: Optional[List[Dict]] = None) -> Dict:
+        session = self._new_session(user_id, history)
+        with self._lock:
+            # purge paresseuse des sessions expirées
+            for expired_id in [sid for sid, s in self._sessions.items() if self._expired(s)]:
+                del self._sessions[expired_id]
+            self._sessions[session["session_id"]] = session
+        return copy.deepcopy(session)
+
+    async def get(self, session_id: str, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session["user_id"] != user_id or self._expired(session):
+                return None
+            return copy.deepcopy(session)
+
+    async def append_history(self, session_id: str, messages: List[Dict], turn_id: int):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            session["history"] = (session["history"] + list(messages))[-self.max_history:]
+            session["turn_id"] = max(session["turn_id"], turn_id)
+            session["updated_at"] = datetime.utcnow()
+
+    async def reset_history(self, session_id: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session["history"] = []
+                session["updated_at"] = datetime.utcnow()
+
+
+class MongoSessionStore(SessionStore):
+    """
+    Sessions stockées dans MongoDB (collection `voice_session_db`), partagées entre workers et
+    répliques. L'expiration est confiée à un index TTL sur `updated_at`.
+    """
+
+    def __init__(self, collection, ttl_seconds: int, max_history: int):
+        super().__init__(ttl_seconds, max_history)
+        self.db = collection
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        self.db.create_index("session_id", unique=True)
+        self.db.create_index("updated_at", expireAfterSeconds=self.ttl_seconds)
+        self._indexes_ready = True
+
+    def _create(self, user_id: str, history: Optional[List[Dict]]) -> Dict:
+        self._ensure_indexes()
+        session = self._new_session(user_id, history)
+        self.db.insert_one(dict(session))
+        return session
+
+    def _get(self, session_id: str, user_id: str) -> Optional[Dict]:
+        # l'index TTL n'est appliqué que périodiquement : on filtre aussi sur la date
+        return self.db.find_one(
+            {
+                "session_id": session_id,
+                "user_id": user_id,
+                "updated_at": {"$gte": datetime.utcnow() - timedelta(seconds=self.ttl_seconds)},
+            },
+            {"_id": 0},
+        )
+
+    def _append_history(self, session_id: str, messages: List[Dict], turn_id: int):
+        self.db.update_one(
+            {"session_id": session_id},
+            {
+                "$push": {"history": {"$each": list(messages), "$slice": -self.max_history}},
+                "$max": {"turn_id": turn_id},
+                "$set": {"updated_at": datetime.utcnow()},
+            },
+        )
+
+    def _reset_history(self, session_id: str):
+        self.db.update_one(
+            {"session_id": session_id},
+            {"$set": {"history": [], "updated_at": datetime.utcnow()}},
+        )
+
+    async def create(self, user_id: str, history: Optional[List[Dict]] = None) -> Dict:
+        return await run_in_threadpool(self._create, user_id, history)
+
+    async def get(self, session_id: str, user_id: str) -> Optional[Dict]:
+        return await run_in_threadpool(self._get, session_id, user_id)
+
+    async def append_history(self, session_id: str, messages: List[Dict], turn_id: int):
+        await run_in_threadpool(self._append_history, session_id, messages, turn_id)
+
+    async def reset_history(self, session_id: str):
+        await run_in_threadpool(self._reset_history, session_id)
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """
+    Retourne le stockage de sessions configuré par `SESSION_STORE_BACKEND` (`memory` ou `mongo`).
+
+    Le stockage est instancié au premier appel, pour ne pas ouvrir de connexion à l'import.
+
+    Returns:
+        SessionStore: Le stockage partagé du processus.
+    """
+    global _store
+    if _store is None:
+        if settings.SESSION_STORE_BACKEND == "mongo":
+            from app.connector.connectorBDD import MongoAccess
+            _store = MongoSessionStore(
+                MongoAccess().voice_session_collection,
+                settings.VOICE_SESSION_TTL,
+                settings.VOICE_SESSION_MAX_HISTORY,
+            )
+        else:
+            _store = InMemorySessionStore(settings.VOICE_SESSION_TTL, settings.VOICE_SESSION_MAX_HISTORY)
+    return _store
@@ -8,7 +8,9 @@ This script provides a pipeline for speech processing:
 3. Text-to-Speech (TTS): Converts the chat response to speech
 
 Usage:
-    python speech_pipeline.py --input <audio_file> [--output <output_file>] [--history <history_file>]
+    python -m app.connector.speech_pipeline --input <audio_file> [--output <output_file>] [--history <history_file>]
+
+Les durées de chaque étape (ms) sont affichées en fin d'exécution.
 
 Requirements:
     - OpenAI API key set as environment variable OPENAI_API_KEY
@@ -21,18 +23,19 @@ import json
 import base64
 import argparse
 from typing import List, Dict, Optional
-import requests
 import asyncio
 
-import openai
 from dotenv import load_dotenv
 
+from app.connector.http_pool import http_pool
+from app.core.providers import providers
+from app.core.tracing import span, start_turn
+
 # Load environment variables
 load_dotenv()
 
 # Set up OpenAI API
-openai.api_key = os.getenv("OPENAI_KEY")
-if not openai.api_key:
+if not os.getenv("OPENAI_KEY"):
     print("Error: OPENAI_API_KEY environment variable not set")
     sys.exit(1)
 
@@ -74,9 +77,8 @@ class SpeechPipeline:
 
         # Use run_in_threadpool for the synchronous API call
         from fastapi.concurrency import run_in_threadpool
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_KEY"))
         resp = await run_in_threadpool(
-            client.audio.transcriptions.create,
+            providers.get("openai").audio.transcriptions.create,
             file=audio_file,
             model="whisper-1"
         )
@@ -108,9 +110,8 @@ class SpeechPipeline:
 
         # Use run_in_threadpool for the synchronous API call
         from fastapi.concurrency import run_in_threadpool
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_KEY"))
         resp = await run_in_threadpool(
-            client.chat.completions.create,
+            providers.get("openai").chat.completions.create,
             model="gpt-3.5-turbo",
             messages=history
         )
@@ -122,7 +123,7 @@ class SpeechPipeline:
 
         return reply, history
 
-    def synthesize(self, text: str, output_file: Optional[str] = None) -> bytes:
+    async def synthesize(self, text: str, output_file: Optional[str] = None) -> bytes:
         """
         Convert text to speech using ElevenLabs API.
 
@@ -149,7 +150,7 @@ class SpeechPipeline:
             }
         }
 
-        response = requests.post(url, json=data, headers=headers)
+        response = await http_pool.request("POST", url, json=data, headers=headers)
         response.raise_for_status()
 
         audio_bytes = response.content
@@ -182,22 +183,27 @@ async def main():
             print(f"Warning: Could not parse history file {args.history}. Starting with empty history.")
 
     # Process audio
+    trace = start_turn("speech_pipeline")
     try:
         # 1. Transcribe audio to text
         print("Transcribing audio...")
-        text = await pipeline.transcribe(args.input)
+        with span("stt"):
+            text = await pipeline.transcribe(args.input)
         print(f"Transcription: {text}")
 
         # 2. Process text through chat model
         print("Processing through chat model...")
-        reply, updated_history = await pipeline.chat(text, history)
+        with span("llm"):
+            reply, updated_history = await pipeline.chat(text, history)
         print(f"Chat response: {reply}")
 
         # 3. Convert chat response to speech
         print("Converting to speech...")
         output_file = args.output if args.output else "output.mp3"
-        audio_bytes = pipeline.synthesize(reply, output_file)
+        with span("tts"):
+            audio_bytes = await pipeline.synthesize(reply, output_file)
         print(f"Speech saved to {output_file}")
+        print(f"Timings (ms): {json.dumps(trace.finish())}")
 
         # Save updated history if history file was provided
         if args.history:
@@ -208,6 +214,8 @@ async def main():
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        await http_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+from app.core.metrics import registry
+
+
+tts_cache_hits = registry.counter("tts_cache_hits_total", "Nombre de synthèses servies depuis le cache TTS.")
+tts_cache_misses = registry.counter("tts_cache_misses_total", "Nombre de synthèses absentes du cache TTS.")
+tts_cache_evictions = registry.counter("tts_cache_evictions_total", "Nombre d'entrées évincées du cache TTS.")
+tts_cache_bytes = registry.gauge("tts_cache_bytes", "Taille occupée par le cache TTS, par niveau.")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un texte avant de calculer sa clé de cache.
+
+    Les variantes Unicode équivalentes et les espaces superflus produisent le même audio,
+    elles doivent donc partager la même entrée.
+
+    Args:
+        text (str): Le texte à synthétiser.
+
+    Returns:
+        str: Le texte normalisé (NFKC, espaces compactés).
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class TTSCache:
+    """
+    Cache des synthèses vocales à deux niveaux :
+    - un LRU en mémoire borné par un budget en octets ;
+    - un niveau disque optionnel (volume `images`) qui survit aux redémarrages.
+
+    Les entrées plus grosses que `max_entry_bytes` ne sont jamais mises en cache : seules
+    les phrases courtes et récurrentes (salutations, relances...) ont un intérêt à être rejouées.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_size = sum(entry.stat().st_size for entry in os.scandir(self.disk_dir) if entry.is_file())
+            tts_cache_bytes.set(self._disk_size, tier="disk")
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, speed: float, response_format: str = "mp3") -> str:
+        """
+        Calcule la clé d'une synthèse.
+
+        Args:
+            text (str): Le texte à synthétiser.
+            voice (str): La voix utilisée.
+            model (str): Le modèle TTS.
+            speed (float): La vitesse de lecture.
+            response_format (str): Le format audio produit.
+
+        Returns:
+            str: Une empreinte SHA-256 hexadécimale.
+        """
+        raw = "\x1f".join([model, voice, f"{speed:.2f}", response_format, normalize_text(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """
+        Cherche une entrée dans le niveau mémoire uniquement (aucune E/S).
+
+        Args:
+            key (str): La clé de la synthèse.
+
+        Returns:
+            Optional[bytes]: L'audio en cache, ou None.
+        """
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+        if audio is not None:
+            tts_cache_hits.inc(tier="memory")
+        return audio
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Cherche une entrée en mémoire puis sur disque. Une entrée trouvée sur disque est
+        promue en mémoire.
+
+        Cette méthode peut faire des E/S disque : depuis l'event loop, l'appeler via
+        `run_in_threadpool`.
+
+        Args:
+            key (str): La clé de la synthèse.
+
+        Returns:
+            Optional[bytes]: L'audio en cache, ou None (l'échec est comptabilisé).
+        """
+        audio = self.get_memory(key)
+        if audio is not None:
+            return audio
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as file:
+                    audio = file.read()
+            except FileNotFoundError:
+                audio = None
+            if audio is not None:
+                tts_cache_hits.inc(tier="disk")
+                self._put_memory(key, audio)
+                return audio
+
+        tts_cache_misses.inc()
+        return None
+
+    def put(self, key: str, audio: bytes):
+        """
+        Ajoute une synthèse au cache (mémoire et disque si configuré).
+
+        Cette méthode peut faire des E/S disque : depuis l'event loop, l'appeler via
+        `run_in_threadpool`.
+
+        Args:
+            key (str): La clé de la synthèse.
+            audio (bytes): L'audio complet.
+        """
+        if not audio or len(audio) > self.max_entry_bytes:
+            return
+        self._put_memory(key, audio)
+        if self.disk_dir:
+            self._put_disk(key, audio)
+
+    def _put_memory(self, key: str, audio: bytes):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = audio
+            self._size += len(audio)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                tts_cache_evictions.inc(tier="memory")
+            tts_cache_bytes.set(self._size, tier="memory")
+
+    def _put_disk(self, key: str, audio: bytes):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(audio)
+            # Renommage atomique : un autre worker ne lit jamais un fichier partiel
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_size += len(audio)
+            over_budget = self._disk_size > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """
+        Supprime les fichiers les moins récemment écrits jusqu'à repasser sous le budget disque.
+        """
+        entries = sorted(
+            (entry for entry in os.scandir(self.disk_dir) if entry.is_file() and entry.name.endswith(".audio")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            total -= size
+            tts_cache_evictions.inc(tier="disk")
+        with self._lock:
+            self._disk_size = total
+        tts_cache_bytes.set(total, tier="disk")
+
+    def stats(self) -> dict:
+        """
+        Retourne un instantané de l'état du cache.
+
+        Returns:
+            dict: Le nombre d'entrées, les tailles occupées et les compteurs de succès/échecs.
+        """
+        with self._lock:
+            entries, size, disk_size = len(self._entries), self._size, self._disk_size
+        return {
+            "entries": entries,
+            "memory_bytes": size,
+            "disk_bytes": disk_size,
+            "hits_memory": tts_cache_hits.value(tier="memory"),
+            "hits_disk": tts_cache_hits.value(tier="disk"),
+            "misses": tts_cache_misses.value(),
+        }
+
+
+def iter_chunks(audio: bytes, chunk_size: int = 16384) -> Iterator[bytes]:
+    """
+    Découpe un audio en morceaux pour le renvoyer en streaming.
+
+    Args:
+        audio (bytes): L'audio complet.
+        chunk_size (int): La taille maximale d'un morceau.
+
+    Yields:
+        bytes: Les morceaux successifs.
+    """
+    view = memoryview(audio)
+    for start in range(0, len(audio), chunk_size):
+        yield bytes(view[start:start + chunk_size])
@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.connector.connectorBDD import MongoAccess
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+usage_pending = registry.gauge("usage_counters_pending", "Compteurs d'usage modifiés en attente d'écriture.")
+usage_flush_failed = registry.counter("usage_counters_flush_failed_total", "Écritures groupées des compteurs d'usage échouées.")
+usage_rolled_up = registry.counter("usage_counters_rolled_up_total", "Compteurs horaires compactés en compteurs journaliers.")
+
+HOUR, DAY, USER_DAY = "hour", "day", "user-day"
+ROLLUP_LEASE_ID = "rollup-lease"
+
+
+def _utcnow() -> datetime:
+    # MongoDB stocke des dates UTC sans fuseau
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def counter_id(period: str, bucket: datetime, user_email: str, source: str = "", session: str = "", model: str = "",
+               page: str = "") -> str:
+    """
+    Identifiant d'un compteur : une clé déterministe, pour que les `$inc` de tous les workers
+    (et le compactage) visent le même document.
+    """
+    fmt = "%Y-%m-%dT%H" if period == HOUR else "%Y-%m-%d"
+    return "|".join((period, bucket.strftime(fmt), user_email, source, session, model, page))
+
+
+class UsageCounters:
+    """
+    Compteurs d'usage pré-agrégés (collection `usage_counter_db`), pour les quotas et tableaux de bord.
+
+    Chaque génération terminée (prompt, image, vidéo, tour vocal) incrémente :
+
+    - le compteur horaire de (utilisateur, source, session de formation, modèle, page, heure) :
+      `count` et `tokens` ; `session` est la session de formation en cours de l'utilisateur
+      (collection `sessions_db`, vide hors session), `page` la page de l'application (prompts) ;
+    - le total journalier de l'utilisateur (`period="user-day"`) : `count`, `tokens` et `sources.<source>`.
+      La vérification d'un quota est donc la lecture d'un seul document (`user_usage`).
+
+    `record` ne fait aucune E/S : les incréments sont cumulés en mémoire et écrits par lots
+    (`$inc` avec upsert, un seul `bulk_write`) toutes les `flush_interval` secondes, puis à l'arrêt.
+    La session de formation est résolue à ce moment, hors event loop, et mise en cache
+    `session_cache_seconds` secondes. `user_usage` ajoute les incréments non encore écrits du worker.
+
+    Toutes les `rollup_interval` secondes, les compteurs horaires plus anciens que
+    `hourly_retention_days` jours sont compactés en compteurs journaliers (`period="day"`). Un bail
+    en base garantit qu'un seul worker compacte à la fois.
+    """
+
+    def __init__(self, flush_interval: float = 1.0, rollup_interval: float = 3600.0, hourly_retention_days: int = 2,
+                 session_cache_seconds: float = 60.0, collection: Optional[Collection] = None,
+                 sessions: Optional[Collection] = None):
+        self.flush_interval = flush_interval
+        self.rollup_interval = rollup_interval
+        self.hourly_retention_days = hourly_retention_days
+        self.session_cache_seconds = session_cache_seconds
+        self._collection = collection
+        self._sessions = sessions
+        # _id -> (champs fixés à la création, incréments)
+        self._pending: Dict[str, Tuple[Dict, Counter]] = {}
+        # générations dont la session de formation reste à résoudre :
+        # (instant, utilisateur, source, modèle, page, tokens, nombre)
+        self._unresolved: List[Tuple[datetime, str, str, str, str, int, int]] = []
+        # (utilisateur, minute) -> (expiration, identifiant de la session de formation en cours)
+        self._session_cache: Dict[Tuple[str, datetime], Tuple[float, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self) -> Collection:
+        collection = self._collection if self._collection is not None else MongoAccess().usage_counter_collection
+        if not self._indexes_ready:
+            collection.create_index([("period", 1), ("bucket", 1)])
+            collection.create_index([("user_email", 1), ("period", 1), ("bucket", 1)])
+            self._indexes_ready = True
+        return collection
+
+    @property
+    def sessions(self) -> Collection:
+        if self._sessions is None:
+            self._sessions = MongoAccess().sessions_collection
+        return self._sessions
+
+    def record(self, source: str, user_email: str, model: str, page: Optional[str] = None, tokens: int = 0,
+               count: int = 1, at: Optional[datetime] = None):
+        """
+        Compte une génération terminée, sans E/S.
+
+        Args:
+            source (str): La source (`prompt`, `image`, `video`, `voice`).
+            user_email (str): L'adresse e-mail de l'utilisateur.
+            model (str): Le modèle utilisé.
+            page (Optional[str]): La page de l'application (prompts).
+            tokens (int): L'estimation des tokens consommés.
+            count (int): Le nombre de générations.
+            at (Optional[datetime]): L'instant de la génération (UTC), maintenant par défaut.
+        """
+        at = at or _utcnow()
+        day = _day(at)
+        with self._lock:
+            # compteur horaire ajouté à l'écriture, une fois la session de formation connue
+            self._unresolved.append((at, user_email, source, model, page or "", tokens, count))
+            self._add(counter_id(USER_DAY, day, user_email),
+                      {"period": USER_DAY, "bucket": day, "user_email": user_email},
+                      {"count": count, "tokens": tokens, f"sources.{source}": count})
+            pending = len(self._pending) + len(self._unresolved)
+        usage_pending.set(pending)
+
+    def training_session(self, user_email: str, at: datetime) -> Optional[str]:
+        """
+        Session de formation de l'utilisateur à un instant donné, mise en cache (bloquant au premier appel).
+
+        Args:
+            user_email (str): L'adresse e-mail de l'utilisateur.
+            at (datetime): L'instant (UTC).
+
+        Returns:
+            Optional[str]: L'identifiant de la session, None hors session.
+        """
+        key = (user_email, at.replace(second=0, microsecond=0))
+        now = time.monotonic()
+        cached = self._session_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        session = self.sessions.find_one(
+            {"emails": user_email, "start_time": {"$lte": at}, "end_time": {"$gte": at}}, {"_id": 1}
+        )
+        session_id = str(session["_id"]) if session else None
+        if len(self._session_cache) > 10000:
+            self._session_cache.clear()
+        self._session_cache[key] = (now + self.session_cache_seconds, session_id)
+        return session_id
+
+    def _resolve(self):
+        # ajoute les compteurs horaires des générations en attente, avec leur session de formation
+        with self._lock:
+            unresolved, self._unresolved = self._unresolved, []
+        try:
+            counters = []
+            for at, user_email, source, model, page, tokens, count in unresolved:
+                hour = at.replace(minute=0, second=0, microsecond=0)
+                session = self.training_session(user_email, at) or ""
+                counters.append((
+                    counter_id(HOUR, hour, user_email, source, session, model, page),
+                    {"period": HOUR, "bucket": hour, "day": _day(at), "user_email": user_email, "source": source,
+                     "session": session, "model": model, "page": page},
+                    {"count": count, "tokens": tokens},
+                ))
+        except PyMongoError:
+            with self._lock:
+                self._unresolved[:0] = unresolved
+            raise
+        with self._lock:
+            for _id, fields, increments in counters:
+                self._add(_id, fields, increments)
+
+    def _add(self, _id: str, fields: Dict, increments: Dict):
+        entry = self._pending.get(_id)
+        if entry is None:
+            entry = self._pending[_id] = (fields, Counter())
+        entry[1].update(increments)
+
+    def flush(self):
+        """Écrit les incréments en attente (bloquant)."""
+        try:
+            self._resolve()
+        except PyMongoError as e:
+            # les compteurs horaires attendent l'écriture suivante, les totaux journaliers partent
+            usage_flush_failed.inc()
+            logger.warning(f"Usage counters: training session lookup failed, retrying later: {e}")
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            usage_pending.set(len(self._unresolved))
+        if not pending:
+            return
+        operations = [
+            UpdateOne({"_id": _id}, {"$inc": dict(increments), "$setOnInsert": fields}, upsert=True)
+            for _id, (fields, increments) in pending.items()
+        ]
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            # les incréments sont conservés pour l'écriture suivante (un `$inc` n'est pas idempotent :
+            # une écriture partielle peut être comptée deux fois, jamais perdue)
+            usage_flush_failed.inc()
+            logger.warning(f"Usage counters flush failed, retrying later: {e}")
+            with self._lock:
+                for _id, (fields, increments) in pending.items():
+                    self._add(_id, fields, increments)
+                usage_pending.set(len(self._pending) + len(self._unresolved))
+
+    def user_usage(self, user_email: str, day: Optional[datetime] = None) -> Dict:
+        """
+        Usage d'un utilisateur sur une journée (UTC), lu en un seul document (bloquant).
+
+        Args:
+            user_email (str): L'adresse e-mail de l'utilisateur.
+            day (Optional[datetime]): Un instant de la journée, aujourd'hui par défaut.
+
+        Returns:
+            Dict: `count`, `tokens` et `sources` (nombre de générations par source).
+        """
+        _id = counter_id(USER_DAY, _day(day or _utcnow()), user_email)
+        doc = self.collection.find_one({"_id": _id}, {"count": 1, "tokens": 1, "sources": 1}) or {}
+        usage = {"count": doc.get("count", 0), "tokens": doc.get("tokens", 0), "sources": dict(doc.get("sources", {}))}
+        with self._lock:
+            entry = self._pending.get(_id)
+            increments = dict(entry[1]) if entry else {}
+        for key, value in increments.items():
+            if key.startswith("sources."):
+                source = key[len("sources."):]
+                usage["sources"][source] = usage["sources"].get(source, 0) + value
+            else:
+                usage[key] += value
+        return usage
+
+    def rollup(self, now: Optional[datetime] = None) -> int:
+        """
+        Compacte les compteurs horaires des journées révolues en compteurs journaliers (bloquant).
+
+        Les compteurs horaires sont regroupés par (utilisateur, source, session, modèle, page, jour), ajoutés
+        (`$inc`) au compteur journalier puis supprimés : seuls les documents comptés sont supprimés,
+        un incrément tardif sera compacté au passage suivant.
+
+        Args:
+            now (Optional[datetime]): L'instant de référence (UTC), maintenant par défaut.
+
+        Returns:
+            int: Le nombre de compteurs horaires compactés (0 si un autre worker détient le bail).
+        """
+        now = now or _utcnow()
+        if not self._acquire_lease(now):
+            return 0
+        cutoff = _day(now) - timedelta(days=self.hourly_retention_days)
+        groups = list(self.collection.aggregate([
+            {"$match": {"period": HOUR, "bucket": {"$lt": cutoff}}},
+            {"$group": {
+                "_id": {"day": "$day", "user_email": "$user_email", "source": "$source",
+                        "session": "$session", "model": "$model", "page": "$page"},
+                "count": {"$sum": "$count"},
+                "tokens": {"$sum": "$tokens"},
+                "ids": {"$push": "$_id"},
+            }},
+        ]))
+        if not groups:
+            return 0
+        operations: List[UpdateOne] = []
+        rolled: List[str] = []
+        for group in groups:
+            key = group["_id"]
+            key["page"] = key.get("page") or ""
+            operations.append(UpdateOne(
+                {"_id": counter_id(DAY, key["day"], key["user_email"], key["source"], key["session"], key["model"],
+                                   key["page"])},
+                {"$inc": {"count": group["count"], "tokens": group["tokens"]},
+                 "$setOnInsert": {"period": DAY, "bucket": key["day"], **{k: v for k, v in key.items() if k != "day"}}},
+                upsert=True,
+            ))
+            rolled.extend(group["ids"])
+        self.collection.bulk_write(operations, ordered=False)
+        self.collection.delete_many({"_id": {"$in": rolled}})
+        usage_rolled_up.inc(len(rolled))
+        return len(rolled)
+
+    def _acquire_lease(self, now: datetime) -> bool:
+        # upsert sur un bail expiré : si le bail est encore valide, le filtre ne correspond pas et
+        # l'upsert se heurte à l'_id existant
+        try:
+            self.collection.update_one(
+                {"_id": ROLLUP_LEASE_ID, "until": {"$lt": now}},
+                {"$set": {"until": now + timedelta(seconds=max(self.rollup_interval / 2, 60))}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def start(self):
+        """Démarre l'écriture périodique et le compactage (au démarrage de l'application)."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche périodique puis écrit les incréments restants."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_threadpool(self.flush)
+
+    async def _run(self):
+        next_rollup = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await run_in_threadpool(self.flush)
+                if time.monotonic() >= next_rollup:
+                    next_rollup = time.monotonic() + self.rollup_interval
+                    await run_in_threadpool(self.rollup)
+            except Exception as e:
+                logger.error(f"Usage counters maintenance failed: {e}")
+
+
+usage_counters = UsageCounters(
+    flush_interval=settings.USAGE_COUNTERS_FLUSH_INTERVAL,
+    rollup_interval=settings.USAGE_ROLLUP_INTERVAL,
+    hourly_retention_days=settings.USAGE_HOURLY_RETENTION_DAYS,
+)
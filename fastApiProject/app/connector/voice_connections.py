@@ -0,0 +1,86 @@
+import logging
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from app.connector.ws_outbox import WebSocketOutbox, CONTROL
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceConnectionManager:
+    """
+    Connexions du WebSocket vocal de ce worker, une file d'envoi (`WebSocketOutbox`) par utilisateur.
+
+    Une nouvelle connexion d'un même utilisateur remplace la précédente. À l'arrêt de l'application,
+    `close_all` laisse partir les messages en file avant de fermer les connexions.
+    """
+
+    def __init__(self):
+        # client_id -> file d'envoi de la connexion (une seule tâche d'écriture par socket)
+        self.active_connections: Dict[str, WebSocketOutbox] = {}
+
+    async def connect(self, websocket: WebSocket, client_id: str, codec=None):
+        previous = self.active_connections.pop(client_id, None)
+        if previous is not None:
+            previous.close()
+        outbox = WebSocketOutbox(
+            websocket,
+            client_id,
+            max_size=settings.VOICE_WS_QUEUE_SIZE,
+            ack_interval=settings.VOICE_WS_ACK_INTERVAL,
+            ack_every=settings.VOICE_WS_ACK_EVERY,
+            codec=codec,
+        )
+        outbox.start()
+        self.active_connections[client_id] = outbox
+        logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
+
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        """
+        Ferme la connexion d'un utilisateur.
+
+        Args:
+            client_id (str): L'identifiant de l'utilisateur.
+            websocket (Optional[WebSocket]): Le socket qui se termine : si l'utilisateur s'est
+                reconnecté entre-temps, la nouvelle connexion est conservée.
+        """
+        outbox = self.active_connections.get(client_id)
+        if outbox is not None and (websocket is None or outbox.websocket is websocket):
+            del self.active_connections[client_id]
+            outbox.close()
+            logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)} "
+                        f"(max queue depth: {outbox.max_depth})")
+
+    async def send_audio(self, client_id: str, audio_chunk: bytes, turn_id: Optional[int] = None):
+        if client_id in self.active_connections:
+            await self.active_connections[client_id].send_bytes(audio_chunk, turn_id)
+
+    async def send_text(self, client_id: str, message: str):
+        if client_id in self.active_connections:
+            await self.active_connections[client_id].send_text(message)
+
+    async def send_json(self, client_id: str, message: dict, kind: str = CONTROL, turn_id: Optional[int] = None):
+        if client_id in self.active_connections:
+            await self.active_connections[client_id].send_json(message, kind, turn_id)
+
+    async def drain(self, client_id: str):
+        if client_id in self.active_connections:
+            await self.active_connections[client_id].drain()
+
+    def ack(self, client_id: str, size: int):
+        if client_id in self.active_connections:
+            self.active_connections[client_id].ack(size)
+
+    async def close_all(self, timeout: float = 5.0):
+        """
+        Vide puis ferme toutes les connexions (à l'arrêt de l'application).
+
+        Args:
+            timeout (float): Le délai maximal (s) accordé à chaque file pour se vider.
+        """
+        for client_id, outbox in list(self.active_connections.items()):
+            await outbox.drain(timeout)
+            self.disconnect(client_id)
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from app.connector.audio_transcoder import AudioFormats, DEFAULT_OUTPUT_FORMAT
+from app.core.tracing import TurnTrace, current_turn
+
+
+logger = logging.getLogger(__name__)
+
+# Types d'événements produits par le pipeline
+TRANSCRIPT = "transcript"  # transcription complète de l'audio utilisateur
+TEXT = "text"              # morceau de réponse LLM (delta)
+AUDIO = "audio"            # morceau d'audio TTS, dans l'ordre des phrases
+DONE = "done"              # fin du tour, avec la réponse complète
+
+_SENTENCE_END = re.compile(r"([.!?…]+|[;:])(\s+)")
+
+
+@dataclass
+class PipelineEvent:
+    kind: str
+    text: str = ""
+    audio: bytes = b""
+
+
+def split_sentences(text: str, min_chars: int = 12) -> Tuple[List[str], str]:
+    """
+    Extrait les phrases terminées d'un texte en cours de génération.
+
+    Les phrases trop courtes (« Oui. ») sont regroupées avec la suivante pour éviter une
+    synthèse par mot.
+
+    Args:
+        text (str): Le texte reçu jusqu'ici et pas encore synthétisé.
+        min_chars (int): La longueur minimale d'un segment envoyé à la TTS.
+
+    Returns:
+        Tuple[List[str], str]: Les phrases prêtes et le reste du texte.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        candidate = text[start:match.end(1)].strip()
+        if len(candidate) >= min_chars:
+            sentences.append(candidate)
+            start = match.end()
+    return sentences, text[start:]
+
+
+def build_messages(user_text: str, history: Optional[List[Dict]] = None,
+                   system_prompt: Optional[str] = None) -> List[Dict]:
+    """
+    Construit le prompt du LLM à partir de l'historique user/assistant.
+
+    Args:
+        user_text (str): Le nouveau message de l'utilisateur.
+        history (Optional[List[Dict]]): Les messages précédents.
+        system_prompt (Optional[str]): La personnalité de l'agent.
+
+    Returns:
+        List[Dict]: Les messages à envoyer au LLM.
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    for msg in history or []:
+        if msg.get("role") in ("user", "assistant"):
+            messages.append({"role": msg["role"], "content": msg["content"]})
+    messages.append({"role": "user", "content": user_text})
+    return messages
+
+
+class VoicePipeline:
+    """
+    Pipeline vocal STT → LLM → TTS dont les étapes se chevauchent :
+    - la réponse du LLM est découpée en phrases au fil de l'eau ;
+    - chaque phrase terminée part en synthèse pendant que le LLM continue de générer
+      (au plus `tts_concurrency` synthèses simultanées) ;
+    - l'audio est restitué dans l'ordre des phrases dès le premier morceau de la première.
+
+    Un pipeline correspond à un tour de parole : `transcript`, `reply` et `timings` décrivent
+    le dernier tour exécuté. Les étapes sont notées sur la trace du tour en cours (voir
+    `app.core.tracing`) ; hors d'un tour, le pipeline trace et clôt son propre tour.
+    """
+
+    def __init__(self, client, output_format: str = DEFAULT_OUTPUT_FORMAT, system_prompt: Optional[str] = None,
+                 tts_concurrency: int = 2, min_sentence_chars: int = 12):
+        self.client = client
+        self.output_format = output_format
+        self.system_prompt = system_prompt
+        self.tts_concurrency = tts_concurrency
+        self.min_sentence_chars = min_sentence_chars
+
+        self.transcript = ""
+        self.reply = ""
+        self.trace: Optional[TurnTrace] = None
+        self._owns_trace = False
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Les mesures du dernier tour, en millisecondes."""
+        return self.trace.timings() if self.trace is not None else {}
+
+    def _begin(self):
+        self.trace = current_turn()
+        self._owns_trace = self.trace is None
+        if self._owns_trace:
+            self.trace = TurnTrace("pipeline")
+
+    def _mark(self, stage: str):
+        self.trace.mark(stage)
+
+    async def run(self, audio: bytes, history: Optional[List[Dict]] = None,
+                  formats: Optional[AudioFormats] = None) -> AsyncGenerator[PipelineEvent, None]:
+        """
+        Exécute un tour complet à partir de l'audio de l'utilisateur.
+
+        Args:
+            audio (bytes): L'audio enregistré.
+            history (Optional[List[Dict]]): L'historique de la conversation.
+            formats (Optional[AudioFormats]): Le format de l'audio reçu.
+
+        Yields:
+            PipelineEvent: La transcription, puis les deltas de texte et l'audio, puis la fin du tour.
+        """
+        self._begin()
+        self.transcript = await self.client.transcribe_audio(audio, formats)
+        self._mark("stt")
+        yield PipelineEvent(TRANSCRIPT, text=self.transcript)
+
+        async for event in self._respond(build_messages(self.transcript, history, self.system_prompt)):
+            yield event
+
+    async def respond(self, messages: List[Dict]) -> AsyncGenerator[PipelineEvent, None]:
+        """
+        Exécute un tour à partir d'un prompt déjà construit (sans STT).
+
+        Args:
+            messages (List[Dict]): Les messages à envoyer au LLM.
+
+        Yields:
+            PipelineEvent: Les deltas de texte et l'audio, puis la fin du tour.
+        """
+        self._begin()
+        async for event in self._respond(messages):
+            yield event
+
+    async def _respond(self, messages: List[Dict]) -> AsyncGenerator[PipelineEvent, None]:
+        self.reply = ""
+        out: asyncio.Queue = asyncio.Queue()
+        # une file d'audio par phrase, dans l'ordre des phrases
+        sentences: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.tts_concurrency)
+        tts_tasks: List[asyncio.Task] = []
+
+        producer = asyncio.create_task(self._produce_text(messages, sentences, out, slots, tts_tasks))
+        forwarder = asyncio.create_task(self._forward_audio(sentences, out))
+        forwarder.add_done_callback(lambda _: out.put_nowait(None))
+        try:
+            while True:
+                event = await out.get()
+                if event is None:
+                    break
+                yield event
+            # propage une éventuelle erreur de la TTS, puis du LLM
+            await forwarder
+            await producer
+        finally:
+            for task in (producer, forwarder, *tts_tasks):
+                if not task.done():
+                    task.cancel()
+
+        self._mark("reply_complete")
+        if self._owns_trace:
+            self.trace.finish()
+        yield PipelineEvent(DONE, text=self.reply)
+
+    async def _produce_text(self, messages: List[Dict], sentences: asyncio.Queue, out: asyncio.Queue,
+                            slots: asyncio.Semaphore, tts_tasks: List[asyncio.Task]):
+        pending = ""
+        try:
+            async for delta in self.client.chat_reply_stream(messages):
+                self._mark("llm_first_token")
+                self.reply += delta
+                pending += delta
+                await out.put(PipelineEvent(TEXT, text=delta))
+                ready, pending = split_sentences(pending, self.min_sentence_chars)
+                for sentence in ready:
+                    await self._schedule_tts(sentence, sentences, slots, tts_tasks)
+            if pending.strip():
+                await self._schedule_tts(pending.strip(), sentences, slots, tts_tasks)
+            self._mark("llm")
+        finally:
+            await sentences.put(None)
+
+    async def _schedule_tts(self, sentence: str, sentences: asyncio.Queue, slots: asyncio.Semaphore,
+                            tts_tasks: List[asyncio.Task]):
+        chunks: asyncio.Queue = asyncio.Queue()
+        tts_tasks.append(asyncio.create_task(self._synthesize(sentence, chunks, slots)))
+        await sentences.put(chunks)
+
+    async def _synthesize(self, sentence: str, chunks: asyncio.Queue, slots: asyncio.Semaphore):
+        try:
+            async with slots:
+                async for chunk in self.client.tts_stream(sentence, self.output_format):
+                    await chunks.put(chunk)
+        except Exception as e:
+            logger.error(f"TTS failed for sentence: {str(e)}")
+            await chunks.put(e)
+        finally:
+            await chunks.put(None)
+
+    async def _forward_audio(self, sentences: asyncio.Queue, out: asyncio.Queue):
+        while True:
+            chunks = await sentences.get()
+            if chunks is None:
+                return
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                self._mark("first_audio")
+                await out.put(PipelineEvent(AUDIO, audio=chunk))
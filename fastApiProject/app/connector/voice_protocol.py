@@ -0,0 +1,138 @@
+import json
+import struct
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+
+# En-tête binaire : version (1 octet), type (1 octet), flags (2 octets), turn_id (4 octets), seq (4 octets)
+HEADER = struct.Struct("!BBHII")
+PROTOCOL_VERSION = 1
+
+# Types de trames
+FRAME_AUDIO = 0x01               # audio (TTS vers le client, micro vers le serveur)
+FRAME_TEXT_DELTA = 0x02          # morceau de réponse LLM (delta UTF-8, jamais le texte cumulé)
+FRAME_PARTIAL_TRANSCRIPT = 0x03  # transcription partielle (UTF-8)
+FRAME_CONTROL = 0x04             # message de contrôle JSON (états, fin de tour, erreurs, accusés)
+FRAME_TYPES = (FRAME_AUDIO, FRAME_TEXT_DELTA, FRAME_PARTIAL_TRANSCRIPT, FRAME_CONTROL)
+
+# Types de messages sortants, qui déterminent leur encodage et leur traitement dans la file d'envoi
+AUDIO = "audio"          # audio TTS : jamais abandonné
+CONTROL = "control"      # messages structurants (connected, complete, error...) : jamais abandonnés
+STATUS = "status"        # simple changement d'état : seul le plus récent compte
+PARTIAL = "partial"      # transcription partielle : remplacée par la plus récente, abandonnée si la file sature
+LLM_CHUNK = "llm_chunk"  # morceau de réponse LLM : fusionné avec le morceau en attente
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+
+
+@dataclass
+class Frame:
+    frame_type: int
+    turn_id: int
+    seq: int
+    payload: bytes
+    flags: int = 0
+
+    def json(self) -> dict:
+        return json.loads(self.payload.decode("utf-8"))
+
+
+def encode_frame(frame_type: int, turn_id: int, seq: int, payload: bytes, flags: int = 0) -> bytes:
+    """
+    Encode une trame binaire.
+
+    Args:
+        frame_type (int): Le type de la trame (FRAME_*).
+        turn_id (int): L'identifiant du tour de parole.
+        seq (int): Le numéro de séquence de la trame dans le tour.
+        payload (bytes): Le contenu de la trame.
+        flags (int): Réservé.
+
+    Returns:
+        bytes: L'en-tête suivi du contenu.
+    """
+    return HEADER.pack(PROTOCOL_VERSION, frame_type, flags, turn_id, seq) + payload
+
+
+def decode_frame(data: bytes) -> Optional[Frame]:
+    """
+    Décode une trame binaire.
+
+    Args:
+        data (bytes): Le message WebSocket binaire reçu.
+
+    Returns:
+        Optional[Frame]: La trame, ou None si le message n'est pas une trame valide de ce protocole
+        (trop courte, version ou type inconnus).
+    """
+    if len(data) < HEADER.size or data[0] != PROTOCOL_VERSION or data[1] not in FRAME_TYPES:
+        return None
+    version, frame_type, flags, turn_id, seq = HEADER.unpack_from(data)
+    return Frame(frame_type, turn_id, seq, bytes(data[HEADER.size:]), flags)
+
+
+class JsonCodec:
+    """
+    Protocole historique : contrôle en JSON texte, audio en binaire brut.
+
+    Le `turn_id` est ajouté aux messages JSON pour permettre la corrélation côté client.
+    """
+    name = PROTOCOL_JSON
+
+    def encode(self, kind: str, payload: Union[bytes, dict, str], turn_id: Optional[int]) -> Union[bytes, str]:
+        if isinstance(payload, bytes):
+            return payload
+        if isinstance(payload, dict):
+            if turn_id is not None:
+                payload = {**payload, "turn_id": turn_id}
+            return json.dumps(payload)
+        return payload
+
+
+class BinaryCodec:
+    """
+    Protocole tramé : chaque message sortant est une trame binaire portant le tour et un numéro
+    de séquence propre à ce tour, les réponses LLM ne sont transmises que sous forme de deltas.
+    """
+    name = PROTOCOL_BINARY
+
+    def __init__(self):
+        self._seq: Dict[int, int] = {}
+
+    def _next_seq(self, turn_id: int) -> int:
+        seq = self._seq.get(turn_id, 0)
+        self._seq[turn_id] = seq + 1
+        if len(self._seq) > 32:
+            # on ne garde que les tours récents
+            del self._seq[min(self._seq)]
+        return seq
+
+    def encode(self, kind: str, payload: Union[bytes, dict, str], turn_id: Optional[int]) -> bytes:
+        turn = turn_id or 0
+        if isinstance(payload, bytes):
+            return encode_frame(FRAME_AUDIO, turn, self._next_seq(turn), payload)
+        if isinstance(payload, dict):
+            if kind == LLM_CHUNK:
+                return encode_frame(FRAME_TEXT_DELTA, turn, self._next_seq(turn),
+                                    payload.get("chunk", "").encode("utf-8"))
+            if kind == PARTIAL:
+                return encode_frame(FRAME_PARTIAL_TRANSCRIPT, turn, self._next_seq(turn),
+                                    payload.get("transcription", "").encode("utf-8"))
+            payload = json.dumps(payload)
+        return encode_frame(FRAME_CONTROL, turn, self._next_seq(turn), payload.encode("utf-8"))
+
+
+def make_codec(protocol: Optional[str]):
+    """
+    Instancie le codec négocié à l'authentification.
+
+    Args:
+        protocol (Optional[str]): La valeur du champ `protocol` envoyée par le client.
+
+    Returns:
+        JsonCodec | BinaryCodec: Le codec à utiliser (JSON par défaut).
+    """
+    if protocol == PROTOCOL_BINARY:
+        return BinaryCodec()
+    return JsonCodec()
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+wb_pending = registry.gauge("write_behind_pending", "Documents en attente d'écriture, par collection.")
+wb_written = registry.counter("write_behind_written_total", "Documents écrits par lots, par collection.")
+wb_dropped = registry.counter("write_behind_dropped_total", "Documents abandonnés car le tampon était plein.")
+wb_failed = registry.counter("write_behind_failed_total", "Documents abandonnés car rejetés par la base ou après épuisement des tentatives.")
+wb_retried = registry.counter("write_behind_retried_total", "Lots remis en file après un échec d'écriture, par collection.")
+wb_flush_seconds = registry.histogram("write_behind_flush_seconds", "Durée d'un insert_many du tampon d'écriture.")
+
+# délai maximal (s) entre deux tentatives d'écriture d'un lot
+MAX_RETRY_BACKOFF = 30.0
+
+
+class WriteBehindBuffer:
+    """
+    Tampon d'écriture différée d'une collection MongoDB.
+
+    `add` n'attend jamais la base : le document reçoit son `_id` immédiatement et est écrit plus
+    tard, par lots (`insert_many`), dès que `max_batch` documents sont en attente ou au plus tard
+    toutes les `flush_interval` secondes. Le tampon est vidé à l'arrêt de l'application.
+
+    Si la base est injoignable, le lot est remis en tête du tampon et réessayé avec un délai
+    croissant (`retry_backoff`, doublé à chaque échec) ; il n'est abandonné qu'après `max_retries`
+    nouvelles tentatives, ou si le tampon dépasse `max_pending`. Une courte coupure ne fait donc
+    rien perdre.
+
+    Contrepartie : un document n'est visible en lecture qu'après le vidage suivant.
+    """
+
+    def __init__(self, collection: Collection, max_batch: int = 100, flush_interval: float = 1.0,
+                 max_pending: int = 10000, max_retries: int = 8, retry_backoff: float = 1.0):
+        self.collection = collection
+        self.name = collection.name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # échecs consécutifs du lot en tête du tampon, et instant (monotone) de la prochaine tentative
+        self._attempts = 0
+        self._retry_at = 0.0
+
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, doc: Dict) -> ObjectId:
+        """
+        Ajoute un document au tampon, sans E/S.
+
+        Args:
+            doc (Dict): Le document à insérer (il est copié).
+
+        Returns:
+            ObjectId: L'identifiant attribué au document.
+        """
+        doc = dict(doc)
+        doc.setdefault("_id", ObjectId())
+        if self._task is None:
+            self._start_if_in_loop()
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                wb_dropped.inc(collection=self.name)
+                logger.error(f"Write-behind buffer for '{self.name}' is full, document dropped")
+                return doc["_id"]
+            self._pending.append(doc)
+            size = len(self._pending)
+        wb_pending.set(size, collection=self.name)
+        if size >= self.max_batch and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return doc["_id"]
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _start_if_in_loop(self):
+        # tampon créé après le démarrage de l'application : on démarre son vidage au premier ajout
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.start()
+
+    def start(self):
+        """Démarre la tâche de vidage périodique (depuis l'event loop)."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche de vidage puis écrit les documents restants."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(final=True)
+
+    async def flush(self, final: bool = False):
+        """
+        Écrit tous les documents en attente.
+
+        Args:
+            final (bool): Dernier vidage (arrêt de l'application) : le délai entre tentatives est
+                ignoré et un lot en échec est abandonné.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while True:
+                if not final and time.monotonic() < self._retry_at:
+                    return
+                with self._lock:
+                    batch = self._pending[:self.max_batch]
+                    del self._pending[:self.max_batch]
+                    remaining = len(self._pending)
+                wb_pending.set(remaining, collection=self.name)
+                if not batch:
+                    return
+                if await run_in_threadpool(self._insert, batch, self._attempts > 0):
+                    self._attempts = 0
+                    continue
+                self._attempts += 1
+                if final or self._attempts > self.max_retries:
+                    self._attempts = 0
+                    wb_failed.inc(len(batch), collection=self.name)
+                    logger.error(f"Write-behind flush for '{self.name}' gave up, {len(batch)} document(s) lost")
+                else:
+                    self._requeue(batch)
+                if final:
+                    continue
+                self._retry_at = time.monotonic() + min(self.retry_backoff * 2 ** max(self._attempts - 1, 0),
+                                                        MAX_RETRY_BACKOFF)
+                return
+
+    def _requeue(self, batch: List[Dict]):
+        # en tête du tampon, pour conserver l'ordre d'écriture ; au-delà de `max_pending`, les plus
+        # récents sont abandonnés comme dans `add`
+        with self._lock:
+            self._pending[:0] = batch
+            excess = len(self._pending) - self.max_pending
+            if excess > 0:
+                del self._pending[-excess:]
+            size = len(self._pending)
+        wb_retried.inc(collection=self.name)
+        wb_pending.set(size, collection=self.name)
+        if excess > 0:
+            wb_dropped.inc(excess, collection=self.name)
+            logger.error(f"Write-behind buffer for '{self.name}' is full, {excess} document(s) dropped")
+
+    def _insert(self, batch: List[Dict], retry: bool = False) -> bool:
+        """
+        Écrit un lot (bloquant).
+
+        Args:
+            batch (List[Dict]): Les documents.
+            retry (bool): Nouvelle tentative après un échec : une partie du lot a pu être écrite.
+
+        Returns:
+            bool: False si l'écriture est à retenter (base injoignable), True sinon.
+        """
+        started = time.perf_counter()
+        try:
+            # ordered=False : un document en erreur n'empêche pas l'écriture des autres
+            self.collection.insert_many(batch, ordered=False)
+            wb_written.inc(len(batch), collection=self.name)
+        except BulkWriteError as e:
+            # sur une nouvelle tentative, un `_id` en double est un document écrit par la précédente
+            failed = sum(1 for error in e.details.get("writeErrors", [])
+                         if not (retry and error.get("code") == 11000))
+            wb_written.inc(len(batch) - failed, collection=self.name)
+            if failed:
+                wb_failed.inc(failed, collection=self.name)
+                logger.error(f"Write-behind flush for '{self.name}': {failed} document(s) rejected")
+        except PyMongoError as e:
+            logger.warning(f"Write-behind flush for '{self.name}' failed, {len(batch)} document(s) "
+                           f"requeued (attempt {self._attempts + 1}): {str(e)}")
+            return False
+        finally:
+            wb_flush_seconds.observe(time.perf_counter() - started, collection=self.name)
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush for '{self.name}' crashed: {str(e)}")
+
+
+_buffers: Dict[str, WriteBehindBuffer] = {}
+
+
+def get_write_behind(collection: Collection) -> WriteBehindBuffer:
+    """
+    Retourne le tampon d'écriture différée d'une collection (un seul par collection et par processus).
+
+    Args:
+        collection (Collection): La collection cible.
+
+    Returns:
+        WriteBehindBuffer: Le tampon partagé.
+    """
+    buffer = _buffers.get(collection.name)
+    if buffer is None:
+        buffer = WriteBehindBuffer(
+            collection,
+            max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+            flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+            max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+            max_retries=settings.WRITE_BEHIND_MAX_RETRIES,
+            retry_backoff=settings.WRITE_BEHIND_RETRY_BACKOFF,
+        )
+        _buffers[collection.name] = buffer
+    return buffer
+
+
+def start_all():
+    """Démarre le vidage périodique de tous les tampons (au démarrage de l'application)."""
+    for buffer in list(_buffers.values()):
+        buffer.start()
+
+
+async def stop_all():
+    """Vide tous les tampons (à l'arrêt de l'application)."""
+    for buffer in list(_buffers.values()):
+        await buffer.stop()
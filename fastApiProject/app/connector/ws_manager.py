@@ -1,39 +1,109 @@
 # app/api/utils/ws_manager.py
-from typing import Dict, List
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
 from fastapi import WebSocket
 
+from app.connector.pubsub import get_pubsub
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ws_subscribers = registry.gauge("ws_subscribers", "WebSockets de session connectées à ce worker.")
+ws_broadcast_seconds = registry.histogram(
+    "ws_broadcast_seconds", "Durée d'une diffusion vers les WebSockets locales d'une session.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+ws_evicted = registry.counter("ws_evicted_total", "WebSockets de session évincées après un échec d'envoi.")
+
 class ConnectionManager:
-    def __init__(self):
-        # session_id -> list of websockets
+    def __init__(self, pubsub=None, send_timeout: Optional[float] = None):
+        # session_id -> list of websockets (connexions portées par ce worker uniquement)
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # canal partagé avec les autres workers ; résolu au premier usage
+        self._pubsub = pubsub
+        self.origin = uuid.uuid4().hex
+        self._subscribed = False
+        # délai maximal accordé à chaque socket : un client lent ne retarde plus les autres
+        self.send_timeout = send_timeout if send_timeout is not None else settings.WS_BROADCAST_TIMEOUT
+
+    @property
+    def pubsub(self):
+        if self._pubsub is None:
+            self._pubsub = get_pubsub()
+        return self._pubsub
+
+    def _ensure_subscribed(self):
+        if not self._subscribed:
+            self.pubsub.subscribe(self.origin, self._deliver_local)
+            self._subscribed = True
+
+    def subscriber_count(self, session_id: str) -> int:
+        """Nombre de websockets de la session portés par ce worker."""
+        return len(self.active_connections.get(session_id, []))
 
     async def connect(self, session_id: str, websocket: WebSocket):
         await websocket.accept()
+        self._ensure_subscribed()
         conns = self.active_connections.setdefault(session_id, [])
         conns.append(websocket)
+        ws_subscribers.inc()
 
     def disconnect(self, session_id: str, websocket: WebSocket):
         conns = self.active_connections.get(session_id, [])
         if websocket in conns:
             conns.remove(websocket)
+            ws_subscribers.dec()
+        if not conns:
+            self.active_connections.pop(session_id, None)
+
+    async def _send_one(self, session_id: str, websocket: WebSocket,
+                        send: Callable[[WebSocket], Awaitable[None]]):
+        try:
+            await asyncio.wait_for(send(websocket), self.send_timeout)
+        except Exception as e:
+            # socket mort ou trop lent : on l'évince pour ne plus pénaliser les diffusions suivantes
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            logger.info(f"Evicting websocket from session {session_id} ({reason}): {str(e)}")
+            ws_evicted.inc(reason=reason)
+            self.disconnect(session_id, websocket)
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
+    async def _fan_out(self, session_id: str, send: Callable[[WebSocket], Awaitable[None]], kind: str):
+        """Envoie en parallèle à chaque websocket local de la session, avec un délai par socket."""
+        conns = list(self.active_connections.get(session_id, []))
+        if not conns:
+            return
+        started = time.perf_counter()
+        await asyncio.gather(*(self._send_one(session_id, ws, send) for ws in conns))
+        ws_broadcast_seconds.observe(time.perf_counter() - started, kind=kind)
+
+    async def _deliver_local(self, session_id: str, message: dict):
+        """Envoie le message JSON aux websockets de la session portés par ce worker."""
+        # sérialisé une seule fois pour tous les destinataires (même format que WebSocket.send_json)
+        text = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        await self._fan_out(session_id, lambda ws: ws.send_text(text), "json")
 
     async def broadcast(self, session_id: str, message: dict):
-        """Envoie le message JSON à tous les websockets de la session."""
-        conns = self.active_connections.get(session_id, [])
-        for ws in conns:
-            await ws.send_json(message)
-            
+        """Envoie le message JSON à tous les websockets de la session, quel que soit leur worker."""
+        self._ensure_subscribed()
+        await self._deliver_local(session_id, message)
+        await self.pubsub.publish(session_id, message, self.origin)
+
     async def send_text(self, session_id: str, text: str):
-        """Envoie un message texte à tous les websockets de la session."""
-        conns = self.active_connections.get(session_id, [])
-        for ws in conns:
-            await ws.send_text(text)
-            
+        """Envoie un message texte aux websockets de la session portés par ce worker."""
+        await self._fan_out(session_id, lambda ws: ws.send_text(text), "text")
+
     async def send_audio(self, session_id: str, audio_chunk: bytes):
-        """Envoie un chunk audio à tous les websockets de la session."""
-        conns = self.active_connections.get(session_id, [])
-        for ws in conns:
-            await ws.send_bytes(audio_chunk)
+        """Envoie un chunk audio aux websockets de la session portés par ce worker."""
+        await self._fan_out(session_id, lambda ws: ws.send_bytes(audio_chunk), "audio")
 
 # Singleton
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
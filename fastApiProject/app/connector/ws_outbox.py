@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Union
+
+from fastapi import WebSocket
+
+from app.connector.voice_protocol import JsonCodec, AUDIO, CONTROL, STATUS, PARTIAL, LLM_CHUNK
+from app.core.metrics import registry
+from app.core.tracing import TurnTrace, current_turn
+
+
+logger = logging.getLogger(__name__)
+
+ws_queue_depth = registry.gauge("voice_ws_queue_depth", "Messages en attente d'envoi, toutes connexions voix confondues.")
+ws_send_seconds = registry.histogram(
+    "voice_ws_send_seconds", "Durée d'un envoi WebSocket vers le client voix.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+ws_dropped = registry.counter("voice_ws_dropped_messages_total", "Messages voix abandonnés car périmés.")
+ws_coalesced = registry.counter("voice_ws_coalesced_messages_total", "Messages voix fusionnés avec un message en attente.")
+
+
+@dataclass
+class OutboundMessage:
+    kind: str
+    payload: Union[bytes, dict, str]
+    enqueued_at: float
+    turn_id: Optional[int] = None
+    trace: Optional[TurnTrace] = None
+
+
+class WebSocketOutbox:
+    """
+    File d'envoi bornée d'une connexion WebSocket, vidée par une unique tâche d'écriture.
+
+    Les producteurs (transcription, LLM, TTS) ne font que déposer des messages : un client lent
+    ne bloque plus que lui-même. Quand la file est pleine, l'audio et les messages de contrôle
+    attendent de la place (contre-pression), les états intermédiaires sont fusionnés et les
+    transcriptions partielles périmées sont abandonnées. Les accusés de réception des chunks
+    audio sont regroupés et envoyés périodiquement.
+
+    L'encodage effectif (JSON historique ou trames binaires) est délégué au codec négocié.
+    """
+
+    def __init__(self, websocket: WebSocket, client_id: str, max_size: int = 64,
+                 ack_interval: float = 0.5, ack_every: int = 20, codec=None):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.codec = codec or JsonCodec()
+        self.max_size = max_size
+        self.ack_interval = ack_interval
+        self.ack_every = ack_every
+
+        self._items: Deque[OutboundMessage] = deque()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._pending_ack_count = 0
+        self._pending_ack_bytes = 0
+        self._last_ack_at = time.monotonic()
+        self.max_depth = 0
+
+    # ----- Cycle de vie -----
+    def start(self):
+        """Démarre la tâche d'écriture."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    def close(self):
+        """Arrête la tâche d'écriture et libère les producteurs en attente."""
+        self._closed = True
+        ws_queue_depth.dec(len(self._items))
+        self._items.clear()
+        self._wakeup.set()
+        self._space.set()
+        self._drained.set()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    # ----- Production -----
+    async def send_bytes(self, data: bytes, turn_id: Optional[int] = None):
+        """Dépose un chunk audio, en attendant de la place si la file est pleine."""
+        # la trace du tour permet de noter l'instant où le premier audio part réellement
+        await self._put(OutboundMessage(AUDIO, data, time.monotonic(), turn_id, current_turn()), wait=True)
+
+    async def send_json(self, message: dict, kind: str = CONTROL, turn_id: Optional[int] = None):
+        """
+        Dépose un message JSON.
+
+        Args:
+            message (dict): Le message à envoyer.
+            kind (str): Le type du message, qui détermine la règle de fusion ou d'abandon.
+            turn_id (Optional[int]): Le tour de parole auquel le message se rapporte.
+        """
+        if self._closed:
+            return
+        if kind in (STATUS, PARTIAL, LLM_CHUNK) and self._coalesce(kind, message, turn_id):
+            ws_coalesced.inc(kind=kind)
+            return
+        if kind == PARTIAL and len(self._items) >= self.max_size // 2:
+            # le client est en retard : une transcription partielle n'a plus de valeur
+            ws_dropped.inc(kind=kind)
+            return
+        await self._put(OutboundMessage(kind, message, time.monotonic(), turn_id), wait=True)
+
+    async def send_text(self, text: str):
+        """Dépose un message texte brut (toujours considéré comme un message de contrôle)."""
+        await self._put(OutboundMessage(CONTROL, text, time.monotonic()), wait=True)
+
+    async def drain(self, timeout: float = 5.0):
+        """
+        Attend que tous les messages en file aient été envoyés.
+
+        Args:
+            timeout (float): Le délai maximal d'attente (s).
+        """
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def ack(self, size: int):
+        """
+        Comptabilise un chunk audio reçu ; l'accusé de réception groupé est envoyé par la tâche
+        d'écriture tous les `ack_every` chunks ou toutes les `ack_interval` secondes.
+        """
+        self._pending_ack_count += 1
+        self._pending_ack_bytes += size
+        if self._pending_ack_count == 1:
+            self._last_ack_at = time.monotonic()
+        if self._pending_ack_count == 1 or self._pending_ack_count >= self.ack_every:
+            # réveille l'écrivain pour qu'il arme son minuteur ou envoie le lot
+            self._wakeup.set()
+
+    def _coalesce(self, kind: str, message: dict, turn_id: Optional[int]) -> bool:
+        """
+        Fusionne le message avec un message du même type encore en attente.
+
+        Returns:
+            bool: True si le message a été absorbé par un message en file.
+        """
+        # on ne fusionne qu'avec le dernier message en file pour préserver l'ordre
+        if not self._items or self._items[-1].kind != kind or self._items[-1].turn_id != turn_id:
+            return False
+        pending = self._items[-1]
+        if kind == LLM_CHUNK:
+            merged = dict(message)
+            merged["chunk"] = pending.payload.get("chunk", "") + message.get("chunk", "")
+            pending.payload = merged
+        else:
+            pending.payload = message
+        return True
+
+    async def _put(self, item: OutboundMessage, wait: bool):
+        while not self._closed and len(self._items) >= self.max_size:
+            if not wait:
+                ws_dropped.inc(kind=item.kind)
+                return
+            self._space.clear()
+            await self._space.wait()
+        if self._closed:
+            return
+        self._items.append(item)
+        self._drained.clear()
+        ws_queue_depth.inc()
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._wakeup.set()
+
+    # ----- Écriture -----
+    def _take_ack(self) -> Optional[dict]:
+        if not self._pending_ack_count:
+            return None
+        due = (self._pending_ack_count >= self.ack_every
+               or time.monotonic() - self._last_ack_at >= self.ack_interval)
+        if not due:
+            return None
+        ack = {"status": "chunk_received", "count": self._pending_ack_count, "size": self._pending_ack_bytes}
+        self._pending_ack_count = 0
+        self._pending_ack_bytes = 0
+        self._last_ack_at = time.monotonic()
+        return ack
+
+    async def _send(self, item: OutboundMessage):
+        started = time.perf_counter()
+        data = self.codec.encode(item.kind, item.payload, item.turn_id)
+        if isinstance(data, bytes):
+            await self.websocket.send_bytes(data)
+        else:
+            await self.websocket.send_text(data)
+        ws_send_seconds.observe(time.perf_counter() - started)
+        if item.trace is not None and item.kind == AUDIO:
+            item.trace.mark("first_audio_sent")
+
+    async def _run(self):
+        try:
+            while not self._closed:
+                if not self._items:
+                    self._wakeup.clear()
+                    timeout = None
+                    if self._pending_ack_count:
+                        timeout = max(0.0, self.ack_interval - (time.monotonic() - self._last_ack_at))
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+
+                ack = self._take_ack()
+                if ack is not None:
+                    await self._send(OutboundMessage(CONTROL, ack, time.monotonic()))
+
+                if self._items:
+                    item = self._items.popleft()
+                    ws_queue_depth.dec()
+                    self._space.set()
+                    await self._send(item)
+                    if not self._items:
+                        self._drained.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # le client est parti ou le socket est cassé : plus rien à envoyer
+            logger.info(f"Outbox for client {self.client_id} stopped: {str(e)}")
+            self.close()
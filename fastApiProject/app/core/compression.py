@@ -0,0 +1,142 @@
+import gzip
+import importlib.util
+import logging
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+compressed_responses = registry.counter("http_responses_compressed_total", "Réponses compressées, par encodage.")
+compression_saved_bytes = registry.counter("http_compression_saved_bytes_total", "Octets économisés par la compression, par encodage.")
+
+# au-delà, la compression (quelques ms par Mo) est faite hors event loop
+INLINE_MAX_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def negotiate(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Choisit l'encodage de la réponse d'après l'en-tête `Accept-Encoding`.
+
+    L'encodage de plus forte valeur `q` l'emporte ; à valeur égale, l'ordre de `available`
+    (préférence du serveur) départage. `q=0` exclut un encodage, `*` désigne les autres.
+
+    Args:
+        accept_encoding (str): L'en-tête `Accept-Encoding` de la requête.
+        available (List[str]): Les encodages disponibles, par ordre de préférence.
+
+    Returns:
+        Optional[str]: L'encodage choisi, None pour une réponse non compressée.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compression négociée des réponses (`br` si le paquet `brotli` est installé,
+    sinon `gzip`).
+
+    Seules les réponses d'un seul bloc sont compressées, à partir de `minimum_size` octets et pour
+    les types textuels (JSON, texte, SVG). Les réponses en flux (audio, SSE) passent telles quelles :
+    la compression retarderait chaque fragment. Un ETag fort devient faible, le contenu encodé
+    n'étant plus identique octet par octet.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._brotli = None
+        if importlib.util.find_spec("brotli") is not None:
+            import brotli
+            self._brotli = brotli
+        else:
+            logger.info("Package 'brotli' not installed: responses are compressed with gzip only")
+        self.encodings = ["br", "gzip"] if self._brotli is not None else ["gzip"]
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return self._brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # retenu jusqu'au premier bloc : les en-têtes dépendent de la compression
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body", False) or not self._compressible(start["status"], headers, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            if len(body) > INLINE_MAX_BYTES:
+                compressed = await run_in_threadpool(self.compress, body, encoding)
+            else:
+                compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            compressed_responses.inc(encoding=encoding)
+            compression_saved_bytes.inc(len(body) - len(compressed), encoding=encoding)
+            passthrough = True
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        if len(body) < self.minimum_size:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
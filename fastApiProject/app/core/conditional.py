@@ -0,0 +1,75 @@
+import hashlib
+from typing import Dict, Optional
+
+from bson import json_util
+from fastapi import Request, Response
+from pymongo.collection import Collection
+
+from app.core.metrics import registry
+
+
+not_modified_total = registry.counter("http_not_modified_total", "Requêtes conditionnelles servies par un 304, par route.")
+
+
+def collection_version(collection: Collection, query: Dict) -> str:
+    """
+    Version du résultat d'une requête : nombre de documents, dernier `_id` et dernier `updated_at`.
+
+    Une insertion change le dernier `_id`, une suppression le nombre de documents, une mise à jour
+    le dernier `updated_at` (horodaté par les CRUD à chaque modification). Une seule agrégation,
+    sans lire ni transférer les documents eux-mêmes.
+
+    Args:
+        collection (Collection): La collection interrogée.
+        query (Dict): Le filtre de la liste.
+
+    Returns:
+        str: La version, à passer à `list_etag`.
+    """
+    summary = next(collection.aggregate([
+        {"$match": query},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "last_id": {"$max": "$_id"},
+                    "updated_at": {"$max": "$updated_at"}}},
+    ]), None) or {}
+    return json_util.dumps([collection.name, query, summary.get("count", 0), summary.get("last_id"),
+                            summary.get("updated_at")], sort_keys=True)
+
+
+def list_etag(version: str) -> str:
+    """
+    ETag faible d'une liste : faible, car la réponse peut être compressée (`CompressionMiddleware`)
+    sans que son contenu change.
+    """
+    return f'W/"{hashlib.sha1(version.encode()).hexdigest()}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """En-têtes de cache d'une liste : le navigateur la garde mais la revalide à chaque appel."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # comparaison faible (RFC 9110, 13.1.2) : le préfixe W/ est ignoré
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    Réponse 304 si le client possède déjà cette version de la liste (`If-None-Match`).
+
+    Args:
+        request (Request): La requête.
+        etag (str): L'ETag de la version courante.
+
+    Returns:
+        Optional[Response]: La réponse 304, ou None s'il faut renvoyer la liste.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None or not _matches(if_none_match, etag):
+        return None
+    route = request.scope.get("route")
+    not_modified_total.inc(route=getattr(route, "path", request.url.path))
+    return Response(status_code=304, headers=etag_headers(etag))
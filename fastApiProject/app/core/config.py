@@ -17,24 +17,111 @@ class Settings(BaseSettings):
     Attributs :
         SECRET_KEY (SecretStr) : La clé secrète pour le chiffrement.
         ALGORITHM (str) : L'algorithme de chiffrement JWT.
-        ACCESS_TOKEN_EXPIRE_MINUTES (int) : La durée de validité du token d'accès.
+        ACCESS_TOKEN_EXPIRE_MINUTES (int) : La durée de validité du token d'accès (une révocation par utilisateur est conservée aussi longtemps).
+        REFRESH_TOKEN_EXPIRE_DAYS (int) : La durée de validité du token de rafraîchissement.
+        TOKEN_REVOCATION_REFRESH_INTERVAL (float) : L'intervalle (s) de rechargement de la liste des tokens révoqués.
+        DOC_CATALOG_REFRESH_INTERVAL (float) : L'intervalle (s) de contrôle de la collection de documentation ; le catalogue en mémoire n'est reconstruit que si elle a changé.
         MONGO_DB_USERNAME (str) : Le nom d'utilisateur de la base de données MongoDB.
         MONGO_DB_PASSWORD (str) : Le mot de passe de la base de données MongoDB.
         MONGO_DB_NAME (str) : Le nom de la base de données MongoDB.
+        MONGO_HOSTS (str) : Les serveurs MongoDB (`hôte:port`, séparés par des virgules pour un replica set).
+        MONGO_REPLICA_SET (Optional[str]) : Le nom du replica set (connexion directe au serveur si vide).
+        MONGO_AUTH_SOURCE (Optional[str]) : La base d'authentification (`admin` par défaut côté pymongo).
+        MONGO_READ_PREFERENCE (str) : La préférence de lecture (`primary`, `primaryPreferred`, `secondary`, `secondaryPreferred`, `nearest`).
+        MONGO_MAX_POOL_SIZE (int) : Le nombre maximal de connexions MongoDB par worker (au-delà du nombre de threads du threadpool, elles restent inutilisées).
+        MONGO_MIN_POOL_SIZE (int) : Le nombre de connexions MongoDB gardées ouvertes en permanence par worker.
+        MONGO_MAX_IDLE_TIME_MS (Optional[int]) : La durée (ms) après laquelle une connexion inutilisée est fermée.
+        MONGO_MAX_CONNECTING (int) : Le nombre de connexions MongoDB établies en parallèle.
+        MONGO_WAIT_QUEUE_TIMEOUT_MS (int) : L'attente maximale (ms) d'une connexion libre quand le pool est plein.
+        MONGO_SERVER_SELECTION_TIMEOUT_MS (int) : L'attente maximale (ms) d'un serveur disponible : une base arrêtée fait échouer les requêtes au-delà.
+        MONGO_CONNECT_TIMEOUT_MS (int) : Le délai (ms) d'établissement d'une connexion MongoDB.
+        MONGO_SOCKET_TIMEOUT_MS (Optional[int]) : Le délai (ms) de réponse d'une opération MongoDB (sans limite si vide).
+        MONGO_COMPRESSORS (str) : La compression réseau, par ordre de préférence (`zstd`, `snappy`, `zlib`) ; un algorithme dont le paquet manque est ignoré.
+        MONGO_WRITE_CONCERN (str) : Le write concern par défaut (`0`, `1`, `majority`...).
+        MONGO_COLLECTION_WRITE_CONCERNS (str) : Les write concerns propres à certaines collections (`revoked_token_db=majority,transcript_db=1`).
         OPENAI_KEY (Optional[str]) : La clé d'API OpenAI (si nécessaire).
         OPENAI_ORG (Optional[str]) : L'organisation OpenAI (si nécessaire).
         REPLICATE_API_KEY (Optional[str]) : La clé d'API Replicate (si nécessaire).
         MAILGUN_API_KEY (Optional[str]) : La clé d'API Mailgun (si nécessaire).
+        TTS_CACHE_MAX_BYTES (int) : Le budget mémoire du cache des synthèses vocales.
+        TTS_CACHE_MAX_ENTRY_BYTES (int) : La taille maximale d'une synthèse mise en cache.
+        TTS_CACHE_DIR (Optional[str]) : Le répertoire du cache disque des synthèses (désactivé si vide).
+        TTS_CACHE_DISK_MAX_BYTES (int) : Le budget disque du cache des synthèses vocales.
+        VOICE_WS_QUEUE_SIZE (int) : La taille de la file d'envoi de chaque connexion WebSocket voix.
+        VOICE_WS_ACK_INTERVAL (float) : L'intervalle (s) entre deux accusés de réception audio groupés.
+        VOICE_WS_ACK_EVERY (int) : Le nombre de chunks audio reçus déclenchant un accusé de réception.
+        VOICE_STT_SAMPLE_RATE (int) : La fréquence (Hz) à laquelle l'audio est ramené avant transcription.
+        VOICE_TRANSCODE_MAX_PROCESSES (int) : Le nombre maximal de processus ffmpeg simultanés.
+        FFMPEG_PATH (Optional[str]) : Le chemin de ffmpeg (recherché dans le PATH si vide).
+        SESSION_STORE_BACKEND (str) : Le stockage des sessions vocales et de la diffusion WebSocket (`memory` ou `mongo`).
+        VOICE_SESSION_TTL (int) : La durée (s) de conservation d'une session vocale inactive.
+        VOICE_SESSION_MAX_HISTORY (int) : Le nombre maximal de messages conservés dans l'historique d'une session.
+        WS_PUBSUB_CAPPED_BYTES (int) : La taille de la collection plafonnée servant à la diffusion entre workers.
+        WS_BROADCAST_TIMEOUT (float) : Le délai (s) accordé à chaque WebSocket lors d'une diffusion avant éviction.
+        WRITE_BEHIND_MAX_BATCH (int) : Le nombre de documents en attente déclenchant une écriture groupée.
+        WRITE_BEHIND_FLUSH_INTERVAL (float) : L'intervalle maximal (s) entre deux écritures groupées.
+        WRITE_BEHIND_MAX_PENDING (int) : Le nombre maximal de documents en attente avant abandon.
+        WRITE_BEHIND_MAX_RETRIES (int) : Le nombre de nouvelles tentatives d'écriture d'un lot avant abandon.
+        WRITE_BEHIND_RETRY_BACKOFF (float) : Le délai (s) avant la première nouvelle tentative, doublé à chaque échec.
+        LOOP_MONITOR_ENABLED (bool) : Active la détection des blocages de l'event loop.
+        LOOP_MONITOR_INTERVAL (float) : L'intervalle (s) du battement servant à mesurer le retard de la boucle.
+        LOOP_MONITOR_THRESHOLD (float) : Le retard (s) à partir duquel la boucle est considérée bloquée.
+        LOOP_MONITOR_SAMPLE_STACKS (bool) : Capture la pile du code bloquant pendant le blocage.
+        LOOP_MONITOR_ASYNCIO_DEBUG (bool) : Active le mode debug d'asyncio et la journalisation des callbacks lents.
+        LOOP_MONITOR_MAX_REPORTS (int) : Le nombre de blocages et de callbacks lents conservés.
+        PASSWORD_BCRYPT_ROUNDS (int) : Le coût bcrypt des mots de passe (les hashs d'un autre coût sont refaits à la connexion).
+        PASSWORD_HASH_WORKERS (int) : Le nombre de hachages bcrypt exécutés en parallèle.
+        PASSWORD_HASH_PROCESSES (bool) : Exécute bcrypt dans un pool de processus plutôt que de threads.
+        HTTP_POOL_MAX_CONNECTIONS (int) : Le nombre maximal de connexions HTTP sortantes.
+        HTTP_POOL_MAX_KEEPALIVE (int) : Le nombre de connexions sortantes gardées ouvertes entre deux requêtes.
+        HTTP_POOL_MAX_PER_HOST (int) : Le nombre maximal de requêtes sortantes simultanées vers un même hôte.
+        HTTP_POOL_KEEPALIVE_EXPIRY (float) : La durée (s) de conservation d'une connexion sortante inutilisée.
+        HTTP_POOL_TIMEOUT (float) : Le délai (s) de lecture, d'écriture et d'attente d'une connexion du pool.
+        HTTP_POOL_CONNECT_TIMEOUT (float) : Le délai (s) d'établissement d'une connexion sortante.
+        HTTP_POOL_HTTP2 (bool) : Utilise HTTP/2 pour les requêtes sortantes (si le paquet `h2` est installé).
+        PROVIDERS_WARM_UP (str) : Les fournisseurs (`openai,gemini,mistral,replicate`) dont le client est construit en arrière-plan au démarrage plutôt qu'au premier usage.
+        SHUTDOWN_DRAIN_TIMEOUT (float) : Le délai maximal (s) accordé à l'arrêt aux flux en cours (réponses audio, tours de parole) avant fermeture des ressources.
+        ANALYTICS_CACHE_SECONDS (int) : L'intervalle (s) auquel sont arrondies les bornes des rapports d'usage ; un rapport est recalculé au plus une fois par intervalle.
+        ANALYTICS_CACHE_MAX_ENTRIES (int) : Le nombre maximal de rapports d'usage conservés en cache par worker.
+        USAGE_COUNTERS_FLUSH_INTERVAL (float) : L'intervalle (s) d'écriture groupée des compteurs d'usage.
+        USAGE_ROLLUP_INTERVAL (float) : L'intervalle (s) de compactage des compteurs d'usage horaires en compteurs journaliers.
+        USAGE_HOURLY_RETENTION_DAYS (int) : Le nombre de jours pendant lesquels les compteurs d'usage restent au détail horaire.
+        RATE_LIMIT_ENABLED (bool) : Active les quotas par utilisateur et par session de formation (`app/core/rate_limits.json`).
+        RATE_LIMIT_BACKEND (str) : Le stockage des compteurs de quotas (`memory`, propre à chaque worker, ou `mongo`, partagé).
+        COMPRESSION_MIN_SIZE (int) : La taille (octets) à partir de laquelle les réponses sont compressées (`br` si le paquet `brotli` est installé, sinon `gzip`).
+        COMPRESSION_GZIP_LEVEL (int) : Le niveau de compression gzip (1 à 9).
+        COMPRESSION_BROTLI_QUALITY (int) : La qualité de compression brotli (0 à 11).
+        LIVE_UPDATES_SOURCE (str) : Le suivi des changements diffusés en direct (`change_stream`, nécessite un replica set ; `polling` ; `auto`, le change stream si possible).
+        LIVE_UPDATES_POLL_INTERVAL (float) : L'intervalle (s) du suivi des changements par polling.
+        LIVE_UPDATES_QUEUE_SIZE (int) : Le nombre de messages en attente par abonné, au-delà duquel l'abonné doit relire ses listes.
 
     """
 
     SECRET_KEY: SecretStr = SecretStr(os.getenv("SECRET_KEY", "change_this_in_production"))
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_REVOCATION_REFRESH_INTERVAL: float = 30.0
+    DOC_CATALOG_REFRESH_INTERVAL: float = 60.0
 
     MONGO_DB_USERNAME: str = os.getenv("MONGO_USERNAME")
     MONGO_DB_PASSWORD: str = os.getenv("MONGO_PASSWORD")
     MONGO_DB_NAME: str = os.getenv("MONGO_DB")
+    MONGO_HOSTS: str = "mongodb:27017"
+    MONGO_REPLICA_SET: Optional[str] = None
+    MONGO_AUTH_SOURCE: Optional[str] = None
+    MONGO_READ_PREFERENCE: str = "primary"
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = 300000
+    MONGO_MAX_CONNECTING: int = 2
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = 30000
+    MONGO_COMPRESSORS: str = "zstd,snappy,zlib"
+    MONGO_WRITE_CONCERN: str = "1"
+    MONGO_COLLECTION_WRITE_CONCERNS: str = ""
 
     OPENAI_KEY: Optional[str] = os.getenv("OPENAI_KEY")
     OPENAI_ORG: Optional[str] = os.getenv("OPENAI_ORG")
@@ -43,6 +130,70 @@ class Settings(BaseSettings):
 
     MAILGUN_API_KEY: Optional[str] = os.getenv("MAILGUN_API_KEY")
 
+    TTS_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    TTS_CACHE_MAX_ENTRY_BYTES: int = 512 * 1024
+    TTS_CACHE_DIR: Optional[str] = os.getenv("TTS_CACHE_DIR")
+    TTS_CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+
+    VOICE_WS_QUEUE_SIZE: int = 64
+    VOICE_WS_ACK_INTERVAL: float = 0.5
+    VOICE_WS_ACK_EVERY: int = 20
+    VOICE_STT_SAMPLE_RATE: int = 16000
+    VOICE_TRANSCODE_MAX_PROCESSES: int = 4
+    FFMPEG_PATH: Optional[str] = os.getenv("FFMPEG_PATH")
+
+    SESSION_STORE_BACKEND: str = os.getenv("SESSION_STORE_BACKEND", "memory")
+    VOICE_SESSION_TTL: int = 24 * 3600
+    VOICE_SESSION_MAX_HISTORY: int = 50
+    WS_PUBSUB_CAPPED_BYTES: int = 16 * 1024 * 1024
+    WS_BROADCAST_TIMEOUT: float = 2.0
+
+    WRITE_BEHIND_MAX_BATCH: int = 100
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 1.0
+    WRITE_BEHIND_MAX_PENDING: int = 10000
+    WRITE_BEHIND_MAX_RETRIES: int = 8
+    WRITE_BEHIND_RETRY_BACKOFF: float = 1.0
+
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL: float = 0.05
+    LOOP_MONITOR_THRESHOLD: float = 0.1
+    LOOP_MONITOR_SAMPLE_STACKS: bool = False
+    LOOP_MONITOR_ASYNCIO_DEBUG: bool = False
+    LOOP_MONITOR_MAX_REPORTS: int = 100
+
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_PROCESSES: bool = False
+
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE: int = 20
+    HTTP_POOL_MAX_PER_HOST: int = 20
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_POOL_TIMEOUT: float = 30.0
+    HTTP_POOL_CONNECT_TIMEOUT: float = 5.0
+    HTTP_POOL_HTTP2: bool = True
+
+    PROVIDERS_WARM_UP: str = ""
+    SHUTDOWN_DRAIN_TIMEOUT: float = 10.0
+
+    ANALYTICS_CACHE_SECONDS: int = 300
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 256
+
+    USAGE_COUNTERS_FLUSH_INTERVAL: float = 1.0
+    USAGE_ROLLUP_INTERVAL: float = 3600.0
+    USAGE_HOURLY_RETENTION_DAYS: int = 2
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    LIVE_UPDATES_SOURCE: str = os.getenv("LIVE_UPDATES_SOURCE", "auto")
+    LIVE_UPDATES_POLL_INTERVAL: float = 2.0
+    LIVE_UPDATES_QUEUE_SIZE: int = 100
+
     class Config:
         extra = "allow"
         env_file = ".env"
@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.auth.revocation import revocation_list
+from app.connector import write_behind
+from app.connector.doc_catalog import doc_catalog
+from app.connector.connectorBDD import MongoAccess
+from app.connector.http_pool import http_pool
+from app.connector.live_updates import live_updates
+from app.connector.usage_counters import usage_counters
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import registry
+from app.core.password_hasher import password_hasher
+from app.core.providers import ProviderRegistry, providers as default_providers
+
+
+logger = logging.getLogger(__name__)
+
+inflight_streams = registry.gauge(
+    "inflight_streams", "Flux (réponses en streaming, tours de parole en arrière-plan) en cours sur ce worker."
+)
+
+Closer = Callable[[Any], Awaitable[None]]
+
+
+class Container:
+    """
+    Ressources de l'application (CRUD, clients, gestionnaires de connexions), construites une seule
+    fois et libérées dans l'ordre à l'arrêt.
+
+    Le lifespan attache le conteneur à `app.state.container`, le démarre (`start`) puis l'arrête
+    (`shutdown`) ; les routes reçoivent les ressources par injection (`app/api/dependencies.py`).
+    Chaque ressource est construite au premier usage, jamais à l'import ; `override` la remplace
+    (tests, benchmarks), de même que `providers.override` pour les clients des fournisseurs.
+
+    À l'arrêt, les flux en cours (`track`, `spawn`) sont attendus au plus `drain_timeout` secondes,
+    puis les ressources sont fermées dans l'ordre inverse de leur construction, et enfin les
+    services partagés (tampons d'écriture, compteurs d'usage, pool HTTP, pool bcrypt).
+    """
+
+    def __init__(self, providers: Optional[ProviderRegistry] = None, drain_timeout: float = 10.0):
+        self.providers = providers if providers is not None else default_providers
+        self.drain_timeout = drain_timeout
+        self._factories: Dict[str, Tuple[Callable[[], Any], Optional[Closer]]] = {}
+        self._instances: Dict[str, Any] = {}
+        # ordre de construction, pour fermer dans l'ordre inverse
+        self._built: List[str] = []
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+        self._streams = 0
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    # ----- Ressources -----
+    def register(self, name: str, factory: Callable[[], Any], close: Optional[Closer] = None):
+        """
+        Déclare une ressource.
+
+        Args:
+            name (str): Le nom de la ressource.
+            factory (Callable[[], Any]): La fonction qui la construit.
+            close (Optional[Closer]): La coroutine qui la libère à l'arrêt.
+        """
+        self._factories[name] = (factory, close)
+
+    def get(self, name: str) -> Any:
+        """
+        Retourne une ressource, construite au premier appel.
+
+        Args:
+            name (str): Le nom de la ressource.
+
+        Returns:
+            Any: La ressource, partagée par toute l'application.
+
+        Raises:
+            KeyError: Si la ressource n'est pas déclarée.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        factory, _ = self._factories[name]
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._instances[name] = factory()
+                self._built.append(name)
+        return instance
+
+    def override(self, name: str, instance: Any):
+        """Remplace une ressource (sa fonction de fermeture n'est pas appelée pour le remplaçant)."""
+        with self._lock:
+            self._instances[name] = instance
+            if name in self._built:
+                self._built.remove(name)
+
+    # ----- Flux en cours -----
+    def spawn(self, coro: Awaitable) -> asyncio.Task:
+        """
+        Lance une tâche d'arrière-plan attendue à l'arrêt (tour de parole, envoi différé...).
+
+        Le conteneur garde une référence sur la tâche : elle ne peut pas être collectée en cours
+        d'exécution.
+
+        Args:
+            coro (Awaitable): La coroutine à exécuter.
+
+        Returns:
+            asyncio.Task: La tâche.
+        """
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        inflight_streams.inc()
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        inflight_streams.dec()
+
+    async def track(self, stream: AsyncIterator) -> AsyncIterator:
+        """
+        Enveloppe le corps d'une réponse en streaming : l'arrêt attend la fin de sa diffusion.
+
+        Args:
+            stream (AsyncIterator): Le générateur du corps de la réponse.
+
+        Yields:
+            Les éléments du flux, inchangés.
+        """
+        self._streams += 1
+        inflight_streams.inc()
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self._streams -= 1
+            inflight_streams.dec()
+
+    @property
+    def inflight(self) -> int:
+        return self._streams + len(self._tasks)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Attend la fin des flux en cours ; les tâches encore actives au-delà du délai sont annulées.
+
+        Args:
+            timeout (float): Le délai maximal d'attente (s).
+
+        Returns:
+            bool: True si tous les flux se sont terminés à temps.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+        while self._streams and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        if self.inflight:
+            logger.warning(f"Shutdown: {self.inflight} in-flight stream(s) still running after {timeout}s")
+            for task in list(self._tasks):
+                task.cancel()
+            return False
+        return True
+
+    # ----- Cycle de vie -----
+    async def start(self):
+        """Démarre l'application : base de données, services d'arrière-plan, préchauffage."""
+        # base de données : connexion vérifiée et collections créées au démarrage, pas à l'import
+        await run_in_threadpool(MongoAccess().initialize_db)
+        # clients des fournisseurs : construits au premier usage, ou ici en arrière-plan si demandé
+        warm_up = [name.strip() for name in settings.PROVIDERS_WARM_UP.split(",") if name.strip()]
+        if warm_up:
+            self._warm_up_task = asyncio.create_task(run_in_threadpool(self.providers.warm_up, warm_up))
+        # client HTTP sortant partagé (keep-alive)
+        http_pool.start()
+        # écritures différées (transcriptions, messages) : vidage périodique
+        write_behind.start_all()
+        # liste des jetons révoqués : rechargement périodique de l'ensemble en mémoire
+        revocation_list.start()
+        # catalogue de la documentation : chargé en mémoire, reconstruit si la collection change
+        doc_catalog.start()
+        # compteurs d'usage : écriture groupée des incréments et compactage horaire → journalier
+        usage_counters.start()
+        # détection des blocages de l'event loop (opt-in)
+        if settings.LOOP_MONITOR_ENABLED:
+            loop_monitor.start()
+
+    async def close(self):
+        """
+        Ferme les ressources construites, dans l'ordre inverse de leur construction ; elles seront
+        reconstruites au prochain usage. Les remplaçants (`override`) sont conservés.
+        """
+        for name in reversed(self._built):
+            instance = self._instances.pop(name)
+            _, close = self._factories[name]
+            if close is not None:
+                try:
+                    await close(instance)
+                except Exception as e:
+                    logger.warning(f"Shutdown: closing '{name}' failed: {e}")
+        self._built.clear()
+
+    async def shutdown(self):
+        """Arrête l'application : flux en cours, ressources, puis services partagés."""
+        if self._warm_up_task is not None:
+            await self._warm_up_task
+            self._warm_up_task = None
+        # les tours de parole et réponses audio en cours se terminent (ils écrivent encore en base)
+        # connexions des mises à jour en direct : fermées avant l'attente des flux
+        await live_updates.stop()
+        await self.drain(self.drain_timeout)
+        await self.close()
+
+        await loop_monitor.stop()
+        await revocation_list.stop()
+        await doc_catalog.stop()
+        # les tampons sont vidés après les flux, qui les alimentent jusqu'au bout
+        await usage_counters.stop()
+        await write_behind.stop_all()
+        await http_pool.close()
+        await run_in_threadpool(password_hasher.shutdown)
+
+
+def _voice_agent():
+    from app.connector.openai_voice_client import OpenAIVoiceClient
+    return OpenAIVoiceClient()
+
+
+def _voice_connections():
+    from app.connector.voice_connections import VoiceConnectionManager
+    return VoiceConnectionManager()
+
+
+async def _close_voice_connections(connections):
+    await connections.close_all()
+
+
+def _voice_session_store():
+    from app.connector.session_store import get_session_store
+    return get_session_store()
+
+
+def _transcript_crud():
+    from app.crud.transcript_crud import TranscriptCRUD
+    return TranscriptCRUD()
+
+
+def _image_crud():
+    from app.crud.image_crud import ImageCRUD
+    return ImageCRUD()
+
+
+def _video_crud():
+    from app.crud.video_crud import VideoCRUD
+    return VideoCRUD()
+
+
+def _eleven_crud():
+    from app.crud.eleven_crud import ElevenCRUD
+    return ElevenCRUD()
+
+
+def _analytics_crud():
+    from app.crud.analytics_crud import AnalyticsCRUD
+    return AnalyticsCRUD(settings.ANALYTICS_CACHE_SECONDS, settings.ANALYTICS_CACHE_MAX_ENTRIES)
+
+
+def build_container(providers: Optional[ProviderRegistry] = None) -> Container:
+    """
+    Crée le conteneur de l'application, ressources déclarées mais non construites.
+
+    Args:
+        providers (Optional[ProviderRegistry]): Le registre des fournisseurs (celui du processus par défaut).
+
+    Returns:
+        Container: Le conteneur.
+    """
+    container = Container(providers=providers, drain_timeout=settings.SHUTDOWN_DRAIN_TIMEOUT)
+    container.register("voice_agent", _voice_agent)
+    container.register("voice_connections", _voice_connections, close=_close_voice_connections)
+    container.register("voice_session_store", _voice_session_store)
+    container.register("transcript_crud", _transcript_crud)
+    container.register("image_crud", _image_crud)
+    container.register("video_crud", _video_crud)
+    container.register("eleven_crud", _eleven_crud)
+    container.register("analytics_crud", _analytics_crud)
+    return container
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "Retard du réveil du battement de l'event loop.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+loop_stalls = registry.counter("event_loop_stalls_total", "Blocages de l'event loop au-delà du seuil, par route.")
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Conserve les avertissements « Executing ... took ... seconds » du mode debug d'asyncio."""
+
+    def __init__(self, monitor: "LoopMonitor"):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord):
+        if record.msg.startswith("Executing"):
+            self.monitor._add_report(self.monitor._slow_callbacks, {
+                "at": datetime.now(timezone.utc).isoformat(),
+                # la tâche d'une requête porte le nom de sa route (voir LoopMonitorMiddleware)
+                "message": record.getMessage(),
+            })
+
+
+class LoopMonitor:
+    """
+    Détecteur de blocages de l'event loop.
+
+    - un battement (tâche asyncio) mesure le retard de la boucle (`event_loop_lag_seconds`) ;
+    - un thread de surveillance repère le blocage pendant qu'il a lieu, l'attribue à la route
+      (ou à la tâche) en cours d'exécution et, si demandé, capture la pile du code bloquant ;
+    - en option, le mode debug d'asyncio journalise les callbacks lents, les tâches des requêtes
+      portant le nom de leur route.
+
+    Les derniers blocages et callbacks lents sont conservés pour l'endpoint d'administration.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, sample_stacks: bool = False,
+                 asyncio_debug: bool = False, max_reports: int = 100):
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_stacks = sample_stacks
+        self.asyncio_debug = asyncio_debug
+
+        self.max_lag = 0.0
+        self._stalls = deque(maxlen=max_reports)
+        self._slow_callbacks = deque(maxlen=max_reports)
+        self._lock = threading.Lock()
+        # requêtes en cours : tâche -> scope ASGI
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.Task, dict]" = weakref.WeakKeyDictionary()
+        self._current_stall: Optional[Dict] = None
+        self._last_beat = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._log_handler: Optional[_SlowCallbackHandler] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Démarre la surveillance de l'event loop courant."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        if self.asyncio_debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+            self._log_handler = _SlowCallbackHandler(self)
+            logging.getLogger("asyncio").addHandler(self._log_handler)
+
+    async def stop(self):
+        """Arrête la surveillance."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._log_handler is not None:
+            logging.getLogger("asyncio").removeHandler(self._log_handler)
+            self._log_handler = None
+            self._loop.set_debug(False)
+
+    def enter(self, task: asyncio.Task, scope: dict):
+        """Enregistre une requête en cours et donne son nom à sa tâche."""
+        self._inflight[task] = scope
+        task.set_name(f"{scope.get('method', 'WS')} {scope.get('path', '')}")
+
+    def leave(self, task: asyncio.Task):
+        self._inflight.pop(task, None)
+
+    def _route_of(self, task: Optional[asyncio.Task]) -> str:
+        if task is None:
+            return "callback"
+        scope = self._inflight.get(task)
+        if scope is None:
+            # tâche de fond : on la désigne par sa coroutine
+            coro = task.get_coro()
+            return getattr(coro, "__qualname__", task.get_name())
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        return f"{scope.get('method', 'WS')} {path}"
+
+    def _add_report(self, reports: deque, report: Dict):
+        with self._lock:
+            reports.append(report)
+
+    def _sample_stack(self) -> Optional[List[str]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return [line.rstrip() for line in traceback.format_stack(frame)[-15:]]
+
+    def _watch(self):
+        # repère le blocage pendant qu'il dure : c'est le seul moment où la pile montre le coupable
+        while not self._stopped.wait(self.threshold / 2):
+            late = time.perf_counter() - self._last_beat - self.interval
+            if late < self.threshold:
+                continue
+            with self._lock:
+                if self._current_stall is not None:
+                    continue
+                stall = {
+                    "at": datetime.now(timezone.utc).isoformat(),
+                    "route": self._route_of(asyncio.current_task(self._loop)),
+                    "lag_ms": None,
+                }
+                if self.sample_stacks:
+                    stall["stack"] = self._sample_stack()
+                self._current_stall = stall
+                self._stalls.append(stall)
+
+    async def _beat(self):
+        while True:
+            self._last_beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._last_beat - self.interval)
+            loop_lag_seconds.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag < self.threshold:
+                continue
+            with self._lock:
+                stall = self._current_stall
+                self._current_stall = None
+                if stall is None:
+                    # blocage trop bref pour le thread de surveillance : route inconnue
+                    stall = {"at": datetime.now(timezone.utc).isoformat(), "route": "unknown"}
+                    self._stalls.append(stall)
+                stall["lag_ms"] = round(lag * 1000, 1)
+            loop_stalls.inc(route=stall["route"])
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms ({stall['route']})")
+
+    def report(self) -> Dict:
+        """
+        Retourne l'état de la surveillance : quantiles du retard, derniers blocages et callbacks lents.
+
+        Returns:
+            Dict: Le rapport, du plus récent au plus ancien.
+        """
+        with self._lock:
+            stalls = [dict(s) for s in reversed(self._stalls)]
+            slow_callbacks = list(reversed(self._slow_callbacks))
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {f"p{int(q * 100)}": _ms(loop_lag_seconds.percentile(q)) for q in (0.5, 0.95, 0.99)},
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls_by_route": {dict(key).get("route", ""): int(count) for key, count in loop_stalls.samples().items()},
+            "stalls": stalls,
+            "slow_callbacks": slow_callbacks,
+        }
+
+
+class LoopMonitorMiddleware:
+    """
+    Middleware ASGI qui rattache chaque requête (HTTP ou WebSocket) à sa tâche, pour attribuer
+    les blocages de la boucle à une route.
+    """
+
+    def __init__(self, app, monitor: Optional[LoopMonitor] = None):
+        self.app = app
+        self.monitor = monitor or loop_monitor
+
+    async def __call__(self, scope, receive, send):
+        task = asyncio.current_task()
+        if scope["type"] not in ("http", "websocket") or task is None:
+            await self.app(scope, receive, send)
+            return
+        self.monitor.enter(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.leave(task)
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_MONITOR_THRESHOLD,
+    sample_stacks=settings.LOOP_MONITOR_SAMPLE_STACKS,
+    asyncio_debug=settings.LOOP_MONITOR_ASYNCIO_DEBUG,
+    max_reports=settings.LOOP_MONITOR_MAX_REPORTS,
+)
@@ -0,0 +1,272 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    """
+    Construit une clé hashable et ordonnée à partir d'un dictionnaire de labels.
+
+    Args:
+        labels (Dict[str, str]): Les labels associés à une mesure.
+
+    Returns:
+        LabelKey: Un tuple trié de paires (nom, valeur).
+    """
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    """
+    Compteur monotone en mémoire, éventuellement ventilé par labels.
+    """
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Incrémente le compteur.
+
+        Args:
+            amount (float): La valeur à ajouter (positive).
+            **labels: Les labels de la série à incrémenter.
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Retourne la valeur courante d'une série.
+
+        Args:
+            **labels: Les labels de la série.
+
+        Returns:
+            float: La valeur du compteur, 0 si la série n'existe pas.
+        """
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Counter):
+    """
+    Jauge en mémoire : valeur instantanée qui peut monter ou descendre.
+    """
+
+    def set(self, value: float, **labels):
+        """
+        Fixe la valeur de la jauge.
+
+        Args:
+            value (float): La nouvelle valeur.
+            **labels: Les labels de la série.
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        """
+        Décrémente la jauge.
+
+        Args:
+            amount (float): La valeur à retrancher.
+            **labels: Les labels de la série.
+        """
+        self.inc(-amount, **labels)
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif en mémoire (style Prometheus), éventuellement ventilé par labels.
+    """
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """
+        Enregistre une observation.
+
+        Args:
+            value (float): La valeur observée (en secondes pour une durée).
+            **labels: Les labels de la série.
+        """
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def samples(self) -> Dict[LabelKey, Tuple[List[int], float]]:
+        """
+        Retourne, pour chaque série, les effectifs par bucket (non cumulés, le dernier pour +Inf)
+        et la somme des observations.
+        """
+        with self._lock:
+            return {key: (list(counts), self._sums[key]) for key, counts in self._counts.items()}
+
+    def percentile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estime un quantile d'une série par interpolation linéaire dans les buckets.
+
+        Args:
+            q (float): Le quantile recherché (0.5, 0.95, 0.99...).
+            **labels: Les labels de la série.
+
+        Returns:
+            Optional[float]: L'estimation, ou None si la série est vide. Au-delà du dernier bucket,
+            la borne du dernier bucket est renvoyée.
+        """
+        with self._lock:
+            counts = list(self._counts.get(_label_key(labels), ()))
+        return _percentile_from_counts(self.buckets, counts, q)
+
+
+def _percentile_from_counts(buckets: Sequence[float], counts: List[int], q: float) -> Optional[float]:
+    total = sum(counts)
+    if not total:
+        return None
+    target = q * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if count and cumulative + count >= target:
+            if index >= len(buckets):
+                return buckets[-1]
+            lower = buckets[index - 1] if index > 0 else 0.0
+            upper = buckets[index]
+            return lower + (upper - lower) * (target - cumulative) / count
+        cumulative += count
+    return buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Registre des métriques du processus.
+
+    Les métriques sont créées à la demande et partagées par nom : deux appels à
+    `counter("x", ...)` renvoient le même objet.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, description)
+                self._metrics[name] = metric
+            elif type(metric) is not cls:
+                raise ValueError(f"La métrique '{name}' existe déjà avec un autre type.")
+            return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = Histogram(name, description, buckets)
+                self._metrics[name] = metric
+            elif type(metric) is not Histogram:
+                raise ValueError(f"La métrique '{name}' existe déjà avec un autre type.")
+            return metric
+
+    def all(self) -> Dict[str, object]:
+        with self._lock:
+            return dict(self._metrics)
+
+
+registry = MetricsRegistry()
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render_prometheus(metrics_registry: MetricsRegistry = registry) -> str:
+    """
+    Exporte les métriques au format texte Prometheus (version 0.0.4).
+
+    Chaque histogramme est complété d'une famille `<nom>_quantile` (jauge) donnant les
+    p50/p95/p99 estimés dans le processus.
+
+    Args:
+        metrics_registry (MetricsRegistry): Le registre à exporter.
+
+    Returns:
+        str: Le texte à servir sur `/metrics`.
+    """
+    lines: List[str] = []
+    for name, metric in sorted(metrics_registry.all().items()):
+        if isinstance(metric, Histogram):
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} histogram")
+            samples = metric.samples()
+            for key, (counts, total_sum) in sorted(samples.items()):
+                cumulative = 0
+                for bound, count in zip(list(metric.buckets) + [float("inf")], counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total_sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+            if samples:
+                lines.append(f"# HELP {name}_quantile Quantiles estimés de {name}.")
+                lines.append(f"# TYPE {name}_quantile gauge")
+                for key, (counts, _) in sorted(samples.items()):
+                    for q in QUANTILES:
+                        value = _percentile_from_counts(metric.buckets, counts, q)
+                        if value is not None:
+                            lines.append(f"{name}_quantile{_format_labels(key, (('quantile', str(q)),))} {_format_value(value)}")
+        else:
+            kind = "gauge" if isinstance(metric, Gauge) else "counter"
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(metric.samples().items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
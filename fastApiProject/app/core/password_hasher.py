@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Durée des hachages et vérifications bcrypt, attente du pool comprise.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+password_rehash_total = registry.counter("password_rehash_total", "Mots de passe rehachés au coût courant à la connexion.")
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    """
+    Retourne le contexte passlib bcrypt d'un coût donné.
+
+    Les hashs d'un autre coût sont signalés par `needs_update` / `verify_and_update`.
+
+    Args:
+        rounds (int): Le coût bcrypt (log2 du nombre d'itérations).
+
+    Returns:
+        CryptContext: Le contexte, partagé par coût.
+    """
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# Fonctions de module : elles doivent pouvoir être envoyées à un pool de processus.
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return crypt_context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Service de hachage des mots de passe : bcrypt tourne dans un pool borné, jamais sur l'event loop.
+
+    Un hachage bcrypt coûte plusieurs centaines de millisecondes de CPU. Exécuté dans la route, il
+    bloque toutes les autres requêtes ; exécuté dans le threadpool par défaut, une vague de connexions
+    l'occupe entièrement. Le pool dédié borne le nombre de hachages simultanés (les suivants attendent
+    leur tour) ; le module bcrypt relâchant le GIL, des threads suffisent, le pool de processus reste
+    disponible si besoin.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 4, use_processes: bool = False):
+        self.rounds = rounds
+        self.workers = workers
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        # créé au premier usage : pas de processus lancés à l'import de l'application
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            password_hash_seconds.observe(loop.time() - started, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hache un mot de passe au coût configuré.
+
+        Args:
+            password (str): Le mot de passe en clair.
+
+        Returns:
+            str: Le hash bcrypt.
+        """
+        return await self._run("hash", _hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Vérifie un mot de passe et, s'il est valide mais haché avec un autre coût, le rehache.
+
+        Args:
+            password (str): Le mot de passe en clair.
+            hashed_password (str): Le hash enregistré.
+
+        Returns:
+            Tuple[bool, Optional[str]]: La validité du mot de passe et, si le hash doit être remplacé,
+            le nouveau hash (None sinon).
+        """
+        valid, new_hash = await self._run("verify", _verify_and_update, password, hashed_password, self.rounds)
+        if new_hash is not None:
+            password_rehash_total.inc()
+        return valid, new_hash
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hache plusieurs mots de passe en parallèle, hors event loop (initialisation de la base).
+
+        Args:
+            passwords (List[str]): Les mots de passe en clair.
+
+        Returns:
+            List[str]: Les hashs, dans le même ordre.
+        """
+        return list(self.executor.map(_hash, passwords, [self.rounds] * len(passwords)))
+
+    def shutdown(self):
+        """Arrête le pool (il sera recréé au prochain usage)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    use_processes=settings.PASSWORD_HASH_PROCESSES,
+)
@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from app.core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+provider_init_seconds = registry.histogram(
+    "provider_init_seconds", "Durée de construction des clients des fournisseurs (imports compris), par fournisseur."
+)
+
+
+class ProviderRegistry:
+    """
+    Registre des clients des fournisseurs externes (OpenAI, Gemini, Mistral, Replicate).
+
+    Chaque client est construit au premier usage, ou à l'avance au démarrage de l'application
+    (`warm_up`), jamais à l'import : les SDK et leurs dépendances lourdes ne sont importés que
+    par les fabriques. L'import de l'application (démarrage à froid, redémarrage `--reload`)
+    n'en paie donc pas le coût.
+
+    `override` remplace un client (tests, benchmarks hors ligne).
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """
+        Déclare un fournisseur.
+
+        Args:
+            name (str): Le nom du fournisseur.
+            factory (Callable[[], Any]): La fonction qui construit son client.
+        """
+        self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        """
+        Retourne le client d'un fournisseur, construit au premier appel (bloquant : import du SDK).
+
+        Args:
+            name (str): Le nom du fournisseur.
+
+        Returns:
+            Any: Le client, partagé par toute l'application.
+
+        Raises:
+            KeyError: Si le fournisseur n'est pas déclaré.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        factory = self._factories[name]
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = self._instances[name] = factory()
+                elapsed = time.perf_counter() - started
+                provider_init_seconds.observe(elapsed, provider=name)
+                logger.info(f"Provider '{name}' initialized in {elapsed * 1000:.0f} ms")
+        return instance
+
+    def override(self, name: str, instance: Any):
+        """Remplace le client d'un fournisseur."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self, name: str = None):
+        """Oublie le client d'un fournisseur (ou de tous) : il sera reconstruit au prochain usage."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def warm_up(self, names: Iterable[str]) -> List[str]:
+        """
+        Construit à l'avance les clients demandés (bloquant : à exécuter hors event loop).
+
+        Un fournisseur en erreur est journalisé et sera retenté au premier usage.
+
+        Args:
+            names (Iterable[str]): Les noms des fournisseurs.
+
+        Returns:
+            List[str]: Les fournisseurs construits.
+        """
+        ready = []
+        for name in names:
+            try:
+                self.get(name)
+                ready.append(name)
+            except Exception as e:
+                logger.warning(f"Provider '{name}' warm-up failed: {e}")
+        return ready
+
+
+def _openai():
+    from openai import OpenAI
+    return OpenAI(api_key=os.environ["OPENAI_KEY"], organization=os.getenv("OPENAI_ORG"))
+
+
+def _gemini():
+    # le module configuré fait office de client (`GenerativeModel`)
+    import google.generativeai as genai
+    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+    return genai
+
+
+def _mistral():
+    from mistralai import Mistral
+    return Mistral(api_key=os.environ["MISTRAL_API_KEY"])
+
+
+def _replicate():
+    from app.connector.replicate_client import ReplicateClient
+    return ReplicateClient()
+
+
+providers = ProviderRegistry()
+providers.register("openai", _openai)
+providers.register("gemini", _gemini)
+providers.register("mistral", _mistral)
+providers.register("replicate", _replicate)
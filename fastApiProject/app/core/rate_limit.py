@@ -0,0 +1,305 @@
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+from app.connector.connectorBDD import MongoAccess
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.utils import ROLES_FILEPATH, load_roles
+
+
+RATE_LIMITS_FILEPATH = os.path.join('app', 'core', 'rate_limits.json')
+
+rate_limit_rejected = registry.counter(
+    "rate_limit_rejected_total", "Requêtes et messages rejetés par les quotas, par portée et par clé (user, session)."
+)
+
+
+def _retry_after(limit: int, window: float, elapsed: float, current: int, previous: int) -> float:
+    """
+    Délai avant que l'estimation de la fenêtre glissante repasse sous la limite.
+
+    Args:
+        limit (int): Le nombre maximal d'appels par fenêtre.
+        window (float): La durée de la fenêtre (s).
+        elapsed (float): Le temps écoulé dans la fenêtre courante (s).
+        current (int): Les appels de la fenêtre courante.
+        previous (int): Les appels de la fenêtre précédente.
+
+    Returns:
+        float: Le délai (s).
+    """
+    if limit <= 0:
+        return window
+    room = limit - 1 - current
+    if room >= 0 and previous:
+        # la fenêtre précédente pèse de moins en moins : attendre qu'elle laisse une place
+        return max(window * (1 - room / previous) - elapsed, 0.001)
+    # la fenêtre courante est pleine à elle seule : attendre qu'elle devienne la précédente et pèse assez peu
+    return window - elapsed + window * (1 - (limit - 1) / current)
+
+
+class InMemoryRateLimitBackend:
+    """
+    Compteurs à fenêtre glissante en mémoire (propres au worker).
+
+    L'estimation d'une fenêtre glissante combine deux fenêtres fixes : les appels de la fenêtre
+    courante et ceux de la précédente, pondérés par la part de celle-ci encore couverte. Deux
+    entiers par clé suffisent, quel que soit le débit.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # clé -> (début de la fenêtre courante, appels courants, appels précédents)
+        self._windows: Dict[str, Tuple[float, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Optional[float]:
+        """
+        Compte un appel s'il respecte la limite.
+
+        Args:
+            key (str): La clé limitée.
+            limit (int): Le nombre maximal d'appels par fenêtre.
+            window (float): La durée de la fenêtre (s).
+            now (float): L'instant de l'appel (s, horloge murale).
+
+        Returns:
+            Optional[float]: None si l'appel est accepté, sinon le délai (s) avant de réessayer.
+        """
+        start = now - now % window
+        with self._lock:
+            started, current, previous = self._windows.get(key, (start, 0, 0))
+            if started != start:
+                previous = current if started == start - window else 0
+                current = 0
+            elapsed = now - start
+            if limit <= 0 or previous * (1 - elapsed / window) + current + 1 > limit:
+                self._windows[key] = (start, current, previous)
+                return _retry_after(limit, window, elapsed, current, previous)
+            self._windows[key] = (start, current + 1, previous)
+            if len(self._windows) > self.max_keys:
+                self._prune(now, window)
+        return None
+
+    def undo(self, key: str, window: float, now: float):
+        """
+        Annule un appel accepté par `hit` au même instant (rejeté par une autre limite).
+
+        Args:
+            key (str): La clé limitée.
+            window (float): La durée de la fenêtre (s).
+            now (float): L'instant de l'appel (s, horloge murale).
+        """
+        start = now - now % window
+        with self._lock:
+            started, current, previous = self._windows.get(key, (None, 0, 0))
+            if started == start and current > 0:
+                self._windows[key] = (start, current - 1, previous)
+
+    def _prune(self, now: float, window: float):
+        # clés inactives depuis plus de deux fenêtres : leur estimation est nulle
+        stale = [key for key, (started, _, _) in self._windows.items() if started < now - 2 * window]
+        for key in stale:
+            del self._windows[key]
+
+
+class MongoRateLimitBackend:
+    """
+    Compteurs à fenêtre glissante partagés entre workers (collection `rate_limit_db`).
+
+    Un document par clé et par fenêtre fixe, incrémenté atomiquement (`$inc`) puis décrémenté si
+    la limite est dépassée ; les documents expirent (index TTL) deux fenêtres après leur début.
+    """
+
+    blocking = True
+
+    def __init__(self, collection: Optional[Collection] = None):
+        self._collection = collection
+        self._indexes_ready = False
+
+    @property
+    def collection(self) -> Collection:
+        if self._collection is None:
+            self._collection = MongoAccess().rate_limit_collection
+        if not self._indexes_ready:
+            self._collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexes_ready = True
+        return self._collection
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Optional[float]:
+        start = now - now % window
+        elapsed = now - start
+        if limit <= 0:
+            return _retry_after(limit, window, elapsed, 0, 0)
+        current_id, previous_id = f"{key}|{int(start)}", f"{key}|{int(start - window)}"
+        doc = self.collection.find_one_and_update(
+            {"_id": current_id},
+            {"$inc": {"count": 1},
+             "$setOnInsert": {"expires_at": datetime.utcfromtimestamp(start) + timedelta(seconds=2 * window)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        previous_doc = self.collection.find_one({"_id": previous_id}, {"count": 1})
+        previous = previous_doc["count"] if previous_doc else 0
+        current = doc["count"] - 1
+        if previous * (1 - elapsed / window) + current + 1 > limit:
+            self.collection.update_one({"_id": current_id}, {"$inc": {"count": -1}})
+            return _retry_after(limit, window, elapsed, current, previous)
+        return None
+
+    def undo(self, key: str, window: float, now: float):
+        start = now - now % window
+        self.collection.update_one({"_id": f"{key}|{int(start)}", "count": {"$gt": 0}}, {"$inc": {"count": -1}})
+
+
+class RateLimiter:
+    """
+    Quotas par utilisateur et par session de formation, pour protéger les budgets des fournisseurs.
+
+    Chaque portée (`prompt`, `image`, `video`, `voice`, `ws_message`) est décrite dans
+    `app/core/rate_limits.json` : une fenêtre, une limite par rôle (`app/core/auth_roles.json` ;
+    `null` = illimité, la plus permissive des limites des rôles de l'utilisateur s'applique) et
+    éventuellement une limite commune aux participants de la session de formation en cours.
+
+    Les compteurs sont en mémoire, ou partagés entre workers en base (`RATE_LIMIT_BACKEND=mongo`) ;
+    les portées marquées `local` (messages WebSocket, très fréquents) restent toujours en mémoire.
+    """
+
+    def __init__(self, scopes: Dict[str, Dict], backend=None, enabled: bool = True, session_cache_seconds: float = 60.0,
+                 sessions: Optional[Collection] = None):
+        self.scopes = scopes
+        self.enabled = enabled
+        self.local = InMemoryRateLimitBackend()
+        self.backend = backend if backend is not None else self.local
+        self.session_cache_seconds = session_cache_seconds
+        self._sessions = sessions
+        # e-mail -> (expiration, identifiant de la session en cours)
+        self._user_sessions: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    @property
+    def sessions(self) -> Collection:
+        if self._sessions is None:
+            self._sessions = MongoAccess().sessions_collection
+        return self._sessions
+
+    def user_limit(self, scope: str, roles: List[str]) -> Optional[int]:
+        """
+        Limite d'un utilisateur pour une portée : la plus permissive de ses rôles.
+
+        Args:
+            scope (str): La portée.
+            roles (List[str]): Les rôles de l'utilisateur.
+
+        Returns:
+            Optional[int]: Le nombre d'appels par fenêtre, None si illimité.
+        """
+        limits = self.scopes[scope]["roles"]
+        known = [limits[role] for role in roles if role in limits]
+        if not known or None in known:
+            return None if known else 0
+        return max(known)
+
+    def current_session(self, email: str) -> Optional[str]:
+        """Session de formation en cours de l'utilisateur, mise en cache (bloquant au premier appel)."""
+        now = time.monotonic()
+        cached = self._user_sessions.get(email)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        utcnow = datetime.utcnow()
+        session = self.sessions.find_one(
+            {"emails": email, "start_time": {"$lte": utcnow}, "end_time": {"$gte": utcnow}}, {"_id": 1}
+        )
+        session_id = str(session["_id"]) if session else None
+        self._user_sessions[email] = (now + self.session_cache_seconds, session_id)
+        return session_id
+
+    def _hit(self, backend, scope: str, user, now: float, key: Optional[str] = None) -> Optional[float]:
+        config = self.scopes[scope]
+        window = config["window_seconds"]
+        limit = self.user_limit(scope, user.roles)
+        if limit is not None:
+            user_key = f"{scope}|user|{key or user.id}"
+            retry_after = backend.hit(user_key, limit, window, now)
+            if retry_after is not None:
+                rate_limit_rejected.inc(scope=scope, key="user")
+                return retry_after
+            if config.get("session") is not None:
+                session_id = self.current_session(user.email)
+                if session_id is not None:
+                    retry_after = backend.hit(f"{scope}|session|{session_id}", config["session"], window, now)
+                    if retry_after is not None:
+                        # appel rejeté : il ne doit pas non plus compter dans le quota de l'utilisateur
+                        backend.undo(user_key, window, now)
+                        rate_limit_rejected.inc(scope=scope, key="session")
+                        return retry_after
+        return None
+
+    async def check(self, scope: str, user, key: Optional[str] = None) -> Optional[float]:
+        """
+        Compte un appel de l'utilisateur dans une portée.
+
+        Args:
+            scope (str): La portée (voir `app/core/rate_limits.json`).
+            user (UserDisplay): L'utilisateur authentifié (rôles et session de formation).
+            key (Optional[str]): La clé de la limite individuelle, l'identifiant de l'utilisateur par
+                défaut (par exemple une connexion WebSocket, pour limiter chacune séparément).
+
+        Returns:
+            Optional[float]: None si l'appel est accepté, sinon le délai (s) avant de réessayer.
+        """
+        if not self.enabled:
+            return None
+        backend = self.local if self.scopes[scope].get("local") else self.backend
+        cached = self._user_sessions.get(user.email)
+        resolve_session = self.scopes[scope].get("session") is not None and (cached is None or cached[0] <= time.monotonic())
+        # les E/S (compteurs partagés, session de l'utilisateur à relire) sont faites hors event loop
+        if backend.blocking or resolve_session:
+            return await run_in_threadpool(self._hit, backend, scope, user, time.time(), key)
+        return self._hit(backend, scope, user, time.time(), key)
+
+
+def load_rate_limits(filepath: str = RATE_LIMITS_FILEPATH, roles_filepath: str = ROLES_FILEPATH) -> Dict[str, Dict]:
+    """
+    Charge les portées et limites des quotas, en vérifiant les rôles.
+
+    Args:
+        filepath (str): Le fichier JSON des quotas.
+        roles_filepath (str): Le fichier JSON des rôles.
+
+    Returns:
+        Dict[str, Dict]: Les portées.
+
+    Raises:
+        ValueError: Si un rôle n'est pas défini dans `auth_roles.json`.
+    """
+    with open(filepath, 'r') as file:
+        scopes = json.load(file)["scopes"]
+    roles = set(load_roles(roles_filepath))
+    for scope, config in scopes.items():
+        unknown = set(config["roles"]) - roles
+        if unknown:
+            raise ValueError(f"Rate limit scope '{scope}' uses unknown role(s): {', '.join(sorted(unknown))}")
+    return scopes
+
+
+def format_retry_after(retry_after: float) -> str:
+    """Valeur de l'en-tête `Retry-After` (secondes entières, arrondies au-dessus)."""
+    return str(max(math.ceil(retry_after), 1))
+
+
+rate_limiter = RateLimiter(
+    load_rate_limits(),
+    backend=MongoRateLimitBackend() if settings.RATE_LIMIT_BACKEND == "mongo" else None,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
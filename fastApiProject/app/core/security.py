@@ -1,10 +1,10 @@
 from fastapi import HTTPException
-from passlib.context import CryptContext
 from jose import jwt, JWTError
 from starlette import status
 from app.core.config import settings
+from app.core.password_hasher import crypt_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = crypt_context(settings.PASSWORD_BCRYPT_ROUNDS)
 credentials = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -14,7 +14,8 @@ credentials = HTTPException(
 
 def hash_password(password):
     """
-    Hash le mot de passe avec bcrypt.
+    Hash le mot de passe avec bcrypt, de façon bloquante (scripts et tests ; dans une route,
+    utiliser `password_hasher.hash`).
 
     Args:
         password (str): Le mot de passe à hasher.
@@ -27,7 +28,8 @@ def hash_password(password):
 
 def verify_password(password, hashed_password):
     """
-    Vérifie si le mot de passe correspond au mot de passe hashé.
+    Vérifie si le mot de passe correspond au mot de passe hashé, de façon bloquante (dans une
+    route, utiliser `password_hasher.verify`).
 
     Args:
         password (str): Le mot de passe à vérifier.
@@ -0,0 +1,91 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+
+def _default(value: Any) -> Any:
+    # types BSON qu'orjson ne sérialise pas nativement
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Sérialise en JSON un contenu pouvant contenir des documents MongoDB (voir `MongoJSONResponse`)."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """
+    Réponse JSON sérialisée par orjson, classe de réponse par défaut de l'application.
+
+    Accepte directement les documents MongoDB : les `ObjectId` deviennent des chaînes, les dates
+    sont écrites en ISO 8601 (`Z` pour UTC), comme le ferait la sérialisation des modèles.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _fields(model: Type[BaseModel]) -> Tuple[Tuple[str, FieldInfo], ...]:
+    # (clé du document et de la réponse, champ), calculé une fois par modèle
+    return tuple((field.alias or name, field) for name, field in model.model_fields.items())
+
+
+def project(document: Dict, model: Type[BaseModel]) -> Dict:
+    """
+    Projette un document sur les champs d'un modèle de réponse, sans validation.
+
+    Réservé aux documents écrits par l'application (donc déjà validés à l'écriture) : les clés sont
+    celles de la réponse du modèle (alias compris, `_id` par exemple), les champs absents prennent
+    leur valeur par défaut, les champs en trop sont ignorés.
+
+    Args:
+        document (Dict): Le document MongoDB.
+        model (Type[BaseModel]): Le modèle de réponse déclaré par la route.
+
+    Returns:
+        Dict: Le contenu de la réponse, sérialisable par `MongoJSONResponse`.
+
+    Raises:
+        KeyError: Si un champ obligatoire manque au document.
+    """
+    projected = {}
+    for key, field in _fields(model):
+        if key in document:
+            projected[key] = document[key]
+        elif field.is_required():
+            raise KeyError(key)
+        else:
+            projected[key] = field.get_default(call_default_factory=True)
+    return projected
+
+
+def documents_response(documents: Iterable[Dict], model: Type[BaseModel], status_code: int = 200,
+                       headers: Optional[Dict[str, str]] = None) -> MongoJSONResponse:
+    """
+    Réponse d'une liste de documents, sérialisée directement en JSON.
+
+    Évite la double validation du chemin habituel (construction des modèles, puis revalidation par
+    `response_model` et `jsonable_encoder`) : la route garde son `response_model` pour la
+    documentation OpenAPI, mais FastAPI renvoie une `Response` telle quelle.
+
+    Args:
+        documents (Iterable[Dict]): Les documents MongoDB.
+        model (Type[BaseModel]): Le modèle d'un élément de la réponse.
+        status_code (int): Le code HTTP.
+        headers (Optional[Dict[str, str]]): Les en-têtes de la réponse (ETag par exemple).
+
+    Returns:
+        MongoJSONResponse: La réponse.
+    """
+    content: List[Dict] = [project(document, model) for document in documents]
+    return MongoJSONResponse(content, status_code=status_code, headers=headers)
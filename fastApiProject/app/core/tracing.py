@@ -0,0 +1,141 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.metrics import registry
+
+
+turn_stage_seconds = registry.histogram(
+    "voice_turn_stage_seconds",
+    "Instant (depuis le début du tour) auquel chaque étape d'un tour vocal est atteinte.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0)
+)
+span_seconds = registry.histogram(
+    "voice_span_seconds",
+    "Durée cumulée de chaque étape d'un tour vocal (STT, transcodage, synthèse...).",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+)
+
+_current_turn: ContextVar[Optional["TurnTrace"]] = ContextVar("current_turn", default=None)
+
+
+class TurnTrace:
+    """
+    Trace d'un tour de parole : horodatages monotones de chaque étape et durées cumulées.
+
+    - `mark(stage)` note le premier instant où une étape est atteinte (premier token LLM,
+      premier octet TTS, premier audio envoyé...) ;
+    - `span(stage)` mesure la durée d'une opération, cumulée si elle se répète.
+
+    `finish()` alimente les histogrammes `voice_turn_stage_seconds` et `voice_span_seconds`
+    (labels `route` et `stage`).
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.spans: Dict[str, float] = {}
+        self.finished = False
+
+    def mark(self, stage: str):
+        """
+        Note l'instant où une étape est atteinte pour la première fois.
+
+        Args:
+            stage (str): Le nom de l'étape.
+        """
+        if stage not in self.marks:
+            self.marks[stage] = time.perf_counter() - self.started
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Mesure la durée d'un bloc et l'ajoute à l'étape.
+
+        Args:
+            stage (str): Le nom de l'étape.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[stage] = self.spans.get(stage, 0.0) + time.perf_counter() - started
+
+    def timings(self) -> Dict[str, float]:
+        """
+        Retourne les mesures du tour en millisecondes (étapes atteintes et durées `<étape>_duration`).
+
+        Returns:
+            Dict[str, float]: Les mesures arrondies au dixième de milliseconde.
+        """
+        result = {stage: round(value * 1000, 1) for stage, value in self.marks.items()}
+        result.update({f"{stage}_duration": round(value * 1000, 1) for stage, value in self.spans.items()})
+        return result
+
+    def server_timing(self) -> str:
+        """
+        Formate les mesures pour l'en-tête HTTP `Server-Timing`.
+
+        Returns:
+            str: Les mesures, par exemple `stt;dur=412.3, total;dur=415.0`.
+        """
+        return ", ".join(f"{stage};dur={value}" for stage, value in self.timings().items())
+
+    def finish(self) -> Dict[str, float]:
+        """
+        Clôt le tour et enregistre ses mesures dans les histogrammes (une seule fois).
+
+        Returns:
+            Dict[str, float]: Les mesures du tour en millisecondes.
+        """
+        if not self.finished:
+            self.finished = True
+            self.mark("total")
+            for stage, value in self.marks.items():
+                turn_stage_seconds.observe(value, route=self.route, stage=stage)
+            for stage, value in self.spans.items():
+                span_seconds.observe(value, route=self.route, stage=stage)
+        return self.timings()
+
+
+def start_turn(route: str) -> TurnTrace:
+    """
+    Démarre la trace d'un tour et la rend courante pour la tâche en cours (et les tâches qu'elle crée).
+
+    À appeler depuis la coroutine qui porte le tour (endpoint, tâche de traitement), jamais depuis
+    un générateur asynchrone.
+
+    Args:
+        route (str): L'origine du tour (`voice_ws`, `voice_rest`...).
+
+    Returns:
+        TurnTrace: La trace démarrée.
+    """
+    trace = TurnTrace(route)
+    _current_turn.set(trace)
+    return trace
+
+
+def current_turn() -> Optional[TurnTrace]:
+    """Retourne la trace du tour en cours, s'il y en a une."""
+    return _current_turn.get()
+
+
+def mark(stage: str):
+    """Note une étape sur la trace courante (sans effet hors d'un tour)."""
+    trace = _current_turn.get()
+    if trace is not None:
+        trace.mark(stage)
+
+
+@contextmanager
+def span(stage: str):
+    """Mesure un bloc sur la trace courante (sans effet hors d'un tour)."""
+    trace = _current_turn.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(stage):
+        yield
@@ -35,3 +35,18 @@ def get_default_role(filepath: str) -> str:
         raise ValueError(f"Le rôle par défaut '{default_role}' n'est pas défini dans les rôles disponibles.")
     return default_role
 
+
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Estime le nombre de tokens d'un échange (environ 4 caractères par token pour les tokenizers
+    GPT, Gemini et Mistral, en français comme en anglais).
+
+    Args:
+        *texts (str): Les textes de l'échange (prompt, réponse...), None ignorés.
+
+    Returns:
+        int: L'estimation, arrondie à l'entier supérieur.
+    """
+    chars = sum(len(text) for text in texts if isinstance(text, str))
+    return -(-chars // 4)
@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from pymongo.database import Database
+
+from app.connector.connectorBDD import MongoAccess
+from app.core.metrics import registry
+
+
+analytics_query_seconds = registry.histogram(
+    "analytics_query_seconds", "Durée d'une agrégation des statistiques d'usage, par source."
+)
+analytics_cache_hits = registry.counter("analytics_cache_hits_total", "Rapports d'usage servis depuis le cache.")
+analytics_cache_misses = registry.counter("analytics_cache_misses_total", "Rapports d'usage calculés en base.")
+
+TIMELINE_FORMATS = {"hour": "%Y-%m-%dT%H:00:00Z", "day": "%Y-%m-%d"}
+# nombre maximal d'utilisateurs et de sessions détaillés par source
+TOP_N = 20
+
+
+def _to_utc(value: datetime) -> datetime:
+    # MongoDB stocke des dates UTC sans fuseau
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class AnalyticsCRUD:
+    """
+    Statistiques d'usage des formateurs : prompts, images, vidéos et transcriptions, par modèle,
+    utilisateur, session et intervalle de temps.
+
+    Chaque source est résumée par une seule agrégation (`$match` sur un index de date, puis
+    `$facet` de `$group`) : aucun document n'est rapatrié. Les bornes de la période sont arrondies
+    à `cache_seconds` ; un rapport porte donc sur une période close et reste exact en cache :
+    toutes les consultations d'un même intervalle partagent le même calcul.
+    """
+
+    def __init__(self, cache_seconds: int = 300, max_entries: int = 256, database: Optional[Database] = None):
+        if database is None:
+            access = MongoAccess()
+            self.prompts = access.prompt_collection
+            self.images = access.image_collection
+            self.videos = access.video_collection
+            self.transcripts = access.transcript_collection
+            self.sessions = access.sessions_collection
+            self.users = access.users_collection
+        else:
+            self.prompts = database.prompt_db
+            self.images = database.image_db
+            self.videos = database.video_db
+            self.transcripts = database.transcript_db
+            self.sessions = database.sessions_db
+            self.users = database.users_db
+        self.cache_seconds = cache_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        """Crée les index de date des agrégations et horodate les prompts antérieurs (une fois)."""
+        if self._indexes_ready:
+            return
+        for collection in (self.prompts, self.images, self.videos):
+            collection.create_index("created_at")
+            collection.create_index([("user_email", 1), ("created_at", 1)])
+        self.transcripts.create_index("timestamp")
+        self.transcripts.create_index([("user_id", 1), ("timestamp", 1)])
+        # prompts enregistrés avant l'ajout de `created_at` : date tirée de l'ObjectId, tokens estimés
+        self.prompts.update_many({"created_at": {"$exists": False}}, [{"$set": {
+            "created_at": {"$toDate": "$_id"},
+            "token_estimate": {"$ceil": {"$divide": [{"$add": [
+                {"$strLenCP": {"$ifNull": ["$user_prompt", ""]}},
+                {"$strLenCP": {"$convert": {"input": "$generated_response", "to": "string", "onNull": ""}}},
+            ]}, 4]}},
+        }}])
+        self._indexes_ready = True
+
+    def align(self, value: datetime) -> datetime:
+        """Arrondit une date (UTC) au début de son intervalle de cache."""
+        value = _to_utc(value)
+        epoch = int(value.replace(tzinfo=timezone.utc).timestamp())
+        return datetime.utcfromtimestamp(epoch - epoch % self.cache_seconds)
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        try:
+            return self.sessions.find_one({"_id": ObjectId(session_id)}, {"emails": 1, "start_time": 1, "end_time": 1})
+        except InvalidId:
+            return None
+
+    def usage_report(self, start: Optional[datetime] = None, end: Optional[datetime] = None, interval: str = "day",
+                     session_id: Optional[str] = None, user_email: Optional[str] = None) -> Optional[Dict]:
+        """
+        Calcule le rapport d'usage d'une période (bloquant : à appeler via `run_in_threadpool`).
+
+        Args:
+            start (Optional[datetime]): Le début de la période (début de la session, sinon 30 jours avant la fin).
+            end (Optional[datetime]): La fin de la période (fin de la session, sinon maintenant).
+            interval (str): La granularité de la chronologie (`hour` ou `day`).
+            session_id (Optional[str]): Restreint aux participants d'une session de formation.
+            user_email (Optional[str]): Restreint à un utilisateur.
+
+        Returns:
+            Optional[Dict]: Le rapport (voir `UsageReport`), ou None si la session n'existe pas.
+
+        Raises:
+            ValueError: Si la période est vide.
+        """
+        emails: Optional[List[str]] = None
+        if session_id is not None:
+            session = self.get_session(session_id)
+            if session is None:
+                return None
+            emails = session.get("emails", [])
+            start = start or session.get("start_time")
+            end = end or session.get("end_time")
+        if user_email is not None:
+            emails = [user_email] if emails is None or user_email in emails else []
+
+        end = _to_utc(end or datetime.now(timezone.utc))
+        start = _to_utc(start) if start else end - timedelta(days=30)
+        if start >= end:
+            raise ValueError("start must be before end")
+        start, end = self.align(start), self.align(end)
+        key = (start, end, interval, session_id, user_email)
+        with self._lock:
+            report = self._cache.get(key)
+            if report is not None:
+                self._cache.move_to_end(key)
+        if report is not None:
+            analytics_cache_hits.inc()
+            return {**report, "cached": True}
+        analytics_cache_misses.inc()
+
+        self._ensure_indexes()
+        user_ids = None
+        if emails is not None:
+            user_ids = [str(user["_id"]) for user in self.users.find({"email": {"$in": emails}}, {"_id": 1})]
+        report = {
+            "start": start,
+            "end": end,
+            "interval": interval,
+            "session_id": session_id,
+            "user_email": user_email,
+            "prompts": self._source_usage("prompts", self.prompts, start, end, interval, "created_at", "user_email",
+                                          emails, model_field="model_used", session_field="page", tokens=True),
+            "images": self._source_usage("images", self.images, start, end, interval, "created_at", "user_email", emails),
+            "videos": self._source_usage("videos", self.videos, start, end, interval, "created_at", "user_email", emails),
+            "transcripts": self._source_usage("transcripts", self.transcripts, start, end, interval, "timestamp",
+                                              "user_id", user_ids, session_field="session_id"),
+            "cached": False,
+        }
+        with self._lock:
+            self._cache[key] = report
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return report
+
+    def _source_usage(self, source: str, collection, start: datetime, end: datetime, interval: str,
+                      time_field: str, user_field: str, users: Optional[List[str]], model_field: Optional[str] = None,
+                      session_field: Optional[str] = None, tokens: bool = False) -> Dict:
+        """
+        Résume une source en une agrégation : totaux, répartitions et chronologie.
+
+        Args:
+            source (str): Le nom de la source (label des métriques).
+            collection (Collection): La collection interrogée.
+            start (datetime): Le début de la période (inclus).
+            end (datetime): La fin de la période (exclue).
+            interval (str): La granularité de la chronologie.
+            time_field (str): Le champ de date indexé.
+            user_field (str): Le champ identifiant l'utilisateur.
+            users (Optional[List[str]]): Les utilisateurs retenus (tous si None).
+            model_field (Optional[str]): Le champ du modèle utilisé, s'il existe.
+            session_field (Optional[str]): Le champ de regroupement par session, s'il existe.
+            tokens (bool): Additionne l'estimation des tokens (`token_estimate`).
+
+        Returns:
+            Dict: L'usage de la source (voir `SourceUsage`).
+        """
+        match = {time_field: {"$gte": start, "$lt": end}}
+        if users is not None:
+            match[user_field] = {"$in": users}
+        measures = {"count": {"$sum": 1}}
+        if tokens:
+            measures["tokens"] = {"$sum": {"$ifNull": ["$token_estimate", 0]}}
+
+        def breakdown(field: str, limit: Optional[int] = None) -> List[Dict]:
+            stages = [{"$group": {"_id": f"${field}", **measures}}, {"$sort": {"count": -1, "_id": 1}}]
+            return stages + [{"$limit": limit}] if limit else stages
+
+        facets = {
+            "totals": [{"$group": {"_id": None, **measures}}],
+            "users": [{"$group": {"_id": f"${user_field}"}}, {"$count": "users"}],
+            "by_user": breakdown(user_field, TOP_N),
+            "timeline": [
+                {"$group": {"_id": {"$dateToString": {"format": TIMELINE_FORMATS[interval], "date": f"${time_field}"}},
+                            **measures}},
+                {"$sort": {"_id": 1}},
+            ],
+        }
+        if model_field:
+            facets["by_model"] = breakdown(model_field)
+        if session_field:
+            facets["by_session"] = breakdown(session_field, TOP_N)
+
+        started = time.perf_counter()
+        result = next(collection.aggregate([{"$match": match}, {"$facet": facets}]))
+        analytics_query_seconds.observe(time.perf_counter() - started, source=source)
+
+        totals = result["totals"][0] if result["totals"] else {"count": 0}
+        total = totals["count"]
+
+        def rows(name: str) -> List[Dict]:
+            return [
+                {"key": None if row["_id"] is None else str(row["_id"]), "count": row["count"],
+                 "tokens": row.get("tokens", 0), "share": round(row["count"] / total, 4) if total else 0.0}
+                for row in result.get(name, [])
+            ]
+
+        return {
+            "total": total,
+            "tokens": totals.get("tokens", 0),
+            "users": result["users"][0]["users"] if result["users"] else 0,
+            "by_model": rows("by_model"),
+            "by_user": rows("by_user"),
+            "by_session": rows("by_session"),
+            "timeline": [{"bucket": row["_id"], "count": row["count"], "tokens": row.get("tokens", 0)}
+                         for row in result["timeline"]],
+        }
@@ -23,6 +23,15 @@ class CommentaireCRUD:
 
         return [CommentModel(**comment) for comment in comments]
 
+    def get_all_comment_documents(self) -> List[dict]:
+        """
+        Récupère tous les commentaires de la base de données, sans construire de modèles.
+
+        Returns:
+            List[dict]: Les documents des commentaires.
+        """
+        return list(self.db.find({}, {"_id": 0}))
+
 
 
     def get_comment_by_id(self, id: int) -> CommentModel:
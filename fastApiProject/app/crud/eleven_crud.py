@@ -1,12 +1,16 @@
-from typing import List, Dict
+from typing import List, Dict, TYPE_CHECKING
 from datetime import datetime
 from bson import ObjectId
 import os
-from elevenlabs.client import AsyncElevenLabs
 
 from app.connector.connectorBDD import MongoAccess
+from app.connector.http_pool import http_pool
+from app.connector.write_behind import get_write_behind
 from app.models.eleven_model import SessionCreate, MessageCreate
 
+if TYPE_CHECKING:
+    from elevenlabs.client import AsyncElevenLabs
+
 class ElevenCRUD:
     """
     Classe CRUD pour les entités ElevenLabs :
@@ -15,13 +19,30 @@ class ElevenCRUD:
     """
     def __init__(self):
         # Initialisation du client Async ElevenLabs pour ConvAI
-        api_key = os.getenv("ELEVENLABS_API_KEY")
-        if not api_key:
+        self.api_key = os.getenv("ELEVENLABS_API_KEY")
+        if not self.api_key:
             raise ValueError("ELEVENLABS_API_KEY missing in environment")
-        self.client = AsyncElevenLabs(api_key=api_key)
+        self._client = None
+        self._http_client = None
 
         # Accès local MongoDB pour sessions / messages
         self.db = MongoAccess().eleven_collection
+        # les messages sont écrits par lots, hors du chemin critique de la conversation
+        self.message_writer = get_write_behind(self.db)
+
+    @property
+    def client(self) -> "AsyncElevenLabs":
+        """
+        Client ElevenLabs branché sur le pool HTTP partagé, recréé si le pool a été recréé
+        (redémarrage de l'application).
+        """
+        if self._client is None or self._http_client is not http_pool.client:
+            # import différé : le SDK ElevenLabs est long à importer
+            from elevenlabs.client import AsyncElevenLabs
+
+            self._http_client = http_pool.client
+            self._client = AsyncElevenLabs(api_key=self.api_key, httpx_client=self._http_client)
+        return self._client
 
     # ----- Agents -----
     async def list_agents(self) -> List[Dict]:
@@ -59,8 +80,7 @@ class ElevenCRUD:
             "kind": "message",
             "created_at": datetime.utcnow()
         })
-        res = self.db.insert_one(doc)
-        doc["_id"] = res.inserted_id
+        doc["_id"] = self.message_writer.add(doc)
         return doc
 
     def get_messages(self, session_id: str) -> List[Dict]:
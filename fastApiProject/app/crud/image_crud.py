@@ -1,14 +1,21 @@
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any
 import bson
-from app.connector.replicate_client import ReplicateClient
 from app.connector.connectorBDD import MongoAccess
+from app.connector.replicate_client import IMAGE_MODEL
+from app.connector.usage_counters import usage_counters
+from app.core.providers import providers
 
 
 class ImageCRUD:
-    def __init__(self, replicate_client: ReplicateClient):
+    def __init__(self, replicate_client=None):
         self.db = MongoAccess().image_collection
-        self.replicate_client = replicate_client
+        self._replicate_client = replicate_client
+
+    @property
+    def replicate_client(self):
+        # client partagé du registre des fournisseurs, construit au premier usage
+        return self._replicate_client if self._replicate_client is not None else providers.get("replicate")
 
     @staticmethod
     def is_image_valid(created_at) -> bool:
@@ -62,6 +69,7 @@ class ImageCRUD:
             "created_at": created_at
         }
         result = self.db.insert_one(image_data)
+        usage_counters.record("image", user_email, IMAGE_MODEL)
         image_id = result.inserted_id
         return {
             "image_id": str(image_id),
@@ -1,37 +1,21 @@
+from datetime import datetime, timezone
 from typing import List
 import base64
-import os
 from io import BytesIO
 
 import bson
-from pymongo.results import DeleteResult
-import google.generativeai as genai
-import openai
-from openai import OpenAI
-import mistralai
-from mistralai import Mistral
+from pymongo.results import DeleteResult, InsertOneResult
 from dotenv import load_dotenv
-from PIL import Image
 
 from app.models.prompt_model import PromptUpdate
 from app.connector.connectorBDD import MongoAccess
+from app.connector.usage_counters import usage_counters
+from app.core.conditional import collection_version
+from app.core.providers import providers
+from app.core.utils import estimate_tokens
 
 load_dotenv()
 
-api_key = os.environ["GOOGLE_API_KEY"]
-
-genai.configure(api_key=api_key)
-
-client_mistral = Mistral(api_key=os.environ['MISTRAL_API_KEY'])
-
-
-client = OpenAI(
-    api_key=os.environ['OPENAI_KEY'],
-    organization=os.environ['OPENAI_ORG']
-)
-openai.base_url = "https://api.openai.com/v1"
-openai.default_headers = {"x-foo": "true"}
-
 
 class PromptCRUD:
     """
@@ -49,6 +33,24 @@ class PromptCRUD:
         """
         self.db = MongoAccess().prompt_collection
 
+    def _insert(self, document: dict) -> InsertOneResult:
+        """
+        Enregistre un prompt avec son horodatage et son estimation de tokens (lus par les
+        statistiques d'usage, `AnalyticsCRUD`), puis incrémente les compteurs d'usage.
+
+        Args:
+            document (dict): Le document du prompt, complété sur place.
+
+        Returns:
+            InsertOneResult: Le résultat de l'insertion.
+        """
+        document["created_at"] = datetime.now(timezone.utc)
+        document["token_estimate"] = estimate_tokens(document["user_prompt"], document["generated_response"])
+        result = self.db.insert_one(document)
+        usage_counters.record("prompt", document["user_email"], document["model_used"], page=document["page"],
+                              tokens=document["token_estimate"])
+        return result
+
     def encode_image(self, image_path):
         """
         Encode une image en base64.
@@ -93,7 +95,7 @@ class PromptCRUD:
         else:
             messages.append({"role": "user", "content": user_prompt})
             print(f"il n'y a pas de fichier")
-        completion = client.chat.completions.create(
+        completion = providers.get("openai").chat.completions.create(
             model="gpt-4o",
             messages=messages,
 
@@ -137,7 +139,7 @@ class PromptCRUD:
                 "image": None,
                 "image_name": None    
             }
-        result = self.db.insert_one(document)
+        result = self._insert(document)
         prompt_id = result.inserted_id
 
         return {
@@ -164,7 +166,7 @@ class PromptCRUD:
               la réponse générée, l'email de l'utilisateur, le modèle utilisé, la page, l'image (si présente),
               et le nom de l'image (si présent).
         """
-        model = genai.GenerativeModel('gemini-1.5-pro')
+        model = providers.get("gemini").GenerativeModel('gemini-1.5-pro')
 
         user_prompt = prompt_data["user_prompt"]
 
@@ -179,6 +181,8 @@ class PromptCRUD:
             
         if "image" in prompt_data and prompt_data["image"] is not None:
             chat = model.start_chat(history=history)
+            from PIL import Image
+
             file = base64.b64decode(prompt_data["image"])
             image = Image.open(BytesIO(file))
             generated_response = chat.send_message([image,user_prompt])
@@ -207,7 +211,7 @@ class PromptCRUD:
                 "image": None,
                 "image_name": None
             }
-        new_prompt = self.db.insert_one(document)
+        new_prompt = self._insert(document)
         prompt_id = new_prompt.inserted_id
         return {
             "prompt_id": str(prompt_id),
@@ -267,7 +271,7 @@ class PromptCRUD:
             })
 
         # Envoyer les messages au modèle Mistral via l'API
-        response = client_mistral.chat.complete(
+        response = providers.get("mistral").chat.complete(
             model=model,
             messages=messages
         )
@@ -284,7 +288,7 @@ class PromptCRUD:
         }
 
         # Insérer dans la base de données et récupérer l'ID du nouveau prompt
-        new_prompt = self.db.insert_one(document)
+        new_prompt = self._insert(document)
         prompt_id = new_prompt.inserted_id
 
         # Retourner les détails du prompt créé
@@ -373,6 +377,25 @@ class PromptCRUD:
 
         return list(self.db.find({"user_email": user_email, "model_used": model, "page": page}))
 
+    def prompts_version(self, user_email: str, model=None, page=None) -> str:
+        """
+        Version de l'historique d'un utilisateur, pour l'ETag des listes de prompts.
+
+        Args:
+            user_email (str): L'adresse email de l'utilisateur.
+            model: Le modèle utilisé, tous les modèles si None.
+            page: La page spécifique, toutes les pages si None.
+
+        Returns:
+            str: La version de la liste (voir `collection_version`).
+        """
+        query = {"user_email": user_email}
+        if model is not None:
+            query["model_used"] = model
+        if page is not None:
+            query["page"] = page
+        return collection_version(self.db, query)
+
     def get_prompt_by_id_and_user(self, prompt_id: str, user_id: str) -> dict:
         """
         Récupère un prompt spécifique par son ID et l'ID de l'utilisateur qui l'a créé.
@@ -403,6 +426,8 @@ class PromptCRUD:
         updated_data = {k: v for k, v in update_data.dict().items()
                         if v is not None}
         if updated_data:
+            # `updated_at` change la version des historiques (ETag)
+            updated_data["updated_at"] = datetime.now(timezone.utc)
             self.db.update_one({"_id": bson.ObjectId(prompt_id)}, {
                                "$set": updated_data})
         return self.get_prompt(prompt_id)
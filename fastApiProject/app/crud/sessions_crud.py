@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import List
 
 from bson import ObjectId
@@ -93,5 +94,7 @@ class SessionCRUD:
         """
         updated_data = {k: v for k, v in session_data.dict().items() if v is not None}
         if updated_data:
+            # `updated_at` : repéré par le polling des mises à jour en direct (`LiveUpdates`)
+            updated_data["updated_at"] = datetime.now(timezone.utc)
             self.db.update_one({"_id": ObjectId(session_id)}, {"$set": updated_data})
         return self.get_session(session_id)
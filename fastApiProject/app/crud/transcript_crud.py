@@ -2,17 +2,20 @@
 from typing import Dict
 from bson import ObjectId
 from app.connector.connectorBDD import MongoAccess
+from app.connector.write_behind import get_write_behind
 from app.models.transcript_model import TranscriptCreate
 
 
 class TranscriptCRUD:
     def __init__(self):
         self.db = MongoAccess().transcript_collection
+        # écriture différée : le tour de parole n'attend pas MongoDB
+        self.writer = get_write_behind(self.db)
 
     async def create_transcript(self, data: TranscriptCreate) -> Dict:
         doc = data.dict()
-        result = self.db.insert_one(doc)
-        doc["id"] = str(result.inserted_id)
+        doc["_id"] = self.writer.add(doc)
+        doc["id"] = str(doc["_id"])
         return doc
 
     async def get_transcripts_by_session(self, session_id: str):
@@ -1,9 +1,13 @@
+from datetime import datetime, timezone
+
 from fastapi import HTTPException
 from bson import ObjectId
 
+from app.auth.revocation import revocation_list
 from app.connector.connectorBDD import MongoAccess
 from app.models.users_model import UserCreate, UserUpdate, UserInDB, DEFAULT_ROLE
-from app.core.security import verify_password
+from app.core.conditional import collection_version
+from app.core.password_hasher import password_hasher
 
 
 class UserCRUD:
@@ -17,7 +21,7 @@ class UserCRUD:
 
         self.db = MongoAccess().users_collection
 
-    def create_user(self, user_data: UserCreate):
+    async def create_user(self, user_data: UserCreate):
         """
         Crée un nouvel utilisateur dans la base de données.
 
@@ -34,7 +38,7 @@ class UserCRUD:
 
             raise HTTPException(status_code=400, detail="Email already registered")
         user_data_dict = user_data.dict()
-        user_data_dict["hashed_password"] = user_data_dict["password"]
+        user_data_dict["hashed_password"] = await password_hasher.hash(user_data_dict["password"])
         del user_data_dict['password']
 
         if "roles" not in user_data_dict or not user_data_dict["roles"]:
@@ -43,10 +47,13 @@ class UserCRUD:
         self.db.insert_one(user_data_dict)
         return user_data_dict
 
-    def authenticate_user(self, username: str, password: str):
+    async def authenticate_user(self, username: str, password: str):
         """
         Authentifie un utilisateur en vérifiant son nom d'utilisateur et son mot de passe.
 
+        bcrypt s'exécute dans le pool de `password_hasher` ; un hash d'un autre coût que
+        `PASSWORD_BCRYPT_ROUNDS` est remplacé par un hash au coût courant.
+
         Args:
             username (str): Le nom d'utilisateur ou l'email de l'utilisateur.
             password (str): Le mot de passe de l'utilisateur.
@@ -59,8 +66,12 @@ class UserCRUD:
 
         if not user:
             return None
-        if not verify_password(password, user['hashed_password']):
+        valid, new_hash = await password_hasher.verify(password, user['hashed_password'])
+        if not valid:
             return None
+        if new_hash is not None:
+            self.db.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+            user["hashed_password"] = new_hash
         return UserInDB(**user)
 
     def get_user(self, user_id: str) -> dict:
@@ -85,6 +96,15 @@ class UserCRUD:
         users = self.db.find()
         return list(users)
 
+    def users_version(self) -> str:
+        """
+        Version de la liste des utilisateurs, pour son ETag.
+
+        Returns:
+            str: La version de la liste (voir `collection_version`).
+        """
+        return collection_version(self.db, {})
+
     def get_user_by_email(self, email: str):
         """
         Récupère un utilisateur par son adresse e-mail.
@@ -134,12 +154,18 @@ class UserCRUD:
             update_data["is_active"] = original_data["is_active"]
 
         if update_data:
+            # `updated_at` change la version de la liste des utilisateurs (ETag)
+            update_data["updated_at"] = datetime.now(timezone.utc)
             self.db.update_one({"email": email}, {"$set": update_data})
         else:
             raise HTTPException(status_code=400, detail="No valid fields provided for update")
 
         # Retourner l'utilisateur mis à jour
-        return self.db.find_one({"email": email})
+        updated = self.db.find_one({"email": update_data.get("email", email)})
+        if updated is not None:
+            # les claims des jetons d'accès déjà émis (e-mail, rôles, statut) ne sont plus à jour
+            revocation_list.revoke_user(str(updated["_id"]))
+        return updated
 
     def delete_user(self, user_id: str) -> bool:
         """
@@ -157,6 +183,7 @@ class UserCRUD:
         result = self.db.delete_one({"_id": ObjectId(user_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
+        revocation_list.revoke_user(user_id)
         return True
 
     def set_user_active(self, email: str):
@@ -169,7 +196,7 @@ class UserCRUD:
         Returns:
         None
         """
-        self.db.update_one({"email": email}, {"$set": {"is_active": True}})
+        self.db.update_one({"email": email}, {"$set": {"is_active": True, "updated_at": datetime.now(timezone.utc)}})
 
     def set_user_inactive(self, email: str):
         """
@@ -181,4 +208,4 @@ class UserCRUD:
         Returns:
         None
         """
-        self.db.update_one({"email": email}, {"$set": {"is_active": False}})
\ No newline at end of file
+        self.db.update_one({"email": email}, {"$set": {"is_active": False, "updated_at": datetime.now(timezone.utc)}})
\ No newline at end of file
@@ -3,20 +3,27 @@ from typing import List, Dict, Any
 
 import bson
 
-from app.connector.replicate_client import ReplicateClient
 from app.connector.connectorBDD import MongoAccess
+from app.connector.replicate_client import VIDEO_MODEL
+from app.connector.usage_counters import usage_counters
+from app.core.providers import providers
 
 
 class VideoCRUD:
-    def __init__(self, replicate_client: ReplicateClient):
+    def __init__(self, replicate_client=None):
         """
         Initialise une nouvelle instance de la classe avec un client Replicate.
 
         Args:
-            replicate_client (ReplicateClient): Le client Replicate utilisé pour les opérations de réplication.
+            replicate_client (ReplicateClient): Le client Replicate utilisé pour les opérations de réplication
+                (par défaut celui du registre des fournisseurs, construit au premier usage).
         """
         self.db = MongoAccess().video_collection
-        self.replicate_client = replicate_client
+        self._replicate_client = replicate_client
+
+    @property
+    def replicate_client(self):
+        return self._replicate_client if self._replicate_client is not None else providers.get("replicate")
 
     @staticmethod
     def is_video_valid(created_at) -> bool:
@@ -69,6 +76,7 @@ class VideoCRUD:
             "created_at": created_at
         }
         result = self.db.insert_one(video_data)
+        usage_counters.record("video", user_email, VIDEO_MODEL)
         video_id = result.inserted_id
         return {
             "video_id": str(video_id),
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class UsageBreakdown(BaseModel):
+    """
+    Usage d'un modèle, d'un utilisateur ou d'une session.
+
+    Attributs:
+        key (str): Le modèle, l'e-mail de l'utilisateur, la page ou l'identifiant de session.
+        count (int): Le nombre de générations.
+        tokens (int): L'estimation des tokens consommés (prompts uniquement).
+        share (float): La part du total de la source, entre 0 et 1.
+    """
+    key: Optional[str]
+    count: int
+    tokens: int = 0
+    share: float = 0.0
+
+
+class TimelinePoint(BaseModel):
+    """
+    Activité d'un intervalle de temps (heure ou jour, UTC).
+
+    Attributs:
+        bucket (str): Le début de l'intervalle (`2024-05-01` ou `2024-05-01T14:00:00Z`).
+        count (int): Le nombre de générations.
+        tokens (int): L'estimation des tokens consommés (prompts uniquement).
+    """
+    bucket: str
+    count: int
+    tokens: int = 0
+
+
+class SourceUsage(BaseModel):
+    """
+    Usage d'une source (prompts, images, vidéos ou transcriptions) sur la période.
+
+    Attributs:
+        total (int): Le nombre de documents.
+        tokens (int): L'estimation des tokens consommés (prompts uniquement).
+        users (int): Le nombre d'utilisateurs distincts.
+        by_model (List[UsageBreakdown]): La répartition par modèle (prompts).
+        by_user (List[UsageBreakdown]): Les utilisateurs les plus actifs.
+        by_session (List[UsageBreakdown]): La répartition par page (prompts) ou session vocale (transcriptions).
+        timeline (List[TimelinePoint]): L'activité par intervalle.
+    """
+    total: int = 0
+    tokens: int = 0
+    users: int = 0
+    by_model: List[UsageBreakdown] = []
+    by_user: List[UsageBreakdown] = []
+    by_session: List[UsageBreakdown] = []
+    timeline: List[TimelinePoint] = []
+
+
+class UsageReport(BaseModel):
+    """
+    Tableau de bord d'usage calculé côté base (agrégations MongoDB).
+
+    Attributs:
+        start (datetime): Le début de la période (UTC).
+        end (datetime): La fin de la période (UTC), arrondie à l'intervalle de cache.
+        interval (str): La granularité de la chronologie (`hour` ou `day`).
+        session_id (Optional[str]): La session de formation filtrée (ses participants).
+        user_email (Optional[str]): L'utilisateur filtré.
+        prompts (SourceUsage): L'usage des assistants textuels.
+        images (SourceUsage): Les images générées.
+        videos (SourceUsage): Les vidéos générées.
+        transcripts (SourceUsage): Les transcriptions de l'agent vocal.
+        cached (bool): True si le rapport provient du cache.
+    """
+    start: datetime
+    end: datetime
+    interval: Literal["hour", "day"]
+    session_id: Optional[str] = None
+    user_email: Optional[str] = None
+    prompts: SourceUsage
+    images: SourceUsage
+    videos: SourceUsage
+    transcripts: SourceUsage
+    cached: bool = False
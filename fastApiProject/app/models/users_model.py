@@ -3,12 +3,9 @@ import re
 from bson import ObjectId
 from pydantic import BaseModel, Field, validator, SecretStr
 from typing import Optional, List
-from passlib.context import CryptContext
 
 from app.core.utils import load_roles, get_default_role, ROLES_FILEPATH
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Charger les rôles et le rôle par défaut depuis le fichier JSON
 ROLES = load_roles(ROLES_FILEPATH)
 DEFAULT_ROLE = get_default_role(ROLES_FILEPATH)
@@ -72,7 +69,7 @@ class UserCreate(UserBase):
     password: str
 
     @validator('password')
-    def hash_password(cls, value: str) -> str:
+    def validate_password(cls, value: str) -> str:
         """
         Valide que le mot de passe a une longueur minimale.
 
@@ -87,7 +84,8 @@ class UserCreate(UserBase):
         """
         if len(value) < 6:
             raise ValueError("Le mot de passe doit comporter au moins 6 caractères.")
-        return pwd_context.hash(value)  # Retourne le mot de passe déjà haché
+        # haché par UserCRUD.create_user, hors event loop
+        return value
 
 
 # Modèle pour l'affichage d'un utilisateur, inclut l'ID
@@ -125,9 +123,9 @@ class UserDisplay(UserBase):
         }
 
 
-class UserInDB(UserBase):
+class UserInDB(UserDisplay):
     """
-    Modèle pour les utilisateurs stockés dans la base de données. Inclut le mot de passe haché.
+    Modèle pour les utilisateurs stockés dans la base de données. Inclut l'ID et le mot de passe haché.
     """
     hashed_password: SecretStr
 
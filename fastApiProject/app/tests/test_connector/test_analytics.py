@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import mongomock
+from bson import ObjectId
+
+from app.crud.analytics_crud import AnalyticsCRUD
+
+
+class Testanalytics:
+
+    def test_usage_report_aggregates_sources_and_is_cached(self):
+        """
+        Le rapport compte les générations par modèle, utilisateur et jour, restreint aux participants
+        d'une session ; une seconde consultation de la même période vient du cache.
+        """
+        db = mongomock.MongoClient().db
+        day = datetime(2024, 5, 1, 9)
+        db.prompt_db.insert_many([
+            {"user_email": "a@x.fr", "model_used": "gpt-4o", "page": "chat", "created_at": day, "token_estimate": 10},
+            {"user_email": "a@x.fr", "model_used": "gpt-4o", "page": "chat", "created_at": day, "token_estimate": 20},
+            {"user_email": "b@x.fr", "model_used": "mistral", "page": "quiz",
+             "created_at": day + timedelta(days=1), "token_estimate": 5},
+            # hors session
+            {"user_email": "c@x.fr", "model_used": "gpt-4o", "page": "chat", "created_at": day, "token_estimate": 99},
+        ])
+        db.image_db.insert_one({"user_email": "b@x.fr", "created_at": day})
+        user_id = db.users_db.insert_one({"email": "a@x.fr"}).inserted_id
+        db.transcript_db.insert_one({"user_id": str(user_id), "session_id": "voice-1", "timestamp": day})
+        session_id = db.sessions_db.insert_one({
+            "emails": ["a@x.fr", "b@x.fr"], "start_time": day - timedelta(hours=1), "end_time": day + timedelta(days=2),
+        }).inserted_id
+        analytics = AnalyticsCRUD(cache_seconds=300, database=db)
+
+        report = analytics.usage_report(session_id=str(session_id))
+        prompts = report["prompts"]
+        assert (prompts["total"], prompts["tokens"], prompts["users"]) == (3, 35, 2)
+        assert prompts["by_model"][0] == {"key": "gpt-4o", "count": 2, "tokens": 30, "share": 0.6667}
+        assert [(row["key"], row["count"]) for row in prompts["by_session"]] == [("chat", 2), ("quiz", 1)]
+        assert [(point["bucket"], point["count"]) for point in prompts["timeline"]] == [
+            ("2024-05-01", 2), ("2024-05-02", 1)
+        ]
+        assert report["images"]["total"] == 1
+        assert report["transcripts"]["by_session"][0]["key"] == "voice-1"
+        assert not report["cached"]
+
+        db.prompt_db.insert_one({"user_email": "a@x.fr", "model_used": "gpt-4o", "created_at": day})
+        assert analytics.usage_report(session_id=str(session_id))["cached"]
+        assert analytics.usage_report(session_id=str(ObjectId())) is None
+
+        hourly = analytics.usage_report(day, day + timedelta(hours=2), interval="hour", user_email="c@x.fr")
+        assert [(point["bucket"], point["count"]) for point in hourly["prompts"]["timeline"]] == [
+            ("2024-05-01T09:00:00Z", 1)
+        ]
@@ -0,0 +1,80 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.connector.audio_transcoder import AudioFormats, AudioTranscoder
+
+
+class Testaudiotranscoder:
+
+    def test_negotiate_falls_back_to_defaults(self):
+        """
+        Les formats inconnus sont remplacés par les formats historiques (WebM en entrée, MP3 en sortie).
+        """
+        formats = AudioFormats.negotiate({"input_format": "amr", "output_format": "PCM"})
+        assert (formats.input_format, formats.output_format) == ("webm", "pcm")
+        assert formats.output_mime.startswith("audio/pcm")
+        assert AudioFormats.from_filename("note.m4a").input_format == "m4a"
+
+    def test_negotiate_validates_sample_rate(self):
+        """
+        La fréquence d'échantillonnage est un entier dans une plage plausible, sinon la négociation échoue.
+        """
+        assert AudioFormats.negotiate({"input_format": "pcm", "input_sample_rate": "48000"}).input_sample_rate == 48000
+        assert AudioFormats.negotiate({"input_format": "pcm"}).input_sample_rate is None
+        for invalid in ("48k", 0, -16000, 10 ** 9, True, [16000]):
+            with pytest.raises(ValueError):
+                AudioFormats.negotiate({"input_format": "pcm", "input_sample_rate": invalid})
+
+    @pytest.mark.asyncio
+    async def test_pcm_is_resampled_to_16k_mono(self):
+        """
+        Un PCM 48 kHz est ramené à 16 kHz mono, ce qui divise au moins par trois sa taille.
+        """
+        transcoder = AudioTranscoder(target_rate=16000)
+        transcoder.ffmpeg_path = None
+        tone = (np.sin(np.linspace(0, 2000 * np.pi, 48000)) * 12000).astype("<i2").tobytes()
+
+        audio, filename = await transcoder.normalize_for_stt(
+            tone, AudioFormats(input_format="pcm", input_sample_rate=48000)
+        )
+
+        samples, rate = sf.read(io.BytesIO(audio))
+        assert filename == "upload.flac"
+        assert rate == 16000 and samples.ndim == 1 and len(samples) == 16000
+        assert len(audio) < len(tone) / 3
+
+    @pytest.mark.asyncio
+    async def test_undecodable_audio_is_passed_through(self):
+        """
+        Sans ffmpeg, un WebM que soundfile ne sait pas lire est transmis tel quel avec la bonne extension.
+        """
+        transcoder = AudioTranscoder()
+        transcoder.ffmpeg_path = None
+
+        audio, filename = await transcoder.normalize_for_stt(b"\x1aE\xdf\xa3 webm", AudioFormats())
+
+        assert (audio, filename) == (b"\x1aE\xdf\xa3 webm", "upload.webm")
+
+    @pytest.mark.asyncio
+    async def test_pcm_fallback_gets_a_wav_header(self, monkeypatch):
+        """
+        Si la normalisation du PCM échoue, il est transmis dans un conteneur WAV plutôt que sans en-tête.
+        """
+        transcoder = AudioTranscoder()
+
+        def fail(*args):
+            raise RuntimeError("FLAC indisponible")
+
+        monkeypatch.setattr(transcoder, "_pcm_to_flac", fail)
+        pcm = np.arange(800, dtype="<i2").tobytes() + b"\x00"
+
+        audio, filename = await transcoder.normalize_for_stt(pcm, AudioFormats(input_format="pcm", input_sample_rate=8000))
+
+        assert filename == "upload.wav"
+        with wave.open(io.BytesIO(audio)) as wav:
+            assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 8000)
+            assert wav.readframes(wav.getnframes()) == pcm[:-1]
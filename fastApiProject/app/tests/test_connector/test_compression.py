@@ -0,0 +1,70 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse("x" * 5000, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("x" * 10)
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield b"x" * 1000
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+class Testcompression:
+
+    def test_negotiate_by_quality_then_server_preference(self):
+        """
+        L'encodage de plus forte valeur `q` l'emporte, la préférence du serveur départage les
+        égalités ; `q=0` exclut un encodage.
+        """
+        assert negotiate("gzip, br", ["br", "gzip"]) == "br"
+        assert negotiate("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+        assert negotiate("br;q=0, *", ["br", "gzip"]) == "gzip"
+        assert negotiate("identity", ["br", "gzip"]) is None
+        assert negotiate("", ["gzip"]) is None
+
+    def test_compresses_single_body_responses_above_threshold(self):
+        """
+        Une réponse assez grande est compressée (`Vary` et ETag faible) ; une petite réponse, un
+        flux ou un client sans `Accept-Encoding` la reçoivent telle quelle.
+        """
+        client = TestClient(build_app())
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == 'W/"v1"'
+        assert int(response.headers["content-length"]) < 5000
+        assert response.text == "x" * 5000
+
+        raw = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in raw.headers
+        assert raw.headers["etag"] == '"v1"'
+
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in streamed.headers
+        assert streamed.content == b"x" * 3000
+
+    def test_gzip_body_is_valid(self):
+        """Le corps compressé se décompresse en la réponse d'origine."""
+        app = CompressionMiddleware(build_app(), minimum_size=100)
+        assert gzip.decompress(app.compress(b"y" * 2000, "gzip")) == b"y" * 2000
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import mongomock
+from starlette.requests import Request
+
+from app.core.conditional import collection_version, list_etag, not_modified
+
+
+def request_with(if_none_match: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/users/", "query_string": b"",
+                    "headers": [(b"if-none-match", if_none_match.encode())]})
+
+
+class Testconditional:
+
+    def test_version_changes_on_insert_update_and_delete(self):
+        """
+        La version d'une liste change à chaque insertion, mise à jour horodatée ou suppression,
+        et reste stable sinon.
+        """
+        collection = mongomock.MongoClient().db.prompt_db
+        query = {"user_email": "a@x.fr"}
+        versions = [collection_version(collection, query)]
+        first = collection.insert_one({"user_email": "a@x.fr", "page": "p"}).inserted_id
+        versions.append(collection_version(collection, query))
+        assert versions[-1] == collection_version(collection, query)
+        collection.insert_one({"user_email": "b@x.fr", "page": "p"})
+        assert versions[-1] == collection_version(collection, query)
+        collection.insert_one({"user_email": "a@x.fr", "page": "p"})
+        versions.append(collection_version(collection, query))
+        collection.update_one({"_id": first}, {"$set": {"page": "q", "updated_at": datetime.now(timezone.utc)}})
+        versions.append(collection_version(collection, query))
+        collection.delete_one({"_id": first})
+        versions.append(collection_version(collection, query))
+        assert len({list_etag(version) for version in versions}) == len(versions)
+
+    def test_not_modified_uses_weak_comparison(self):
+        """`If-None-Match` correspond à l'ETag (préfixe W/ ignoré, liste ou `*`) : réponse 304."""
+        etag = list_etag("v1")
+        response = not_modified(request_with(etag.removeprefix("W/")), etag)
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert not_modified(request_with(f'W/"other", {etag}'), etag) is not None
+        assert not_modified(request_with("*"), etag) is not None
+        assert not_modified(request_with('W/"other"'), etag) is None
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.core.container import Container
+
+
+class Testcontainer:
+
+    @pytest.mark.asyncio
+    async def test_resources_are_built_once_and_closed_in_reverse_order(self):
+        """
+        Une ressource est construite une seule fois, au premier usage ; à la fermeture, les ressources
+        construites sont libérées dans l'ordre inverse et les remplaçants conservés.
+        """
+        closed = []
+
+        async def close(instance):
+            closed.append(instance["name"])
+
+        container = Container()
+        container.register("pool", lambda: {"name": "pool"}, close=close)
+        container.register("crud", lambda: {"name": "crud"}, close=close)
+        container.register("voice_agent", lambda: {"name": "voice_agent"}, close=close)
+
+        pool = container.get("pool")
+        assert container.get("pool") is pool
+        container.get("crud")
+        fake = {"name": "fake"}
+        container.override("voice_agent", fake)
+
+        await container.close()
+        assert closed == ["crud", "pool"]
+        assert container.get("voice_agent") is fake
+        assert container.get("pool") is not pool
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_streams_and_background_tasks(self):
+        """
+        L'arrêt attend la fin des réponses en streaming et des tâches d'arrière-plan ; au-delà du
+        délai, les tâches restantes sont annulées.
+        """
+        container = Container()
+        finished = []
+
+        async def turn():
+            await asyncio.sleep(0.05)
+            finished.append("turn")
+
+        async def body():
+            for chunk in (b"a", b"b"):
+                await asyncio.sleep(0.05)
+                yield chunk
+
+        async def consume():
+            return [chunk async for chunk in container.track(body())]
+
+        container.spawn(turn())
+        response = asyncio.ensure_future(consume())
+        await asyncio.sleep(0)
+        assert container.inflight == 2
+
+        assert await container.drain(timeout=2.0)
+        assert finished == ["turn"]
+        assert await response == [b"a", b"b"]
+        assert container.inflight == 0
+
+        stuck = container.spawn(asyncio.sleep(10))
+        assert not await container.drain(timeout=0.05)
+        await asyncio.sleep(0)
+        assert stuck.cancelled()
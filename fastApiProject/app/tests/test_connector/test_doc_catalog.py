@@ -0,0 +1,55 @@
+import json
+
+import mongomock
+import pytest
+
+from app.connector.doc_catalog import DocCatalog
+
+
+DOCS = [
+    {"title": "Python", "url": "https://docs.python.org/3/", "avatar": "P", "description": "Python.", "categorie": "technique"},
+    {"title": "RGPD", "url": "https://www.cnil.fr/", "avatar": "R", "description": "CNIL.", "categorie": "juridique"},
+]
+
+
+class Testdoccatalog:
+
+    @pytest.mark.asyncio
+    async def test_serves_prebuilt_lists_by_category(self):
+        """
+        Le catalogue est chargé au premier appel ; chaque liste est servie déjà sérialisée, avec
+        les champs de `DocDisplay` seulement, et une catégorie inconnue donne une liste vide.
+        """
+        collection = mongomock.MongoClient().db.documentation_db
+        collection.insert_many([dict(doc) for doc in DOCS])
+        catalog = DocCatalog(collection=collection)
+        assert catalog.lookup() is None
+
+        _, body = await catalog.get()
+        assert [doc["title"] for doc in json.loads(body)] == ["Python", "RGPD"]
+        assert "avatar" not in json.loads(body)[0]
+        _, body = await catalog.get("juridique")
+        assert [doc["title"] for doc in json.loads(body)] == ["RGPD"]
+        etag, body = await catalog.get("inconnue")
+        assert body == b"[]"
+        assert etag != catalog.lookup()[0]
+
+    def test_rebuilds_only_when_the_collection_changes(self):
+        """
+        Le contrôle périodique ne reconstruit le catalogue (et ne change les ETags) que si la
+        collection a changé.
+        """
+        collection = mongomock.MongoClient().db.documentation_db
+        collection.insert_many([dict(doc) for doc in DOCS])
+        catalog = DocCatalog(collection=collection)
+        assert catalog.refresh() is True
+        etag = catalog.lookup("technique")[0]
+        assert catalog.refresh() is False
+        assert catalog.lookup("technique")[0] == etag
+
+        collection.insert_one({"title": "FastAPI", "url": "https://fastapi.tiangolo.com/", "avatar": "F",
+                               "description": "FastAPI.", "categorie": "technique"})
+        assert catalog.refresh() is True
+        etag, body = catalog.lookup("technique")
+        assert [doc["title"] for doc in json.loads(body)] == ["Python", "FastAPI"]
+        assert catalog.lookup("technique")[0] == etag
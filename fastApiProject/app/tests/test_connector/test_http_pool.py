@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.connector.http_pool import HTTPClientPool
+
+
+class Testhttppool:
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit_and_client_reuse(self):
+        """
+        Les requêtes simultanées vers un même hôte sont bornées sans ralentir les autres hôtes ; le
+        client est partagé jusqu'à la fermeture du pool, puis recréé.
+        """
+        active = {"api.openai.com": 0, "api.eu.mailgun.net": 0}
+        peak = dict(active)
+
+        async def handler(request: httpx.Request):
+            host = request.url.host
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.02)
+            active[host] -= 1
+            return httpx.Response(200, text=host)
+
+        pool = HTTPClientPool(max_per_host=2, http2=False, transport=httpx.MockTransport(handler))
+        client = pool.client
+        responses = await asyncio.gather(
+            *(pool.request("POST", "https://api.openai.com/v1/realtime") for _ in range(6)),
+            *(pool.request("POST", "https://api.eu.mailgun.net/v3/messages") for _ in range(2)),
+        )
+        assert [r.status_code for r in responses] == [200] * 8
+        assert responses[0].text == "api.openai.com"
+        assert peak == {"api.openai.com": 2, "api.eu.mailgun.net": 2}
+        assert pool.client is client
+
+        await pool.close()
+        assert client.is_closed
+        assert (await pool.request("GET", "https://api.openai.com/")).status_code == 200
+        assert pool.client is not client
+        await pool.close()
@@ -0,0 +1,131 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from app.connector.live_updates import AUTO, POLLING, RESYNC, LiveUpdates
+
+
+def user(email, roles=("Formé",)):
+    return SimpleNamespace(email=email, roles=list(roles))
+
+
+def prompt(email):
+    return {"_id": ObjectId(), "user_email": email, "user_prompt": "Bonjour", "generated_response": "Salut",
+            "model_used": "gpt", "page": "conversation", "image": None, "image_name": None}
+
+
+def session(emails):
+    return {"_id": ObjectId(), "session_name": "Formation", "start_time": datetime(2026, 1, 5, 9),
+            "end_time": datetime(2026, 1, 5, 11), "formateur_name": "Alice", "emails": emails}
+
+
+def received(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(json.loads(subscriber.queue.get_nowait()))
+    return messages
+
+
+class Testliveupdates:
+
+    @pytest.mark.asyncio
+    async def test_changes_reach_owners_and_topic_roles_only(self):
+        """
+        Un changement n'est remis qu'au propriétaire du document (ou aux participants d'une session)
+        et aux rôles du sujet, projeté sur le modèle de réponse ; les sujets choisis filtrent.
+        """
+        live = LiveUpdates(source=POLLING, poll_interval=60, db=mongomock.MongoClient().db)
+        owner, other = live.subscribe(user("a@x.fr")), live.subscribe(user("b@x.fr"))
+        trainer = live.subscribe(user("t@x.fr", ["Formateur-int"]))
+        images_only = live.subscribe(user("a@x.fr"), ["images"])
+
+        document = prompt("a@x.fr")
+        live.dispatch("prompt_db", "insert", document["_id"], document)
+        [message] = received(owner)
+        assert message["topic"] == "prompts" and message["operation"] == "insert"
+        assert message["document"]["prompt_id"] == str(document["_id"])
+        assert "_id" not in message["document"]
+        assert received(other) == received(trainer) == received(images_only) == []
+
+        document = session(["b@x.fr"])
+        live.dispatch("sessions_db", "update", document["_id"], document)
+        assert [m["document"]["session_name"] for m in received(other)] == ["Formation"]
+        assert [m["topic"] for m in received(trainer)] == ["sessions"]
+        assert received(owner) == []
+        # suppression : propriétaire inconnu, seuls les rôles du sujet sont prévenus
+        live.dispatch("sessions_db", "delete", document["_id"], None)
+        assert [m["operation"] for m in received(trainer)] == ["delete"]
+        assert received(other) == []
+
+        with pytest.raises(ValueError):
+            live.subscribe(user("a@x.fr"), ["comments"])
+        await live.stop()
+
+    @pytest.mark.asyncio
+    async def test_polling_relays_inserts_and_updates(self):
+        """
+        Sans change stream (mongod autonome, ici mongomock), le mode `auto` suit les insertions par
+        `_id` et les mises à jour par `updated_at` ; l'arrêt termine le flux des abonnés.
+        """
+        db = mongomock.MongoClient().db
+        db.image_db.insert_one({"prompt": "ancienne", "image_url": "https://x/0.png", "user_email": "a@x.fr",
+                                "created_at": datetime.now(timezone.utc)})
+        existing = session(["a@x.fr"])
+        db.sessions_db.insert_one(existing)
+        live = LiveUpdates(source=AUTO, poll_interval=0.02, db=db)
+        subscriber = live.subscribe(user("a@x.fr"))
+
+        async def next_message():
+            return json.loads(await asyncio.wait_for(subscriber.queue.get(), 2))
+
+        await asyncio.sleep(0.1)
+        assert live.mode == POLLING
+        db.image_db.insert_one({"prompt": "nouvelle", "image_url": "https://x/1.png", "user_email": "a@x.fr",
+                                "created_at": datetime.now(timezone.utc)})
+        message = await next_message()
+        assert (message["topic"], message["operation"], message["document"]["prompt"]) == ("images", "insert", "nouvelle")
+
+        db.sessions_db.update_one({"_id": existing["_id"]},
+                                  {"$set": {"session_name": "Renommée", "updated_at": datetime.now(timezone.utc)}})
+        message = await next_message()
+        assert (message["topic"], message["operation"], message["document"]["session_name"]) == ("sessions", "update", "Renommée")
+
+        await live.stop()
+        assert await asyncio.wait_for(subscriber.queue.get(), 1) is None
+
+    def test_idle_polling_advances_cursors(self):
+        """Sans abonné, le polling avance ses curseurs : le premier abonné ne reçoit pas un historique rejoué."""
+        db = mongomock.MongoClient().db
+        live = LiveUpdates(source=POLLING, db=db)
+        cursors = live._poll_start()
+        dispatched = []
+        live._dispatch_threadsafe = lambda *args: dispatched.append(args)
+
+        # changements survenus sans abonné
+        db.prompt_db.insert_one(prompt("a@x.fr"))
+        db.sessions_db.insert_one({**session(["a@x.fr"]), "updated_at": datetime.now(timezone.utc)})
+        live._poll(cursors)
+
+        live._subscribers.add(object())
+        live._poll(cursors)
+        assert dispatched == []
+        db.prompt_db.insert_one(prompt("a@x.fr"))
+        live._poll(cursors)
+        assert [(collection, operation) for collection, operation, *_ in dispatched] == [("prompt_db", "insert")]
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_a_resync(self):
+        """Une file saturée est remplacée par une demande de resynchronisation : la mémoire reste bornée."""
+        live = LiveUpdates(source=POLLING, poll_interval=60, queue_size=2, db=mongomock.MongoClient().db)
+        subscriber = live.subscribe(user("a@x.fr"))
+        for _ in range(3):
+            document = prompt("a@x.fr")
+            live.dispatch("prompt_db", "insert", document["_id"], document)
+        assert subscriber.queue.qsize() == 1
+        assert subscriber.queue.get_nowait() == RESYNC
+        await live.stop()
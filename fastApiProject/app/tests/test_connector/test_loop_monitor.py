@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import LoopMonitor
+
+
+class Testloopmonitor:
+
+    @pytest.mark.asyncio
+    async def test_stall_is_attributed_to_route_with_stack(self):
+        """
+        Un appel bloquant dans une requête est attribué à la route de la requête, avec la pile du
+        code bloquant capturée pendant le blocage.
+        """
+        monitor = LoopMonitor(interval=0.01, threshold=0.05, sample_stacks=True)
+        monitor.start()
+        await asyncio.sleep(0.05)
+
+        class Route:
+            path = "/prompts/{prompt_id}"
+
+        async def handler():
+            monitor.enter(asyncio.current_task(), {"type": "http", "method": "GET", "path": "/prompts/42",
+                                                   "route": Route()})
+            try:
+                time.sleep(0.3)
+            finally:
+                monitor.leave(asyncio.current_task())
+
+        await asyncio.create_task(handler())
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        report = monitor.report()
+        assert report["running"] is False
+        assert report["max_lag_ms"] >= 200
+        stall = report["stalls"][0]
+        assert stall["route"] == "GET /prompts/{prompt_id}"
+        assert stall["lag_ms"] >= 200
+        assert any("time.sleep" in line for line in stall["stack"])
+        assert report["stalls_by_route"]["GET /prompts/{prompt_id}"] >= 1
@@ -0,0 +1,59 @@
+from pymongo import MongoClient, monitoring
+
+from app.connector.connectorBDD import available_compressors, mongo_client_options
+from app.connector.mongo_metrics import (
+    PoolMetricsListener, mongo_pool_checkout_failures, mongo_pool_checkout_seconds, mongo_pool_connections,
+    mongo_pool_in_use, mongo_pool_max_size, mongo_pool_waiting,
+)
+
+
+class Testmongopool:
+
+    def test_client_options_come_from_settings_without_credentials_in_url(self):
+        """
+        Les options du client reprennent les réglages (pool, délais, préférence de lecture) ; les
+        compressions dont le paquet manque sont ignorées et les identifiants ne sont pas dans l'URL.
+        """
+        assert available_compressors("zstd-missing, zlib") == ["zlib"]
+
+        options = mongo_client_options()
+        assert options["host"] == ["mongodb:27017"]
+        assert options["serverSelectionTimeoutMS"] == 5000
+        assert options["maxPoolSize"] == 50
+        assert "zlib" in options["compressors"]
+
+        client = MongoClient(**options, connect=False)
+        assert client.options.pool_options.max_pool_size == 50
+        assert client.options.server_selection_timeout == 5
+        assert client.options.read_preference.mongos_mode == "primary"
+        client.close()
+
+    def test_pool_listener_tracks_utilisation_and_waits(self):
+        """
+        Le listener suit les connexions ouvertes, empruntées et en attente, et compte les emprunts échoués.
+        """
+        address = ("pool-test", 27017)
+        server = "pool-test:27017"
+        listener = PoolMetricsListener()
+
+        listener.pool_created(monitoring.PoolCreatedEvent(address, {"maxPoolSize": 8}))
+        listener.connection_created(monitoring.ConnectionCreatedEvent(address, 1))
+        listener.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(address))
+        assert mongo_pool_waiting.value(server=server) == 1
+        listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1))
+
+        assert mongo_pool_max_size.value(server=server) == 8
+        assert mongo_pool_connections.value(server=server) == 1
+        assert mongo_pool_in_use.value(server=server) == 1
+        assert mongo_pool_waiting.value(server=server) == 0
+        assert mongo_pool_checkout_seconds.count(server=server) == 1
+
+        listener.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(address))
+        listener.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(address, "timeout"))
+        listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+        listener.connection_closed(monitoring.ConnectionClosedEvent(address, 1, "idle"))
+
+        assert mongo_pool_checkout_failures.value(server=server, reason="timeout") == 1
+        assert mongo_pool_in_use.value(server=server) == 0
+        assert mongo_pool_connections.value(server=server) == 0
+        assert mongo_pool_waiting.value(server=server) == 0
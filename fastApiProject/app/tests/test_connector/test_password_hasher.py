@@ -0,0 +1,29 @@
+import pytest
+
+from app.core.password_hasher import PasswordHasher, crypt_context
+
+
+class Testpasswordhasher:
+
+    @pytest.mark.asyncio
+    async def test_verify_rehashes_when_cost_changes(self):
+        """
+        Un hash d'un autre coût est accepté puis remplacé par un hash au coût courant ; un hash au
+        coût courant ou un mauvais mot de passe ne produisent pas de nouveau hash.
+        """
+        hasher = PasswordHasher(rounds=5, workers=2)
+        try:
+            old_hash = crypt_context(4).hash("secret-password")
+
+            valid, new_hash = await hasher.verify("secret-password", old_hash)
+            assert valid
+            assert new_hash.startswith("$2b$05$")
+
+            assert await hasher.verify("secret-password", new_hash) == (True, None)
+            assert (await hasher.verify("wrong-password", old_hash))[0] is False
+
+            hashed = await hasher.hash("other-password")
+            assert hashed.startswith("$2b$05$")
+            assert hasher.hash_many(["a", "b"])[1].startswith("$2b$05$")
+        finally:
+            hasher.shutdown()
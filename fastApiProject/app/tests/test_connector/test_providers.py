@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.providers import ProviderRegistry
+
+
+class Testproviders:
+
+    def test_clients_are_built_once_on_first_use(self):
+        """
+        Un client n'est construit qu'au premier usage, une seule fois même en concurrence ; un
+        fournisseur en erreur au préchauffage est ignoré et retenté au premier usage.
+        """
+        built = []
+        registry = ProviderRegistry()
+        registry.register("openai", lambda: built.append("openai") or object())
+
+        def failing():
+            raise RuntimeError("SDK missing")
+
+        registry.register("gemini", failing)
+        assert built == []
+
+        with ThreadPoolExecutor(8) as pool:
+            clients = list(pool.map(lambda _: registry.get("openai"), range(16)))
+        assert built == ["openai"]
+        assert all(client is clients[0] for client in clients)
+
+        assert registry.warm_up(["openai", "gemini"]) == ["openai"]
+
+        fake = object()
+        registry.override("openai", fake)
+        assert registry.get("openai") is fake
+        registry.reset("openai")
+        assert registry.get("openai") is not fake
+        assert built == ["openai", "openai"]
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+
+from app.core.rate_limit import InMemoryRateLimitBackend, MongoRateLimitBackend, RateLimiter, load_rate_limits
+
+
+SCOPES = {
+    "video": {"window_seconds": 60, "roles": {"SuperAdmin": None, "Formé": 2, "Banni": 0}, "session": 3},
+}
+
+
+class Testratelimit:
+
+    @pytest.mark.parametrize("backend", [InMemoryRateLimitBackend, lambda: MongoRateLimitBackend(
+        mongomock.MongoClient().db.rate_limit_db)])
+    def test_sliding_window_rejects_with_retry_after(self, backend):
+        """
+        Au-delà de la limite, l'appel est rejeté avec le délai avant qu'une place se libère ; la
+        fenêtre précédente compte au prorata de sa part encore couverte.
+        """
+        backend = backend()
+        # début d'une fenêtre proche de maintenant (les compteurs en base expirent par index TTL)
+        start = time.time() // 60 * 60
+        assert backend.hit("k", 2, 60, start) is None
+        assert backend.hit("k", 2, 60, start + 10) is None
+        # fenêtre pleine : une place dans la fenêtre suivante, quand la précédente pèse moins de 1/2
+        assert backend.hit("k", 2, 60, start + 20) == pytest.approx(40 + 30)
+        # fenêtre suivante, 30 s écoulées : 2 x 0.5 = 1 appel estimé, une place
+        assert backend.hit("k", 2, 60, start + 90) is None
+        # plus de place : la fenêtre courante est pleine (2 x 0.48 + 1 > 1)
+        assert backend.hit("k", 2, 60, start + 91) == pytest.approx(60 - 31)
+        assert backend.hit("banned", 0, 60, start) == 60
+
+    @pytest.mark.asyncio
+    async def test_limits_by_role_and_training_session(self):
+        """
+        La limite la plus permissive des rôles s'applique ; les participants d'une session de
+        formation en cours partagent en plus une limite commune.
+        """
+        sessions = mongomock.MongoClient().db.sessions_db
+        now = datetime.utcnow()
+        sessions.insert_one({"emails": ["a@x.fr", "b@x.fr"], "start_time": now - timedelta(hours=1),
+                             "end_time": now + timedelta(hours=1)})
+        limiter = RateLimiter(SCOPES, sessions=sessions)
+
+        def user(uid, roles):
+            return SimpleNamespace(id=uid, email=f"{uid}@x.fr", roles=roles)
+
+        a, b = user("a", ["Formé"]), user("b", ["Formé"])
+        assert await limiter.check("video", a) is None
+        assert await limiter.check("video", a) is None
+        assert await limiter.check("video", a) is not None
+        # troisième appel de la session : accepté ; le quatrième dépasse la limite commune
+        assert await limiter.check("video", b) is None
+        assert await limiter.check("video", b) is not None
+
+        assert limiter.user_limit("video", ["Formé", "SuperAdmin"]) is None
+        assert await limiter.check("video", user("c", ["Banni"])) is not None
+        assert await limiter.check("video", user("d", ["SuperAdmin"])) is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", [InMemoryRateLimitBackend, lambda: MongoRateLimitBackend(
+        mongomock.MongoClient().db.rate_limit_db)])
+    async def test_session_rejection_does_not_consume_user_quota(self, backend):
+        """Un appel rejeté par la limite de la session n'est pas compté dans le quota de l'utilisateur."""
+        backend = backend()
+        sessions = mongomock.MongoClient().db.sessions_db
+        now = datetime.utcnow()
+        sessions.insert_one({"emails": ["a@x.fr", "b@x.fr"], "start_time": now - timedelta(hours=1),
+                             "end_time": now + timedelta(hours=1)})
+        limiter = RateLimiter(SCOPES, backend=backend, sessions=sessions)
+        a = SimpleNamespace(id="a", email="a@x.fr", roles=["Formé"])
+        b = SimpleNamespace(id="b", email="b@x.fr", roles=["Formé"])
+
+        assert await limiter.check("video", a) is None
+        assert await limiter.check("video", a) is None
+        assert await limiter.check("video", b) is None
+        assert await limiter.check("video", b) is not None
+        # un seul appel de b compté : il lui reste une place
+        assert backend.hit("video|user|b", 2, 60, time.time()) is None
+
+    @pytest.mark.asyncio
+    async def test_limit_can_be_keyed_per_connection(self):
+        """Une clé explicite (une connexion) a son propre compteur, indépendant des autres connexions de l'utilisateur."""
+        limiter = RateLimiter(SCOPES, sessions=mongomock.MongoClient().db.sessions_db)
+        a = SimpleNamespace(id="a", email="a@x.fr", roles=["Formé"])
+        assert await limiter.check("video", a, key="connection-1") is None
+        assert await limiter.check("video", a, key="connection-1") is None
+        assert await limiter.check("video", a, key="connection-1") is not None
+        assert await limiter.check("video", a, key="connection-2") is None
+
+    def test_configured_roles_exist(self):
+        """Les rôles des quotas sont ceux de `auth_roles.json`."""
+        scopes = load_rate_limits()
+        assert {"prompt", "image", "video", "voice", "ws_message"} <= set(scopes)
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List
+
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.serialization import documents_response
+from app.models.eleven_model import MessageDisplay
+from app.models.prompt_model import PromptDisplay
+from app.models.users_model import UserDisplay
+
+
+DOCUMENTS = {
+    UserDisplay: {"_id": ObjectId(), "email": "a@x.fr", "roles": ["Formé"], "hashed_password": "secret"},
+    PromptDisplay: {"prompt_id": str(ObjectId()), "message": None, "user_email": "a@x.fr", "user_prompt": "Salut",
+                    "generated_response": "Bonjour", "model_used": "gpt", "page": "chat"},
+    MessageDisplay: {"_id": ObjectId(), "kind": "message", "session_id": "s1", "role": "user", "text": "Bonjour",
+                     "created_at": datetime(2024, 5, 1, 9, 0, 0, 123000)},
+}
+
+
+class Testserialization:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("model", list(DOCUMENTS))
+    async def test_fast_path_matches_response_model_serialization(self, model):
+        """
+        Les documents sérialisés directement donnent le même JSON que le chemin habituel (modèles
+        construits puis revalidés par `response_model`) ; les champs hors modèle ne sortent pas.
+        """
+        documents = [DOCUMENTS[model]]
+        field = create_response_field(name="Response", type_=List[model])
+        expected = await serialize_response(field=field, response_content=[model(**d) for d in documents])
+
+        body = orjson.loads(documents_response(documents, model).body)
+        assert body == orjson.loads(JSONResponse(expected).body)
+        assert "hashed_password" not in body[0] and "kind" not in body[0]
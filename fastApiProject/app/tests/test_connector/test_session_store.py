@@ -0,0 +1,67 @@
+import json
+
+import mongomock
+import pytest
+
+from app.connector.pubsub import LocalPubSub
+from app.connector.session_store import InMemorySessionStore, MongoSessionStore
+from app.connector.ws_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+class Testsessionstore:
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["memory", "mongo"])
+    async def test_resume_keeps_bounded_history(self, backend):
+        """
+        Une session reprise retrouve son historique (borné) et son dernier tour, pour son seul propriétaire.
+        """
+        if backend == "mongo":
+            store = MongoSessionStore(mongomock.MongoClient().db.voice_session_db, ttl_seconds=60, max_history=4)
+        else:
+            store = InMemorySessionStore(ttl_seconds=60, max_history=4)
+        session = await store.create("user-1", [{"role": "user", "content": "Bonjour"}])
+
+        for turn in (1, 2):
+            await store.append_history(session["session_id"], [
+                {"role": "user", "content": f"question {turn}"},
+                {"role": "assistant", "content": f"réponse {turn}"},
+            ], turn)
+
+        resumed = await store.get(session["session_id"], "user-1")
+        assert resumed["turn_id"] == 2
+        assert [m["content"] for m in resumed["history"]] == ["question 1", "réponse 1", "question 2", "réponse 2"]
+        assert await store.get(session["session_id"], "user-2") is None
+
+        await store.reset_history(session["session_id"])
+        assert (await store.get(session["session_id"], "user-1"))["history"] == []
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_other_workers(self):
+        """
+        Un broadcast atteint les WebSockets de la session portées par un autre gestionnaire (worker),
+        sans être renvoyé deux fois aux WebSockets locales.
+        """
+        pubsub = LocalPubSub()
+        worker_a, worker_b = ConnectionManager(pubsub), ConnectionManager(pubsub)
+        ws_a, ws_b, ws_other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect("s1", ws_a)
+        await worker_b.connect("s1", ws_b)
+        await worker_b.connect("s2", ws_other)
+
+        await worker_a.broadcast("s1", {"role": "user", "text": "Bonjour"})
+
+        assert ws_a.sent == [{"role": "user", "text": "Bonjour"}]
+        assert ws_b.sent == [{"role": "user", "text": "Bonjour"}]
+        assert ws_other.sent == []
@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.auth.revocation import TokenRevocationList
+
+
+class Testtokenrevocation:
+
+    def test_revocations_are_shared_through_the_collection(self):
+        """
+        Une révocation est immédiate sur le worker qui la fait et visible des autres workers après
+        rechargement ; les jetons expirés ne sont pas rechargés.
+        """
+        collection = mongomock.MongoClient().db.revoked_token_db
+        worker_a = TokenRevocationList(collection=collection)
+        worker_b = TokenRevocationList(collection=collection)
+        expires_at = datetime.utcnow() + timedelta(minutes=15)
+
+        worker_a.revoke("jti-1", expires_at)
+        worker_a.revoke("jti-expired", datetime.utcnow() - timedelta(minutes=1))
+        assert worker_a.is_revoked("jti-1")
+        assert not worker_b.is_revoked("jti-1")
+
+        worker_b.refresh()
+        assert worker_b.is_revoked("jti-1")
+        assert not worker_b.is_revoked("jti-expired")
+        assert not worker_b.is_revoked(None)
+
+        # un second enregistrement du même jeton ne crée pas de doublon
+        assert worker_b.revoke("jti-1", expires_at) is False
+        assert collection.count_documents({"jti": "jti-1"}) == 1
+
+    def test_concurrent_revocations_have_a_single_winner(self):
+        """Parmi des révocations concurrentes du même jeton, sur plusieurs workers, une seule l'emporte."""
+        collection = mongomock.MongoClient().db.revoked_token_db
+        workers = [TokenRevocationList(collection=collection) for _ in range(4)]
+        expires_at = datetime.utcnow() + timedelta(days=7)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: workers[i % 4].revoke("jti-race", expires_at), range(16)))
+        assert results.count(True) == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_token_is_exchanged_only_once(self, monkeypatch):
+        """Deux échanges concurrents du même token de rafraîchissement : un seul obtient une paire."""
+        from app.api.endpoints import login
+        from app.auth.oauth2 import create_token_pair
+        from app.models.token import RefreshRequest
+        from app.models.users_model import UserDisplay
+
+        db = mongomock.MongoClient().db
+        user = {"_id": ObjectId(), "email": "a@example.com", "is_active": True, "roles": ["Formé"]}
+        db.users_db.insert_one(user)
+        monkeypatch.setattr(login, "revocation_list", TokenRevocationList(collection=db.revoked_token_db))
+        monkeypatch.setattr(login, "UserCRUD", lambda: SimpleNamespace(db=db.users_db))
+        refresh_token = create_token_pair(UserDisplay(**user))["refresh_token"]
+
+        results = await asyncio.gather(
+            *(login.refresh(RefreshRequest(refresh_token=refresh_token)) for _ in range(2)),
+            return_exceptions=True,
+        )
+        assert sum(isinstance(result, dict) for result in results) == 1
+        [rejected] = [result for result in results if isinstance(result, HTTPException)]
+        assert rejected.status_code == 401
+
+    def test_user_revocation_rejects_earlier_access_tokens(self, monkeypatch):
+        """
+        Après la suppression ou le changement de rôle d'un utilisateur, ses jetons d'accès déjà
+        émis sont refusés, sur tous les workers ; un jeton émis ensuite est accepté.
+        """
+        from app.api import dependencies
+        from app.auth.oauth2 import create_token_pair, decode_token
+        from app.models.users_model import UserDisplay
+
+        collection = mongomock.MongoClient().db.revoked_token_db
+        worker_a = TokenRevocationList(collection=collection)
+        worker_b = TokenRevocationList(collection=collection)
+        user = UserDisplay(id=str(ObjectId()), email="a@example.com", is_active=True, roles=["Formé"])
+        token = create_token_pair(user)["access_token"]
+        issued_at = decode_token(token)["iat"]
+
+        worker_a.revoke_user(user.id)
+        assert worker_a.is_user_revoked(user.id, issued_at - 1)
+        assert not worker_a.is_user_revoked(user.id, issued_at + 1)
+        assert not worker_a.is_user_revoked(str(ObjectId()), issued_at - 1)
+        worker_b.refresh()
+        assert worker_b.is_user_revoked(user.id, issued_at - 1)
+
+        monkeypatch.setattr(dependencies, "revocation_list", worker_b)
+        worker_b._users[user.id] = issued_at + 1
+        with pytest.raises(HTTPException) as error:
+            dependencies._user_from_token(token)
+        assert error.value.status_code == 401
+        worker_b._users[user.id] = issued_at
+        assert dependencies._user_from_token(token).roles == ["Formé"]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsRegistry, render_prometheus
+from app.core.tracing import current_turn, mark, span, start_turn
+
+
+class Testtracing:
+
+    @pytest.mark.asyncio
+    async def test_turn_trace_marks_and_spans(self):
+        """
+        Une étape n'est notée qu'à sa première occurrence, les durées s'additionnent, et les tâches
+        créées pendant le tour partagent la trace.
+        """
+        trace = start_turn("test")
+        with span("stt"):
+            await asyncio.sleep(0.01)
+        with span("stt"):
+            await asyncio.sleep(0.01)
+
+        async def worker():
+            mark("llm_first_token")
+
+        await asyncio.create_task(worker())
+        first = trace.marks["llm_first_token"]
+        mark("llm_first_token")
+        assert trace.marks["llm_first_token"] == first
+
+        timings = trace.finish()
+        assert current_turn() is trace
+        assert timings["stt_duration"] >= 20
+        assert timings["total"] >= timings["llm_first_token"]
+        # un second appel ne réenregistre pas le tour
+        assert trace.finish() == timings
+
+    def test_prometheus_rendering_and_percentiles(self):
+        """
+        Les histogrammes sont exportés en buckets cumulés avec leurs quantiles estimés.
+        """
+        metrics = MetricsRegistry()
+        hist = metrics.histogram("latency_seconds", "Latence.", buckets=(0.1, 0.5, 1.0))
+        for value in (0.05, 0.2, 0.3, 0.4, 0.8):
+            hist.observe(value, route="ws")
+        metrics.counter("requests_total", "Requêtes.").inc(3, path='/a"b')
+
+        assert hist.percentile(0.5, route="ws") == pytest.approx(0.3)
+        assert hist.percentile(0.99, route="ws") <= 1.0
+        assert hist.percentile(0.5, route="rest") is None
+
+        text = render_prometheus(metrics)
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{route="ws",le="0.5"} 4' in text
+        assert 'latency_seconds_bucket{route="ws",le="+Inf"} 5' in text
+        assert 'latency_seconds_count{route="ws"} 5' in text
+        assert 'latency_seconds_quantile{route="ws",quantile="0.95"}' in text
+        assert 'requests_total{path="/a\\"b"} 3' in text
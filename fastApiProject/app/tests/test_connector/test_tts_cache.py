@@ -0,0 +1,46 @@
+from app.connector.tts_cache import TTSCache, iter_chunks
+
+
+class Testttscache:
+
+    def test_key_normalisation(self):
+        """
+        Deux textes qui ne diffèrent que par les espaces partagent la même clé,
+        mais la voix, le modèle ou la vitesse produisent des clés distinctes.
+        """
+        key = TTSCache.make_key("Bonjour  à tous ", "alloy", "tts-1", 1.2)
+        assert key == TTSCache.make_key(" Bonjour à tous", "alloy", "tts-1", 1.2)
+        assert key != TTSCache.make_key("Bonjour à tous", "nova", "tts-1", 1.2)
+        assert key != TTSCache.make_key("Bonjour à tous", "alloy", "tts-1-hd", 1.2)
+        assert key != TTSCache.make_key("Bonjour à tous", "alloy", "tts-1", 1.0)
+
+    def test_lru_budget(self):
+        """
+        Le cache évince l'entrée la moins récemment utilisée quand le budget en octets est dépassé,
+        et ignore les entrées trop volumineuses.
+        """
+        cache = TTSCache(max_bytes=10, max_entry_bytes=6)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        assert cache.get("a") == b"aaaa"
+        cache.put("c", b"cccc")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"aaaa"
+        assert cache.get("c") == b"cccc"
+        cache.put("d", b"ddddddd")
+        assert cache.get("d") is None
+
+    def test_disk_tier(self, tmp_path):
+        """
+        Une entrée écrite sur disque est relue par une nouvelle instance (redémarrage du worker).
+        """
+        TTSCache(max_bytes=100, max_entry_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=100).put("k", b"audio")
+        cache = TTSCache(max_bytes=100, max_entry_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=100)
+        assert cache.get("k") == b"audio"
+        assert cache.get_memory("k") == b"audio"
+
+    def test_iter_chunks(self):
+        """
+        Le découpage restitue l'audio à l'identique.
+        """
+        assert list(iter_chunks(b"abcdefg", chunk_size=3)) == [b"abc", b"def", b"g"]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import mongomock
+
+from app.connector.usage_counters import UsageCounters
+
+
+class Testusagecounters:
+
+    def test_counters_are_incremented_then_rolled_up_into_days(self):
+        """
+        Les incréments sont cumulés en mémoire, visibles dans le quota avant écriture, écrits en
+        `$inc` ; les compteurs horaires anciens sont compactés en compteurs journaliers.
+        """
+        db = mongomock.MongoClient().db
+        collection = db.usage_counter_db
+        worker_a = UsageCounters(collection=collection, sessions=db.sessions_db, hourly_retention_days=2)
+        worker_b = UsageCounters(collection=collection, sessions=db.sessions_db, hourly_retention_days=2)
+        day = datetime(2024, 5, 1)
+
+        worker_a.record("prompt", "a@x.fr", "gpt", page="chat", tokens=10, at=day + timedelta(hours=9))
+        worker_a.record("prompt", "a@x.fr", "gpt", page="chat", tokens=5, at=day + timedelta(hours=9, minutes=30))
+        worker_b.record("prompt", "a@x.fr", "gpt", page="chat", tokens=1, at=day + timedelta(hours=10))
+        worker_b.record("image", "a@x.fr", "flux", at=day + timedelta(hours=10))
+        # non écrit : seul le worker qui a compté le voit
+        assert worker_a.user_usage("a@x.fr", day) == {"count": 2, "tokens": 15, "sources": {"prompt": 2}}
+
+        worker_a.flush()
+        worker_b.flush()
+        assert worker_b.user_usage("a@x.fr", day) == {"count": 4, "tokens": 16, "sources": {"prompt": 3, "image": 1}}
+        assert collection.count_documents({"period": "hour"}) == 3
+
+        # journée trop récente : rien à compacter
+        assert worker_a.rollup(now=day + timedelta(days=1)) == 0
+        assert worker_a.rollup(now=day + timedelta(days=3)) == 3
+        # bail détenu par worker_a
+        worker_b.record("prompt", "a@x.fr", "gpt", page="chat", tokens=4, at=day + timedelta(hours=23))
+        worker_b.flush()
+        assert worker_b.rollup(now=day + timedelta(days=3)) == 0
+        # incrément tardif compacté au passage suivant, ajouté au compteur journalier
+        assert worker_b.rollup(now=day + timedelta(days=4)) == 1
+
+        assert collection.count_documents({"period": "hour"}) == 0
+        prompts = collection.find_one({"period": "day", "source": "prompt"})
+        assert (prompts["bucket"], prompts["model"], prompts["count"], prompts["tokens"]) == (day, "gpt", 4, 20)
+        assert collection.find_one({"period": "day", "source": "image"})["count"] == 1
+
+    def test_hourly_counters_are_keyed_by_training_session(self):
+        """
+        La session d'un compteur horaire est la session de formation en cours de l'utilisateur,
+        résolue à l'écriture ; la page est stockée à part.
+        """
+        db = mongomock.MongoClient().db
+        day = datetime(2024, 5, 1)
+        session_id = db.sessions_db.insert_one({
+            "emails": ["a@x.fr"], "start_time": day + timedelta(hours=8), "end_time": day + timedelta(hours=12)
+        }).inserted_id
+        counters = UsageCounters(collection=db.usage_counter_db, sessions=db.sessions_db)
+
+        counters.record("prompt", "a@x.fr", "gpt", page="chat", tokens=3, at=day + timedelta(hours=9))
+        counters.record("prompt", "a@x.fr", "gpt", page="chat", tokens=2, at=day + timedelta(hours=14))
+        counters.record("voice", "b@x.fr", "gpt", at=day + timedelta(hours=9))
+        counters.flush()
+
+        in_session = db.usage_counter_db.find_one({"period": "hour", "bucket": day + timedelta(hours=9), "source": "prompt"})
+        assert (in_session["session"], in_session["page"], in_session["tokens"]) == (str(session_id), "chat", 3)
+        outside = db.usage_counter_db.find_one({"period": "hour", "bucket": day + timedelta(hours=14)})
+        assert (outside["session"], outside["page"]) == ("", "chat")
+        assert db.usage_counter_db.find_one({"period": "hour", "user_email": "b@x.fr"})["session"] == ""
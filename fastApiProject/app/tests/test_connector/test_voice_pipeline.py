@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.connector.voice_pipeline import VoicePipeline, split_sentences, AUDIO, DONE, TEXT, TRANSCRIPT
+
+
+class FakeVoiceClient:
+    """
+    Fournisseurs factices : le LLM émet un mot toutes les 20 ms, la TTS met d'autant plus de temps
+    que la phrase est longue, pour vérifier l'ordre de restitution.
+    """
+
+    def __init__(self, reply_words):
+        self.reply_words = reply_words
+        self.llm_finished = None
+
+    async def transcribe_audio(self, audio, formats=None):
+        return "Bonjour"
+
+    async def chat_reply_stream(self, messages):
+        for word in self.reply_words:
+            await asyncio.sleep(0.02)
+            yield word
+        self.llm_finished = asyncio.get_running_loop().time()
+
+    async def tts_stream(self, text, response_format="mp3"):
+        await asyncio.sleep(0.001 * len(text))
+        yield f"<{text}>".encode()
+
+
+class Testvoicepipeline:
+
+    def test_split_sentences_merges_short_ones(self):
+        """
+        Les phrases terminées sont extraites, les trop courtes regroupées avec la suivante.
+        """
+        ready, rest = split_sentences("Oui. Je vais bien, merci beaucoup ! Et vous", min_chars=12)
+        assert ready == ["Oui. Je vais bien, merci beaucoup !"]
+        assert rest == "Et vous"
+
+    @pytest.mark.asyncio
+    async def test_audio_starts_before_llm_finishes(self):
+        """
+        La première phrase est synthétisée et restituée pendant que le LLM génère encore,
+        et l'audio reste dans l'ordre des phrases.
+        """
+        words = ["Voici une longue première phrase. "] + ["mot "] * 10 + ["Fin courte."]
+        client = FakeVoiceClient(words)
+        pipeline = VoicePipeline(client, min_sentence_chars=5)
+        loop = asyncio.get_running_loop()
+
+        events, first_audio_at = [], None
+        async for event in pipeline.run(b"audio"):
+            if event.kind == AUDIO and first_audio_at is None:
+                first_audio_at = loop.time()
+            events.append(event)
+
+        assert events[0].kind == TRANSCRIPT and events[-1].kind == DONE
+        assert first_audio_at < client.llm_finished
+        assert "".join(e.text for e in events if e.kind == TEXT) == pipeline.reply
+        audio = b"".join(e.audio for e in events if e.kind == AUDIO)
+        assert audio == "<Voici une longue première phrase.><mot mot mot mot mot mot mot mot mot mot Fin courte.>".encode()
+        assert {"stt", "llm_first_token", "first_audio", "llm", "reply_complete", "total"} <= set(pipeline.timings)
@@ -0,0 +1,46 @@
+from app.connector.voice_protocol import (
+    BinaryCodec, JsonCodec, decode_frame, encode_frame, make_codec,
+    FRAME_AUDIO, FRAME_CONTROL, FRAME_TEXT_DELTA, AUDIO, CONTROL, LLM_CHUNK
+)
+
+
+class Testvoiceprotocol:
+
+    def test_frame_roundtrip(self):
+        """
+        Une trame encodée se décode à l'identique, et l'audio brut n'est pas pris pour une trame.
+        """
+        frame = decode_frame(encode_frame(FRAME_AUDIO, 7, 3, b"\x1aE\xdf\xa3"))
+        assert (frame.frame_type, frame.turn_id, frame.seq, frame.payload) == (FRAME_AUDIO, 7, 3, b"\x1aE\xdf\xa3")
+        assert decode_frame(b"\x1aE\xdf\xa3 webm brut sans en-tete") is None
+
+    def test_invalid_frames_are_rejected(self):
+        """
+        Un message trop court, d'une autre version ou d'un type inconnu n'est pas une trame.
+        """
+        frame = encode_frame(FRAME_AUDIO, 1, 0, b"audio")
+        assert decode_frame(frame[:5]) is None
+        assert decode_frame(b"\x02" + frame[1:]) is None
+        assert decode_frame(frame[:1] + b"\x7f" + frame[2:]) is None
+
+    def test_binary_codec_sends_deltas_with_sequence(self):
+        """
+        Le codec binaire n'envoie que le delta des réponses LLM et numérote les trames par tour.
+        """
+        codec = BinaryCodec()
+        first = decode_frame(codec.encode(LLM_CHUNK, {"status": "llm_chunk", "chunk": "jour", "text_so_far": "Bonjour"}, 2))
+        second = decode_frame(codec.encode(AUDIO, b"mp3", 2))
+        other_turn = decode_frame(codec.encode(CONTROL, {"status": "complete"}, 3))
+
+        assert (first.frame_type, first.payload, first.seq) == (FRAME_TEXT_DELTA, "jour".encode(), 0)
+        assert (second.frame_type, second.seq) == (FRAME_AUDIO, 1)
+        assert (other_turn.frame_type, other_turn.seq, other_turn.json()) == (FRAME_CONTROL, 0, {"status": "complete"})
+
+    def test_json_codec_is_default(self):
+        """
+        Sans négociation, le protocole JSON historique est conservé (avec le turn_id en plus).
+        """
+        codec = make_codec(None)
+        assert isinstance(codec, JsonCodec)
+        assert codec.encode(CONTROL, {"status": "complete"}, 4) == '{"status": "complete", "turn_id": 4}'
+        assert codec.encode(AUDIO, b"mp3", 4) == b"mp3"
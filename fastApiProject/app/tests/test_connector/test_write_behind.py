@@ -0,0 +1,92 @@
+import asyncio
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect
+
+from app.connector.write_behind import WriteBehindBuffer, wb_dropped, wb_failed
+
+
+class Testwritebehind:
+
+    @pytest.mark.asyncio
+    async def test_batches_are_flushed_on_size_and_on_stop(self):
+        """
+        Les documents reçoivent leur identifiant tout de suite, sont écrits par lots dès que le seuil
+        est atteint, et le reliquat est écrit à l'arrêt.
+        """
+        collection = mongomock.MongoClient().db.transcript_db
+        buffer = WriteBehindBuffer(collection, max_batch=3, flush_interval=60)
+        buffer.start()
+
+        ids = [buffer.add({"text": f"phrase {i}"}) for i in range(3)]
+        for _ in range(50):
+            if collection.count_documents({}) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert collection.count_documents({}) == 3
+
+        ids.append(buffer.add({"text": "phrase 3"}))
+        await asyncio.sleep(0.05)
+        assert buffer.pending == 1
+
+        await buffer.stop()
+        assert sorted(d["_id"] for d in collection.find()) == sorted(ids)
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_drops_and_reports(self):
+        """
+        Quand la base ne suit plus, les documents au-delà de `max_pending` sont abandonnés et comptés.
+        """
+        collection = mongomock.MongoClient().db.eleven_db
+        buffer = WriteBehindBuffer(collection, max_batch=100, flush_interval=60, max_pending=2)
+        dropped_before = wb_dropped.value(collection="eleven_db")
+
+        for i in range(3):
+            buffer.add({"text": f"message {i}"})
+
+        assert buffer.pending == 2
+        assert wb_dropped.value(collection="eleven_db") == dropped_before + 1
+        await buffer.stop()
+        assert collection.count_documents({}) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_are_retried_then_dropped(self, monkeypatch):
+        """
+        Pendant une coupure de la base, le lot est remis en file et réessayé après un délai ; il
+        n'est abandonné qu'une fois les tentatives épuisées.
+        """
+        collection = mongomock.MongoClient().db.transcript_db
+        insert_many = collection.insert_many
+        outage = {"failures": 2}
+
+        def flaky_insert_many(documents, **kwargs):
+            if outage["failures"] > 0:
+                outage["failures"] -= 1
+                raise AutoReconnect("connection refused")
+            return insert_many(documents, **kwargs)
+
+        monkeypatch.setattr(collection, "insert_many", flaky_insert_many)
+        buffer = WriteBehindBuffer(collection, max_batch=10, flush_interval=60, max_retries=2, retry_backoff=0.01)
+        buffer.add({"text": "pendant la coupure"})
+
+        await buffer.flush()
+        assert buffer.pending == 1
+        # délai entre tentatives : un vidage immédiat n'écrit rien
+        await buffer.flush()
+        assert outage["failures"] == 1
+        for _ in range(2):
+            await asyncio.sleep(0.05)
+            await buffer.flush()
+        assert collection.count_documents({}) == 1 and buffer.pending == 0
+
+        # coupure plus longue que les tentatives : le lot est abandonné et compté
+        failed_before = wb_failed.value(collection="transcript_db")
+        outage["failures"] = 10
+        buffer.add({"text": "perdu"})
+        for _ in range(3):
+            await buffer.flush()
+            await asyncio.sleep(0.05)
+        assert buffer.pending == 0
+        assert wb_failed.value(collection="transcript_db") == failed_before + 1
+        assert collection.count_documents({}) == 1
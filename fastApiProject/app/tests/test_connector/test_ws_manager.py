@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import pytest
+
+from app.connector.pubsub import LocalPubSub
+from app.connector.ws_manager import ConnectionManager, ws_evicted
+
+
+class FakeWebSocket:
+    """
+    WebSocket factice : `delay` simule un client lent, `broken` un client parti.
+    """
+
+    def __init__(self, delay: float = 0.0, broken: bool = False):
+        self.sent = []
+        self.delay = delay
+        self.broken = broken
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        if self.broken:
+            raise RuntimeError("socket closed")
+        self.sent.append(json.loads(text))
+
+
+class Testwsmanager:
+
+    @pytest.mark.asyncio
+    async def test_slow_and_dead_sockets_are_evicted(self):
+        """
+        Un client lent ou mort ne retarde pas les autres abonnés : il est évincé et les suivants
+        reçoivent le message.
+        """
+        manager = ConnectionManager(LocalPubSub(), send_timeout=0.05)
+        healthy, slow, dead = FakeWebSocket(), FakeWebSocket(delay=1.0), FakeWebSocket(broken=True)
+        for ws in (dead, slow, healthy):
+            await manager.connect("s1", ws)
+        evicted_before = ws_evicted.value(reason="timeout") + ws_evicted.value(reason="error")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await manager.broadcast("s1", {"role": "assistant", "text": "Bonjour"})
+
+        assert loop.time() - started < 0.5
+        assert healthy.sent == [{"role": "assistant", "text": "Bonjour"}]
+        assert manager.subscriber_count("s1") == 1
+        assert slow.closed and dead.closed
+        assert ws_evicted.value(reason="timeout") + ws_evicted.value(reason="error") == evicted_before + 2
+
+        await manager.broadcast("s1", {"role": "user", "text": "Merci"})
+        assert len(healthy.sent) == 2
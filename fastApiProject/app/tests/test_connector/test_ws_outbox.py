@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pytest
+
+from app.connector.voice_connections import VoiceConnectionManager
+from app.connector.ws_outbox import WebSocketOutbox, STATUS, PARTIAL, LLM_CHUNK
+
+
+class FakeWebSocket:
+    """
+    WebSocket factice qui enregistre les messages envoyés ; `gate` permet de simuler un client lent.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_bytes(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+
+class Testwsoutbox:
+
+    @pytest.mark.asyncio
+    async def test_coalescing_while_client_is_slow(self):
+        """
+        Pendant qu'un client lent bloque l'écriture, les états sont fusionnés, les morceaux LLM
+        concaténés et l'audio conservé dans l'ordre.
+        """
+        ws = FakeWebSocket()
+        ws.gate.clear()
+        outbox = WebSocketOutbox(ws, "client", max_size=16)
+        outbox.start()
+
+        await outbox.send_json({"status": "first"})
+        await asyncio.sleep(0)  # l'écrivain prend le premier message et bloque dessus
+        await outbox.send_json({"status": "transcribing"}, STATUS)
+        await outbox.send_json({"status": "processing_parallel"}, STATUS)
+        await outbox.send_json({"status": "llm_chunk", "chunk": "Bon", "text_so_far": "Bon"}, LLM_CHUNK)
+        await outbox.send_json({"status": "llm_chunk", "chunk": "jour", "text_so_far": "Bonjour"}, LLM_CHUNK)
+        await outbox.send_bytes(b"audio")
+
+        ws.gate.set()
+        await asyncio.sleep(0.05)
+        outbox.close()
+
+        assert ws.sent == [
+            {"status": "first"},
+            {"status": "processing_parallel"},
+            {"status": "llm_chunk", "chunk": "Bonjour", "text_so_far": "Bonjour"},
+            b"audio",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_stale_partial_is_dropped(self):
+        """
+        Une transcription partielle est abandonnée quand la file est à moitié pleine.
+        """
+        ws = FakeWebSocket()
+        ws.gate.clear()
+        outbox = WebSocketOutbox(ws, "client", max_size=4)
+        outbox.start()
+        await outbox.send_bytes(b"1")
+        await asyncio.sleep(0)
+        await outbox.send_bytes(b"2")
+        await outbox.send_bytes(b"3")
+        await outbox.send_json({"status": "partial_transcription"}, PARTIAL)
+        assert outbox.depth == 2
+        outbox.close()
+
+    @pytest.mark.asyncio
+    async def test_acks_are_batched(self):
+        """
+        Les accusés de réception sont regroupés au lieu d'être envoyés à chaque chunk.
+        """
+        ws = FakeWebSocket()
+        outbox = WebSocketOutbox(ws, "client", ack_interval=0.05, ack_every=3)
+        outbox.start()
+        for _ in range(7):
+            outbox.ack(10)
+        await asyncio.sleep(0.15)
+        outbox.close()
+
+        assert sum(m["count"] for m in ws.sent) == 7
+        assert sum(m["size"] for m in ws.sent) == 70
+        assert all(m["status"] == "chunk_received" for m in ws.sent)
+        assert len(ws.sent) < 7
+
+    @pytest.mark.asyncio
+    async def test_old_socket_teardown_keeps_the_reconnected_outbox(self):
+        """
+        Quand un client s'est reconnecté, la fin de l'ancien socket ne ferme pas la nouvelle connexion.
+        """
+        manager = VoiceConnectionManager()
+        old, new = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(old, "client")
+        await manager.connect(new, "client")
+
+        manager.disconnect("client", old)
+        await manager.send_json("client", {"status": "still_here"})
+        await asyncio.sleep(0.05)
+        assert new.sent == [{"status": "still_here"}]
+
+        manager.disconnect("client", new)
+        assert "client" not in manager.active_connections
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+def prepare_environment(db_name: str = "benchmark"):
+    """
+    Prépare un environnement hors ligne : variables obligatoires renseignées et base MongoDB
+    remplacée par mongomock, avant tout import de l'application.
+
+    La collection des utilisateurs existe d'emblée : `initialize_db` ne crée pas les
+    super-administrateurs (les benchmarks créent leurs propres utilisateurs).
+
+    Args:
+        db_name (str): Le nom de la base simulée.
+
+    Returns:
+        MongoAccess: L'accès base partagé, branché sur mongomock.
+    """
+    for name, value in (
+        ("MONGO_DB_USERNAME", "benchmark"),
+        ("MONGO_DB_PASSWORD", "benchmark"),
+        ("MONGO_DB_NAME", db_name),
+        ("OPENAI_KEY", "benchmark"),
+        ("OPENAI_VOICE_ID", "alloy"),
+        ("OPENAI_ORG", "benchmark"),
+        ("GOOGLE_API_KEY", "benchmark"),
+        ("MISTRAL_API_KEY", "benchmark"),
+        ("REPLICATE_API_TOKEN", "benchmark"),
+        ("MAILGUN_API_KEY", "benchmark"),
+        ("ELEVENLABS_API_KEY", "benchmark"),
+        ("ACCESS_TOKEN_EXPIRE_MINUTES", "30"),
+        # les benchmarks mesurent le débit : les quotas les rejetteraient
+        ("RATE_LIMIT_ENABLED", "false"),
+    ):
+        os.environ.setdefault(name, value)
+
+    import mongomock
+    from app.connector.connectorBDD import MongoAccess
+
+    if MongoAccess._instance is None:
+        access = object.__new__(MongoAccess)
+        access.client = mongomock.MongoClient()
+        access.db = access.client[db_name]
+        access.db.create_collection("users_db")
+        MongoAccess._instance = access
+    return MongoAccess._instance
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Calcule un quantile par interpolation linéaire.
+
+    Args:
+        values (Sequence[float]): Les mesures.
+        q (float): Le quantile, entre 0 et 1.
+
+    Returns:
+        Optional[float]: La valeur du quantile, ou None sans mesure.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(values: Sequence[float], scale: float = 1000.0) -> Dict[str, Optional[float]]:
+    """
+    Résume une série de durées (en secondes) : p50/p95/p99/max, en millisecondes par défaut.
+
+    Args:
+        values (Sequence[float]): Les durées mesurées.
+        scale (float): Le facteur d'échelle appliqué aux résultats.
+
+    Returns:
+        Dict[str, Optional[float]]: Le nombre de mesures et les quantiles arrondis.
+    """
+    def scaled(value):
+        return None if value is None else round(value * scale, 2)
+
+    return {
+        "count": len(values),
+        "p50": scaled(percentile(values, 0.5)),
+        "p95": scaled(percentile(values, 0.95)),
+        "p99": scaled(percentile(values, 0.99)),
+        "max": scaled(max(values) if values else None),
+    }
+
+
+class LoopLagMonitor:
+    """
+    Mesure le retard de l'event loop : une tâche dort `interval` secondes en boucle et note de
+    combien son réveil a été retardé. Un appel bloquant exécuté sur la boucle apparaît directement
+    dans les quantiles élevés et le maximum.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Démarre la mesure sur l'event loop courant."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la mesure."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self):
+        """Oublie les mesures faites jusqu'ici (démarrage du serveur, préchauffage)."""
+        self.samples = []
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+
+class MonitoredApp:
+    """
+    Enveloppe ASGI qui démarre la mesure du retard de la boucle avec le serveur (au `lifespan`),
+    sans toucher au `lifespan` de l'application.
+    """
+
+    def __init__(self, app, monitor: LoopLagMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" and self.monitor._task is None:
+            self.monitor.start()
+        await self.app(scope, receive, send)
+
+
+def free_port() -> int:
+    """Retourne un port TCP local libre."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """
+    Serveur uvicorn exécuté dans un thread (et un event loop) dédié, le temps d'un benchmark.
+
+    Les clients tournent dans l'event loop principal : leur charge ne fausse pas la mesure du
+    retard de la boucle du serveur.
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: Optional[int] = None):
+        import uvicorn
+
+        self.host = host
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self.server.run, name="benchmark-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=30)
+        return False
@@ -0,0 +1,189 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Iterator, List
+
+
+_WORDS = (
+    "le", "projet", "avance", "bien", "mais", "il", "faut", "revoir", "le", "planning", "avec",
+    "l'équipe", "pour", "la", "prochaine", "réunion", "et", "préparer", "les", "indicateurs",
+)
+
+
+@dataclass
+class ProviderProfile:
+    """
+    Latences simulées des fournisseurs STT, LLM, TTS et de génération d'images.
+
+    Attributes:
+        stt_latency (float): La durée d'une transcription (s).
+        llm_first_token (float): Le délai avant le premier token (s).
+        llm_tokens_per_second (float): Le débit de génération.
+        llm_tokens (int): Le nombre de tokens de chaque réponse.
+        llm_completion (float): La durée d'une réponse non diffusée (OpenAI, Gemini, Mistral) (s).
+        tts_first_byte (float): Le délai avant le premier octet de synthèse (s).
+        tts_bytes_per_second (int): Le débit de la synthèse.
+        tts_bytes_per_char (int): La taille de l'audio produit par caractère de texte.
+        tts_chunk_bytes (int): La taille des chunks renvoyés.
+        image_latency (float): La durée d'une génération d'image Replicate (s).
+    """
+    stt_latency: float = 0.3
+    llm_first_token: float = 0.35
+    llm_tokens_per_second: float = 60.0
+    llm_tokens: int = 40
+    llm_completion: float = 0.8
+    tts_first_byte: float = 0.25
+    tts_bytes_per_second: int = 64 * 1024
+    tts_bytes_per_char: int = 400
+    tts_chunk_bytes: int = 4096
+    image_latency: float = 0.5
+
+
+class _FakeTranscriptions:
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+
+    def create(self, file, model: str, **kwargs):
+        file.read()
+        time.sleep(self.profile.stt_latency)
+        return SimpleNamespace(text="Pouvez-vous faire le point sur le projet ?")
+
+
+class _FakeCompletions:
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+        # chaque réponse est différente : le cache TTS ne fausse pas les mesures
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _reply(self) -> List[str]:
+        with self._lock:
+            n = next(self._counter)
+        rng = random.Random(n)
+        tokens = []
+        for i in range(self.profile.llm_tokens):
+            word = rng.choice(_WORDS)
+            tokens.append(f" {word}{n if i == 0 else ''}")
+            if i % 12 == 11:
+                tokens.append(".")
+        tokens.append(".")
+        return tokens
+
+    def create(self, model: str, messages: list, stream: bool = False, **kwargs):
+        if not stream:
+            return _completion(self.profile, "".join(self._reply()))
+        time.sleep(self.profile.llm_first_token)
+        return self._stream(self._reply())
+
+    def _stream(self, tokens: List[str]) -> Iterator[SimpleNamespace]:
+        delay = 1.0 / self.profile.llm_tokens_per_second
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+class _FakeSpeechStream:
+    def __init__(self, profile: ProviderProfile, text: str):
+        self.profile = profile
+        self.size = max(1, len(text)) * profile.tts_bytes_per_char
+
+    def __enter__(self):
+        time.sleep(self.profile.tts_first_byte)
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_bytes(self, chunk_size: int = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or self.profile.tts_chunk_bytes
+        delay = chunk_size / self.profile.tts_bytes_per_second
+        sent = 0
+        while sent < self.size:
+            if sent:
+                time.sleep(delay)
+            chunk = min(chunk_size, self.size - sent)
+            sent += chunk
+            yield bytes(chunk)
+
+
+class _FakeSpeech:
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+        self.with_streaming_response = self
+
+    def create(self, model: str, voice: str, input: str, **kwargs):
+        return _FakeSpeechStream(self.profile, input)
+
+
+def _completion(profile: ProviderProfile, text: str) -> SimpleNamespace:
+    time.sleep(profile.llm_completion)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class FakeOpenAI:
+    """
+    Client OpenAI simulé, à injecter dans `OpenAIVoiceClient(client=...)`.
+
+    Comme le client synchrone réel, chaque appel bloque le thread appelant pendant la latence
+    simulée : si un appel est fait directement depuis l'event loop au lieu du threadpool, le
+    retard de la boucle mesuré par les benchmarks le montre immédiatement.
+    """
+
+    def __init__(self, profile: ProviderProfile = None):
+        self.profile = profile or ProviderProfile()
+        self.audio = SimpleNamespace(
+            transcriptions=_FakeTranscriptions(self.profile),
+            speech=_FakeSpeech(self.profile),
+        )
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self.profile))
+
+
+class _FakeGeminiChat:
+    def __init__(self, profile: ProviderProfile):
+        self.profile = profile
+
+    def send_message(self, content):
+        time.sleep(self.profile.llm_completion)
+        return SimpleNamespace(text="Réponse simulée de Gemini.")
+
+
+class FakeGenAI:
+    """Module `google.generativeai` simulé (`GenerativeModel(...).start_chat(...).send_message(...)`)."""
+
+    def __init__(self, profile: ProviderProfile = None):
+        self.profile = profile or ProviderProfile()
+
+    def GenerativeModel(self, model_name: str):
+        profile = self.profile
+        return SimpleNamespace(start_chat=lambda history=None: _FakeGeminiChat(profile))
+
+
+class FakeMistral:
+    """Client Mistral simulé (`chat.complete(...)`), bloquant comme le client réel."""
+
+    def __init__(self, profile: ProviderProfile = None):
+        self.profile = profile or ProviderProfile()
+        self.chat = SimpleNamespace(complete=self._complete)
+
+    def _complete(self, model: str, messages: list, **kwargs):
+        return _completion(self.profile, "Réponse simulée de Mistral.")
+
+
+class FakeReplicate:
+    """`ReplicateClient` simulé : génération asynchrone, comme `replicate.async_run`."""
+
+    def __init__(self, profile: ProviderProfile = None):
+        self.profile = profile or ProviderProfile()
+
+    async def generate_image(self, prompt: str) -> str:
+        await asyncio.sleep(self.profile.image_latency)
+        return f"https://replicate.delivery/benchmark/{abs(hash(prompt))}.webp"
+
+    async def generate_video(self, prompt: str) -> str:
+        await asyncio.sleep(self.profile.image_latency)
+        return f"https://replicate.delivery/benchmark/{abs(hash(prompt))}.mp4"
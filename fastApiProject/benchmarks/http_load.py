@@ -0,0 +1,305 @@
+"""
+Test de charge des principaux endpoints REST, hors ligne et reproductible.
+
+L'application réelle (`main.app`) est servie par uvicorn dans ce processus, avec une base mongomock
+et des fournisseurs simulés (OpenAI, Gemini, Mistral, Replicate ; voir `fake_providers.py`).
+Chaque scénario envoie `--requests` requêtes avec `--concurrency` clients httpx concurrents.
+
+Mesures rapportées par scénario : requêtes/s, quantiles de latence, erreurs et retard de l'event
+loop du serveur pendant le scénario (un appel bloquant fait sur la boucle y apparaît directement).
+
+Les résultats peuvent être comparés à une référence JSON : un scénario plus lent, moins rapide ou
+bloquant davantage la boucle que la référence (au-delà de la tolérance) est signalé et le code de
+sortie vaut 1.
+
+Usage (depuis `fastApiProject/`) :
+    python -m benchmarks.http_load [--scenarios login,list_prompts_page] [--requests 50] [--concurrency 10]
+    python -m benchmarks.http_load --update-baseline     # enregistre la référence
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.common import LoopLagMonitor, MonitoredApp, ServerThread, prepare_environment, summarize
+from benchmarks.fake_providers import FakeGenAI, FakeMistral, FakeOpenAI, FakeReplicate, ProviderProfile
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "http_load.json")
+PASSWORD = "benchmark-password"
+
+
+def load_app(profile: ProviderProfile):
+    """
+    Importe l'application réelle et remplace ses fournisseurs par les simulations.
+
+    Args:
+        profile (ProviderProfile): Les latences simulées.
+
+    Returns:
+        FastAPI: L'application `main.app`.
+    """
+    import main
+
+    providers = main.app.state.container.providers
+    providers.override("openai", FakeOpenAI(profile))
+    providers.override("gemini", FakeGenAI(profile))
+    providers.override("mistral", FakeMistral(profile))
+    providers.override("replicate", FakeReplicate(profile))
+    logging.getLogger().setLevel(logging.WARNING)
+    return main.app
+
+
+def seed_user(access) -> str:
+    """
+    Crée l'utilisateur des scénarios (mot de passe haché comme en production).
+
+    Returns:
+        str: Un jeton d'accès de l'utilisateur.
+    """
+    from app.auth.oauth2 import create_token_pair
+    from app.core.security import hash_password
+    from app.models.users_model import UserDisplay
+
+    email = "bench@example.com"
+    access.users_collection.update_one(
+        {"email": email},
+        {"$set": {"email": email, "is_active": True, "roles": ["Formateur-int"],
+                  "hashed_password": hash_password(PASSWORD)}},
+        upsert=True,
+    )
+    return create_token_pair(UserDisplay(**access.users_collection.find_one({"email": email})))["access_token"]
+
+
+class Scenario:
+    def __init__(self, name: str, call: Callable[..., Awaitable]):
+        self.name = name
+        self.call = call
+
+
+async def _login(client, state, i):
+    return await client.post("/login/token", data={"username": "bench@example.com", "password": PASSWORD})
+
+
+def _create_prompt(model_type: str):
+    async def call(client, state, i):
+        return await client.post(
+            f"/prompts/create_prompt/{model_type}", params={"page": f"bench-{i % 5}"},
+            data={"user_prompt": f"Question de charge {i}"}, headers=state["auth"],
+        )
+    return call
+
+
+async def _list_prompts_page(client, state, i):
+    return await client.get("/prompts/list_prompts_page", params={"model": "gpt", "page": "bench-0"},
+                            headers=state["auth"])
+
+
+async def _generate_image(client, state, i):
+    return await client.post("/image/generate-image/", json={"prompt": f"Une salle de formation {i}"},
+                             headers=state["auth"])
+
+
+async def _create_session(client, state, i):
+    response = await client.post("/sessions/create_session", data={
+        "session_name": f"Session {i}",
+        "description": "Session de charge",
+        "formateur_name": "Benchmark",
+        "start_time": "2030-01-01T09:00:00",
+    }, headers=state["auth"])
+    if response.status_code == 201:
+        state["session_ids"].append(response.json()["_id"])
+    return response
+
+
+async def _list_sessions(client, state, i):
+    return await client.get("/sessions/all_session/", headers=state["auth"])
+
+
+async def _get_session(client, state, i):
+    session_id = state["session_ids"][i % len(state["session_ids"])]
+    return await client.get(f"/sessions/get/{session_id}", headers=state["auth"])
+
+
+async def _update_session(client, state, i):
+    session_id = state["session_ids"][i % len(state["session_ids"])]
+    return await client.put(f"/sessions/update/{session_id}", json={"description": f"Mise à jour {i}"},
+                            headers=state["auth"])
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("login", _login),
+    Scenario("create_prompt_gpt", _create_prompt("gpt")),
+    Scenario("create_prompt_gemini", _create_prompt("gemini")),
+    Scenario("create_prompt_mistral", _create_prompt("mistral")),
+    Scenario("list_prompts_page", _list_prompts_page),
+    Scenario("generate_image", _generate_image),
+    Scenario("sessions_create", _create_session),
+    Scenario("sessions_list", _list_sessions),
+    Scenario("sessions_get", _get_session),
+    Scenario("sessions_update", _update_session),
+)}
+
+
+async def run_scenario(client, scenario: Scenario, state: Dict, requests: int, concurrency: int,
+                       monitor: LoopLagMonitor) -> Dict:
+    """Exécute un scénario et retourne ses mesures."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    indexes = iter(range(requests))
+
+    async def worker():
+        for i in indexes:
+            started = time.perf_counter()
+            try:
+                response = await scenario.call(client, state, i)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    monitor.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": statuses,
+        "requests_per_second": round(requests / wall, 2) if wall else None,
+        "latency_ms": summarize(latencies),
+        "loop_lag_ms": summarize(list(monitor.samples)),
+    }
+
+
+async def run_all(base_url: str, token: str, names: List[str], args, monitor: LoopLagMonitor) -> Dict[str, Dict]:
+    import httpx
+
+    state = {"auth": {"Authorization": f"Bearer {token}"}, "session_ids": []}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        # au moins une session pour les scénarios de lecture et de mise à jour
+        await _create_session(client, state, -1)
+        results = {}
+        for name in names:
+            results[name] = await run_scenario(client, SCENARIOS[name], state, args.requests, args.concurrency, monitor)
+        return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Compare les mesures à la référence.
+
+    Une latence p95 ou un retard de boucle p99 n'est signalé que s'il dépasse la référence à la fois
+    de `tolerance` (relatif) et de `min_delta_ms` (absolu), pour ignorer le bruit des petites valeurs.
+
+    Returns:
+        List[str]: Les régressions détectées.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric, quantile in (("latency_ms", "p95"), ("loop_lag_ms", "p99")):
+            current, previous = result[metric][quantile], reference[metric][quantile]
+            if current is None or previous is None:
+                continue
+            if current > previous * (1 + tolerance) and current - previous > min_delta_ms:
+                regressions.append(f"{name}: {metric} {quantile} {current} ms (baseline {previous} ms)")
+        current, previous = result["requests_per_second"], reference["requests_per_second"]
+        if current is not None and previous and current < previous * (1 - tolerance):
+            regressions.append(f"{name}: {current} req/s (baseline {previous} req/s)")
+        if result["errors"] > reference["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors (baseline {reference['errors']})")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict]):
+    print(f"{'scenario':<24}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'lag p99':>9}{'lag max':>9}{'errors':>8}")
+    for name, r in results.items():
+        latency, lag = r["latency_ms"], r["loop_lag_ms"]
+        print(f"{name:<24}{r['requests_per_second']:>9}{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}"
+              f"{lag['p99'] if lag['p99'] is not None else '-':>9}{lag['max'] if lag['max'] is not None else '-':>9}"
+              f"{r['errors']:>8}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge des endpoints REST avec fournisseurs simulés")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Scénarios à exécuter, séparés par des virgules ({', '.join(SCENARIOS)})")
+    parser.add_argument("--requests", type=int, default=50, help="Requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Clients concurrents")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Durée d'une réponse LLM simulée (s)")
+    parser.add_argument("--image-latency", type=float, default=0.5, help="Durée d'une génération d'image simulée (s)")
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Référence JSON à comparer")
+    parser.add_argument("--update-baseline", action="store_true", help="Enregistrer les résultats comme référence")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Écart relatif toléré par rapport à la référence")
+    parser.add_argument("--min-delta-ms", type=float, default=25.0, help="Écart absolu minimal signalé (ms)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}")
+        return 2
+
+    access = prepare_environment()
+    profile = ProviderProfile(llm_completion=args.llm_latency, image_latency=args.image_latency)
+    monitor = LoopLagMonitor()
+    app = MonitoredApp(load_app(profile), monitor)
+    token = seed_user(access)
+
+    # les `print` de l'application ne se mêlent pas au rapport
+    with contextlib.redirect_stdout(io.StringIO()), ServerThread(app) as server:
+        results = asyncio.run(run_all(server.base_url, token, names, args, monitor))
+
+    print_results(results)
+    report = {"config": {"requests": args.requests, "concurrency": args.concurrency,
+                         "llm_latency": args.llm_latency, "image_latency": args.image_latency},
+              "scenarios": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {"config": report["config"], "scenarios": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline["config"] = report["config"]
+        baseline["scenarios"].update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        print("Baseline recorded with a different configuration, comparison skipped")
+        return 0
+    regressions = compare(results, baseline["scenarios"], args.tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Profil du démarrage à froid : import de `main` et exécution du lifespan, dans un processus neuf.
+
+Chaque mesure lance un nouvel interpréteur (comme un démarrage ou un redémarrage `--reload`) avec
+`-X importtime`, sur une base mongomock et sans accès réseau. Rapporte la médiane des durées et les
+paquets dont l'import coûte le plus.
+
+Usage (depuis `fastApiProject/`) :
+    python -m benchmarks.import_time [--runs 3] [--top 15] [--json out.json] [--max-import-ms 2000]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+
+# exécuté dans le processus mesuré
+_PROBE = """
+import asyncio, contextlib, io, json, time
+from benchmarks.common import prepare_environment
+prepare_environment()
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+with contextlib.redirect_stdout(io.StringIO()):
+    ready = asyncio.run(startup())
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \| *(\S+)$")
+
+
+def measure_once() -> Dict:
+    """
+    Mesure un démarrage à froid dans un nouvel interpréteur.
+
+    Returns:
+        Dict: Les durées d'import et de démarrage (ms) et le coût (ms) de chaque paquet racine,
+        somme du temps propre de ses modules.
+    """
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            package = match.group(2).split(".")[0]
+            packages[package] = packages.get(package, 0.0) + int(match.group(1)) / 1000
+    timings["packages"] = packages
+    return timings
+
+
+def summarize_runs(runs: List[Dict], top: int) -> Dict:
+    packages = {name: statistics.median(run["packages"].get(name, 0.0) for run in runs)
+                for name in runs[0]["packages"]}
+    return {
+        "runs": len(runs),
+        "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+        "startup_ms": round(statistics.median(run["startup_ms"] for run in runs), 1),
+        "top_packages_ms": {name: round(ms, 1) for name, ms in
+                            sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]},
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Profil du démarrage à froid de l'application")
+    parser.add_argument("--runs", type=int, default=3, help="Nombre de démarrages mesurés")
+    parser.add_argument("--top", type=int, default=15, help="Nombre de paquets les plus coûteux affichés")
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    parser.add_argument("--max-import-ms", type=float, help="Échec (code 1) si l'import de main dépasse ce seuil")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    summary = summarize_runs([measure_once() for _ in range(args.runs)], args.top)
+
+    print(f"import main: {summary['import_ms']} ms   lifespan startup: {summary['startup_ms']} ms"
+          f"   (median of {summary['runs']})")
+    for name, ms in summary["top_packages_ms"].items():
+        print(f"  {name:<48}{ms:>10}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(summary, file, indent=2)
+    if args.max_import_ms is not None and summary["import_ms"] > args.max_import_ms:
+        print(f"REGRESSION import main {summary['import_ms']} ms > {args.max_import_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
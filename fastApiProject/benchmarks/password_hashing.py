@@ -0,0 +1,103 @@
+"""
+Micro-benchmark du hachage des mots de passe : coût de bcrypt et effet d'une vague de connexions
+sur l'event loop.
+
+Pour chaque mode, `--logins` vérifications bcrypt sont lancées en même temps (une classe qui se
+connecte au début d'un cours) pendant qu'un battement mesure le retard de la boucle :
+    - `inline` : vérification dans la coroutine, comme l'ancienne route `/login/token` ;
+    - `threads` / `processes` : vérification dans le pool borné de `PasswordHasher`.
+
+Usage (depuis `fastApiProject/`) :
+    python -m benchmarks.password_hashing [--logins 30] [--rounds 10,12] [--workers 4] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List
+
+from benchmarks.common import LoopLagMonitor, prepare_environment, summarize
+
+
+async def login_wave(mode: str, rounds: int, logins: int, workers: int) -> Dict:
+    """
+    Lance `logins` vérifications simultanées et mesure leur latence et le retard de la boucle.
+
+    Args:
+        mode (str): `inline`, `threads` ou `processes`.
+        rounds (int): Le coût bcrypt.
+        logins (int): Le nombre de connexions simultanées.
+        workers (int): La taille du pool.
+
+    Returns:
+        Dict: Latences (ms), durée totale, débit et retard de la boucle.
+    """
+    from app.core.password_hasher import PasswordHasher, crypt_context
+
+    hasher = PasswordHasher(rounds=rounds, workers=workers, use_processes=mode == "processes")
+    hashed = crypt_context(rounds).hash("benchmark-password")
+    if mode != "inline":
+        # démarrage du pool (et des processus) hors mesure
+        await hasher.verify("benchmark-password", hashed)
+
+    async def login():
+        started = time.perf_counter()
+        if mode == "inline":
+            assert crypt_context(rounds).verify("benchmark-password", hashed)
+        else:
+            valid, _ = await hasher.verify("benchmark-password", hashed)
+            assert valid
+        return time.perf_counter() - started
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    latencies: List[float] = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    # laisse le battement noter le retard accumulé pendant la vague
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    hasher.shutdown()
+    return {
+        "mode": mode,
+        "rounds": rounds,
+        "latency_ms": summarize(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 1),
+        "loop_lag_ms": summarize(monitor.samples),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Micro-benchmark du hachage bcrypt et de son effet sur l'event loop")
+    parser.add_argument("--logins", type=int, default=30, help="Connexions simultanées")
+    parser.add_argument("--rounds", default="10,12", help="Coûts bcrypt à comparer, séparés par des virgules")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Taille du pool")
+    parser.add_argument("--modes", default="inline,threads,processes", help="Modes à comparer")
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    prepare_environment()
+    results = []
+    for rounds in (int(value) for value in args.rounds.split(",")):
+        for mode in args.modes.split(","):
+            results.append(asyncio.run(login_wave(mode, rounds, args.logins, args.workers)))
+
+    print(f"{'mode':<11}{'rounds':>7}{'p50':>9}{'p95':>9}{'total s':>9}{'login/s':>9}{'lag p99':>9}{'lag max':>9}")
+    for r in results:
+        latency, lag = r["latency_ms"], r["loop_lag_ms"]
+        print(f"{r['mode']:<11}{r['rounds']:>7}{latency['p50']:>9}{latency['p95']:>9}{r['elapsed_s']:>9}"
+              f"{r['logins_per_second']:>9}{lag['p99']:>9}{lag['max']:>9}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"logins": args.logins, "workers": args.workers, "results": results}, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
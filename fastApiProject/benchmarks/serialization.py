@@ -0,0 +1,127 @@
+"""
+Micro-benchmark de la sérialisation des listes : documents MongoDB → corps de la réponse JSON.
+
+Pour des listes de prompts et d'utilisateurs de `--sizes` éléments, trois chemins sont comparés :
+    - `models` : modèles Pydantic construits par la route, revalidés par `response_model`, puis
+      `json.dumps` (l'ancien chemin) ;
+    - `models+orjson` : le même chemin avec la classe de réponse par défaut (orjson) ;
+    - `direct` : `documents_response`, projection des documents sans validation puis orjson.
+
+Usage (depuis `fastApiProject/`) :
+    python -m benchmarks.serialization [--sizes 1000,10000] [--repeat 5] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+from benchmarks.common import prepare_environment, summarize
+
+
+def prompt_documents(size: int) -> List[Dict]:
+    return [{
+        "_id": ObjectId(), "user_email": f"user{i % 50}@example.com", "user_prompt": f"Question {i} " * 8,
+        "generated_response": f"Réponse {i} " * 60, "model_used": "gpt", "page": "conversation",
+        "image": None, "image_name": None, "created_at": datetime.utcnow(), "token_estimate": 180,
+    } for i in range(size)]
+
+
+def user_documents(size: int) -> List[Dict]:
+    return [{
+        "_id": ObjectId(), "email": f"user{i}@example.com", "is_active": True, "roles": ["Formé"],
+        "hashed_password": "$2b$12$" + "x" * 53,
+    } for i in range(size)]
+
+
+def build_paths(model, transform: Callable[[Dict], Dict]) -> Dict[str, Callable]:
+    """
+    Construit les chemins de sérialisation comparés pour un modèle de réponse.
+
+    Args:
+        model (Type[BaseModel]): Le modèle d'un élément de la réponse.
+        transform (Callable[[Dict], Dict]): La transformation du document faite par la route.
+
+    Returns:
+        Dict[str, Callable]: Les chemins, chacun une coroutine documents → corps de la réponse (bytes).
+    """
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app.core.serialization import MongoJSONResponse, documents_response
+
+    field = create_response_field(name="Response", type_=List[model])
+
+    async def models(documents):
+        content = await serialize_response(field=field, response_content=[model(**transform(d)) for d in documents])
+        return JSONResponse(content).body
+
+    async def models_orjson(documents):
+        content = await serialize_response(field=field, response_content=[model(**transform(d)) for d in documents])
+        return MongoJSONResponse(content).body
+
+    async def direct(documents):
+        return documents_response(map(transform, documents), model).body
+
+    return {"models": models, "models+orjson": models_orjson, "direct": direct}
+
+
+async def measure(paths: Dict[str, Callable], documents: List[Dict], repeat: int) -> Dict[str, Dict]:
+    results = {}
+    reference = None
+    for name, path in paths.items():
+        body = await path(documents)
+        # même contenu JSON quel que soit le chemin
+        decoded = json.loads(body)
+        reference = decoded if reference is None else reference
+        assert decoded == reference, f"{name} differs from the reference serialization"
+        durations = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await path(documents)
+            durations.append(time.perf_counter() - started)
+        results[name] = {"ms": summarize(durations), "bytes": len(body)}
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Micro-benchmark de la sérialisation des listes de documents")
+    parser.add_argument("--sizes", default="1000,10000", help="Tailles des listes, séparées par des virgules")
+    parser.add_argument("--repeat", type=int, default=5, help="Mesures par chemin et par taille")
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    prepare_environment()
+    from app.api.endpoints.prompts import prompt_services
+    from app.models.prompt_model import PromptDisplay
+    from app.models.users_model import UserDisplay
+
+    scenarios = {
+        "prompts": (build_paths(PromptDisplay, prompt_services.transform_prompt), prompt_documents),
+        "users": (build_paths(UserDisplay, lambda d: d), user_documents),
+    }
+    results = []
+    print(f"{'list':<9}{'size':>7}  {'path':<15}{'p50 ms':>10}{'max ms':>10}{'speedup':>9}")
+    for scenario, (paths, factory) in scenarios.items():
+        for size in (int(value) for value in args.sizes.split(",")):
+            measured = asyncio.run(measure(paths, factory(size), args.repeat))
+            baseline = measured["models"]["ms"]["p50"]
+            for path, result in measured.items():
+                speedup = round(baseline / result["ms"]["p50"], 1)
+                print(f"{scenario:<9}{size:>7}  {path:<15}{result['ms']['p50']:>10}{result['ms']['max']:>10}{speedup:>8}x")
+                results.append({"list": scenario, "size": size, "path": path, "speedup": speedup, **result})
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"repeat": args.repeat, "results": results}, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
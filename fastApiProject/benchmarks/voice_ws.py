@@ -0,0 +1,312 @@
+"""
+Benchmark du WebSocket vocal (`/voice-agent/ws/voice`) sans appel aux fournisseurs.
+
+L'application est démarrée dans ce processus avec des fournisseurs STT/LLM/TTS simulés injectés
+dans `OpenAIVoiceClient` (latences et débits configurables) et une base mongomock. N clients
+WebSocket concurrents envoient un enregistrement audio, au rythme réel ou d'un bloc, puis attendent
+la réponse de chaque tour.
+
+Mesures rapportées :
+- délai du premier audio (TTFA), de `end_audio` au premier chunk audio du tour ;
+- durée complète des tours et débit (tours/s, octets audio/s) ;
+- retard de l'event loop du serveur (un appel bloquant sur la boucle le fait exploser) ;
+- quantiles des étapes mesurées par le serveur (message `timings`).
+
+Usage (depuis `fastApiProject/`) :
+    python -m benchmarks.voice_ws --clients 20 --turns 3 [--audio enregistrement.wav] [--json resultats.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.common import LoopLagMonitor, ServerThread, prepare_environment, summarize
+from benchmarks.fake_providers import FakeOpenAI, ProviderProfile
+
+
+def load_audio(path: Optional[str], seconds: float = 2.0) -> Tuple[bytes, int]:
+    """
+    Charge l'enregistrement à envoyer, en PCM 16 bits mono.
+
+    Args:
+        path (Optional[str]): Le fichier audio (wav, flac, ogg...), ou None pour un signal synthétique.
+        seconds (float): La durée du signal synthétique.
+
+    Returns:
+        Tuple[bytes, int]: L'audio PCM et sa fréquence d'échantillonnage.
+    """
+    if path:
+        import soundfile as sf
+
+        data, rate = sf.read(path, dtype="int16", always_2d=True)
+        return data[:, 0].tobytes(), rate
+    rate = 16000
+    t = np.arange(int(rate * seconds)) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return (signal * 32767).astype(np.int16).tobytes(), rate
+
+
+def build_app(profile: ProviderProfile, monitor: LoopLagMonitor):
+    """
+    Construit l'application de benchmark : le routeur vocal réel, branché sur les fournisseurs simulés.
+
+    Args:
+        profile (ProviderProfile): Les latences simulées.
+        monitor (LoopLagMonitor): La mesure du retard de la boucle du serveur.
+
+    Returns:
+        FastAPI: L'application à servir.
+    """
+    from fastapi import FastAPI
+    from app.api.endpoints import voiceagent_ws
+    from app.core.container import build_container
+
+    container = build_container()
+    container.providers.override("openai", FakeOpenAI(profile))
+    logging.getLogger().setLevel(logging.WARNING)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await container.start()
+        monitor.start()
+        yield
+        await monitor.stop()
+        await container.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.container = container
+    app.include_router(voiceagent_ws.router, prefix="/voice-agent")
+    return app
+
+
+def seed_users(access, count: int) -> List[str]:
+    """
+    Crée un utilisateur par client (le WebSocket vocal identifie la connexion par l'utilisateur).
+
+    Returns:
+        List[str]: Les jetons d'accès des utilisateurs.
+    """
+    from app.auth.oauth2 import create_token_pair
+    from app.models.users_model import UserDisplay
+
+    tokens = []
+    for i in range(count):
+        email = f"bench{i}@example.com"
+        access.users_collection.update_one(
+            {"email": email},
+            {"$set": {"email": email, "is_active": True, "roles": ["Formé"], "hashed_password": "-"}},
+            upsert=True,
+        )
+        user = UserDisplay(**access.users_collection.find_one({"email": email}))
+        tokens.append(create_token_pair(user)["access_token"])
+    return tokens
+
+
+class ClientStats:
+    def __init__(self):
+        self.ttfa: List[float] = []
+        self.turn_seconds: List[float] = []
+        self.audio_bytes = 0
+        self.errors: List[str] = []
+        self.server_timings: List[Dict[str, float]] = []
+
+
+async def run_client(url: str, token: str, audio: bytes, rate: int, args, stats: ClientStats):
+    """Connecte un client, puis enchaîne `args.turns` tours de parole."""
+    import websockets
+    from app.connector.voice_protocol import PROTOCOL_BINARY, decode_frame
+
+    chunk_bytes = int(rate * args.chunk_ms / 1000) * 2
+    chunks = [audio[i:i + chunk_bytes] for i in range(0, len(audio), chunk_bytes)]
+
+    async with websockets.connect(url, subprotocols=["permessage-deflate"], max_size=None) as ws:
+        await ws.send(json.dumps({
+            "token": token,
+            "protocol": PROTOCOL_BINARY,
+            "input_format": "pcm",
+            "input_sample_rate": rate,
+            "output_format": args.output_format,
+        }))
+        connected = json.loads(await ws.recv())
+        if connected.get("status") != "connected":
+            stats.errors.append(str(connected.get("error", connected)))
+            return
+
+        # lecture continue : chaque trame est horodatée à sa réception, même pendant l'envoi de l'audio
+        received: asyncio.Queue = asyncio.Queue()
+
+        async def reader():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    frame = decode_frame(message)
+                    if frame is not None:
+                        received.put_nowait((time.perf_counter(), frame))
+
+        reading = asyncio.create_task(reader())
+        try:
+            for turn_id in range(1, args.turns + 1):
+                await run_turn(ws, received, turn_id, chunks, args, stats)
+        finally:
+            reading.cancel()
+
+
+async def run_turn(ws, received: asyncio.Queue, turn_id: int, chunks: List[bytes], args, stats: ClientStats):
+    """
+    Envoie un enregistrement puis attend la fin du tour (message `timings`).
+
+    L'audio reçu avant `end_audio` (réponse anticipée sur transcription partielle) n'est pas
+    compté dans le TTFA.
+    """
+    from app.connector.voice_protocol import FRAME_AUDIO, FRAME_CONTROL, encode_frame
+
+    for seq, chunk in enumerate(chunks):
+        await ws.send(encode_frame(FRAME_AUDIO, turn_id, seq, chunk))
+        if args.realtime:
+            await asyncio.sleep(args.chunk_ms / 1000)
+    await ws.send(json.dumps({"command": "end_audio"}))
+    ended = time.perf_counter()
+    first_audio = None
+
+    while True:
+        try:
+            at, frame = await asyncio.wait_for(received.get(), args.turn_timeout)
+        except asyncio.TimeoutError:
+            stats.errors.append(f"turn {turn_id}: timeout")
+            return
+        if frame.turn_id != turn_id:
+            continue
+        if frame.frame_type == FRAME_AUDIO:
+            stats.audio_bytes += len(frame.payload)
+            if first_audio is None and at >= ended:
+                first_audio = at
+                stats.ttfa.append(first_audio - ended)
+        elif frame.frame_type == FRAME_CONTROL:
+            control = frame.json()
+            if control.get("status") == "error":
+                stats.errors.append(f"turn {turn_id}: {control.get('message', control)}")
+                return
+            if control.get("status") == "timings":
+                stats.turn_seconds.append(at - ended)
+                stats.server_timings.append(control.get("timings", {}))
+                return
+
+
+async def run_clients(url: str, tokens: List[str], audio: bytes, rate: int, args) -> Tuple[ClientStats, float]:
+    stats = ClientStats()
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_client(url, token, audio, rate, args, stats) for token in tokens),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            stats.errors.append(repr(result))
+    return stats, time.perf_counter() - started
+
+
+def build_report(stats: ClientStats, wall: float, monitor: LoopLagMonitor, args) -> Dict:
+    stages = sorted({stage for timings in stats.server_timings for stage in timings})
+    return {
+        "config": {
+            "clients": args.clients,
+            "turns": args.turns,
+            "realtime": args.realtime,
+            "output_format": args.output_format,
+            "profile": vars(args.profile),
+        },
+        "turns_completed": len(stats.turn_seconds),
+        "errors": stats.errors[:20],
+        "error_count": len(stats.errors),
+        "wall_seconds": round(wall, 3),
+        "turns_per_second": round(len(stats.turn_seconds) / wall, 3) if wall else None,
+        "audio_bytes_per_second": round(stats.audio_bytes / wall) if wall else None,
+        "ttfa_ms": summarize(stats.ttfa),
+        "turn_ms": summarize(stats.turn_seconds),
+        "loop_lag_ms": summarize(monitor.samples),
+        # les mesures du serveur sont déjà en millisecondes
+        "server_stages_ms": {
+            stage: summarize([t[stage] for t in stats.server_timings if stage in t], scale=1.0)
+            for stage in stages
+        },
+    }
+
+
+def print_report(report: Dict):
+    print(f"Clients: {report['config']['clients']}  turns/client: {report['config']['turns']}  "
+          f"completed: {report['turns_completed']}  errors: {report['error_count']}")
+    print(f"Wall: {report['wall_seconds']} s  throughput: {report['turns_per_second']} turns/s, "
+          f"{report['audio_bytes_per_second']} audio B/s")
+    print(f"{'metric':<28}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = [("ttfa", report["ttfa_ms"]), ("turn", report["turn_ms"]), ("loop lag", report["loop_lag_ms"])]
+    rows += [(f"server {stage}", values) for stage, values in report["server_stages_ms"].items()]
+    for name, values in rows:
+        print(f"{name:<28}" + "".join(f"{'-' if values[k] is None else values[k]:>10}" for k in ("p50", "p95", "p99", "max")))
+    for error in report["errors"]:
+        print(f"error: {error}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du WebSocket vocal avec fournisseurs simulés")
+    parser.add_argument("--clients", type=int, default=10, help="Nombre de clients WebSocket concurrents")
+    parser.add_argument("--turns", type=int, default=3, help="Tours de parole par client")
+    parser.add_argument("--audio", help="Enregistrement à envoyer (signal synthétique de 2 s par défaut)")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Durée de chaque chunk audio envoyé")
+    parser.add_argument("--realtime", action=argparse.BooleanOptionalAction, default=True,
+                        help="Envoyer l'audio au rythme réel (sinon d'un bloc)")
+    parser.add_argument("--output-format", default="pcm", help="Format audio demandé au serveur")
+    parser.add_argument("--turn-timeout", type=float, default=60.0, help="Délai maximal d'un tour (s)")
+    parser.add_argument("--stt-latency", type=float, default=ProviderProfile.stt_latency)
+    parser.add_argument("--llm-first-token", type=float, default=ProviderProfile.llm_first_token)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=ProviderProfile.llm_tokens_per_second)
+    parser.add_argument("--llm-tokens", type=int, default=ProviderProfile.llm_tokens)
+    parser.add_argument("--tts-first-byte", type=float, default=ProviderProfile.tts_first_byte)
+    parser.add_argument("--tts-bytes-per-second", type=int, default=ProviderProfile.tts_bytes_per_second)
+    parser.add_argument("--json", help="Fichier où écrire le rapport JSON")
+    parser.add_argument("--max-loop-lag-ms", type=float,
+                        help="Échec (code 1) si le p99 du retard de la boucle dépasse ce seuil")
+    args = parser.parse_args(argv)
+    args.profile = ProviderProfile(
+        stt_latency=args.stt_latency,
+        llm_first_token=args.llm_first_token,
+        llm_tokens_per_second=args.llm_tokens_per_second,
+        llm_tokens=args.llm_tokens,
+        tts_first_byte=args.tts_first_byte,
+        tts_bytes_per_second=args.tts_bytes_per_second,
+    )
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    access = prepare_environment()
+    monitor = LoopLagMonitor()
+    app = build_app(args.profile, monitor)
+    tokens = seed_users(access, args.clients)
+    audio, rate = load_audio(args.audio)
+
+    with ServerThread(app) as server:
+        url = server.base_url.replace("http", "ws", 1) + "/voice-agent/ws/voice"
+        monitor.reset()
+        stats, wall = asyncio.run(run_clients(url, tokens, audio, rate, args))
+
+    report = build_report(stats, wall, monitor, args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    lag_p99 = report["loop_lag_ms"]["p99"]
+    if args.max_loop_lag_ms is not None and lag_p99 is not None and lag_p99 > args.max_loop_lag_ms:
+        print(f"Event loop lag p99 {lag_p99} ms exceeds {args.max_loop_lag_ms} ms")
+        return 1
+    return 1 if report["error_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,32 @@
-import os
-import openai
-from openai import OpenAI
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from app.connector.connectorBDD import MongoAccess
-from app.api.endpoints import users, sessions, prompts, login, documentation, pdf_maker, mails, comments, image, video, voiceagent, eleven, realtime
+from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.container import build_container
+from app.core.loop_monitor import LoopMonitorMiddleware
+from app.core.serialization import MongoJSONResponse
+from app.api.endpoints import users, sessions, prompts, login, documentation, pdf_maker, mails, comments, image, video, voiceagent, voiceagent_ws, eleven, realtime, metrics, admin, analytics, live
 
 
 
 load_dotenv()
 
-client = OpenAI(
-  api_key=os.environ['OPENAI_KEY'],  # c'est la clé par défaut, elle peut être omise
-)
-openai.base_url = "https://api.openai.com/v1"
-openai.default_headers = {"x-foo": "true"}
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    container = app.state.container
+    await container.start()
+    yield
+    # flux en cours, tampons d'écriture puis pools : dans cet ordre
+    await container.shutdown()
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-app = FastAPI()
-mongo_access = MongoAccess()
-mongo_access.initialize_db()
+app = FastAPI(lifespan=lifespan, default_response_class=MongoJSONResponse)
+# ressources de l'application : construites au premier usage, libérées à l'arrêt (voir `Container`)
+app.state.container = build_container()
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +35,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
+# ajouté en dernier : le plus externe, il compresse la réponse finale
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
 
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
@@ -46,25 +56,19 @@ app.include_router(mails.router, prefix="/mails", tags=["mails"])
 app.include_router(image.router, prefix="/image", tags=["image"])
 app.include_router(video.router, prefix="/video", tags=["video"])
 app.include_router(voiceagent.router, prefix="/voice-agent", tags=["voice-agent"])
+app.include_router(voiceagent_ws.router, prefix="/voice-agent", tags=["voice-agent-ws"])
 app.include_router(eleven.router, prefix="/eleven", tags=["eleven"])
 app.include_router(realtime.router, prefix="/realtime", tags=["realtime"])
+app.include_router(metrics.router, tags=["metrics"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(live.router, prefix="/live", tags=["live"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Manag'IA API service"}
 
 
-try:
-    openapi_schema = get_openapi(
-        title="Votre API",
-        version="1.0.0",
-        description="Description de votre API",
-        routes=app.routes,
-    )
-    print(openapi_schema)
-except Exception as e:
-    print("Erreur lors de la génération du schéma OpenAPI:", e)
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
\ No newline at end of file
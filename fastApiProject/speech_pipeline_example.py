@@ -8,6 +8,7 @@ generate a response, and convert the response to speech.
 
 import os
 import asyncio
+from app.connector.http_pool import http_pool
 from app.connector.speech_pipeline import SpeechPipeline
 
 async def run_example():
@@ -57,7 +58,7 @@ async def run_example():
         # 3. Convert chat response to speech
         print("Converting to speech...")
         output_file = "example_output.mp3"
-        audio_bytes = pipeline.synthesize(reply, output_file)
+        audio_bytes = await pipeline.synthesize(reply, output_file)
         print(f"Speech saved to {output_file}")
         
         # Print the updated conversation history
@@ -69,6 +70,8 @@ async def run_example():
             
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        await http_pool.close()
 
 if __name__ == "__main__":
     # Run the example